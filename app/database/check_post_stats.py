@@ -0,0 +1,57 @@
+"""
+Проверка статистики постов пользователей (см. services.stats_service).
+
+Инструмент вычисляет статистику по таблице posts и сравнивает ее с
+сохраненной в user_post_stats. Расхождения печатаются; с флагом --repair
+вычисленные значения записываются вместо сохраненных.
+
+Проверка и исправление выполняются в одной транзакции, поэтому посты,
+созданные во время проверки, не приводят к ошибочному исправлению.
+
+Код возврата 1 означает, что расхождения найдены и не исправлены.
+
+Запуск:
+    python -m app.database.check_post_stats
+    python -m app.database.check_post_stats --repair
+"""
+import argparse
+import sys
+from sqlalchemy.engine import Engine
+from app.database.config import get_engine
+from app.database.migrations import check_schema_version
+from app.services.stats_service import find_stale_stats, repair_stats
+from typing import Any, Dict, List
+
+def check_post_stats(bind: Engine, repair: bool) -> List[Dict[str, Any]]:
+    """
+    Находит и при необходимости исправляет расхождения статистики постов.
+
+    Args:
+        bind (Engine): Движок базы данных
+        repair (bool): Записать вычисленные значения
+
+    Returns:
+        List[Dict[str, Any]]: Найденные расхождения
+    """
+    check_schema_version(bind)
+
+    with bind.begin() as conn:
+        stale = find_stale_stats(conn)
+        if repair:
+            repair_stats(conn, stale)
+    return stale
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repair", action="store_true", help="записать вычисленные значения")
+    args = parser.parse_args()
+
+    stale = check_post_stats(get_engine(), args.repair)
+    for item in stale:
+        print(f"user {item['user_id']}: stored {item['stored']}, actual {item['actual']}")
+    print(f"stale rows: {len(stale)}{' (repaired)' if args.repair and stale else ''}")
+    if stale and not args.repair:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
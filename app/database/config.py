@@ -1,29 +1,175 @@
 """
 Модуль конфигурации базы данных.
 Содержит настройки подключения к SQLite и создание сессии SQLAlchemy.
+
+Поддерживаются два режима работы, выбираемые переменной окружения DATABASE_MODE:
+    sync  - синхронная Session поверх стандартного драйвера sqlite3 (по умолчанию)
+    async - AsyncSession поверх асинхронного драйвера aiosqlite
+
+Движки создаются при первом обращении (get_engine, get_session_factory,
+get_async_session_factory), а не при импорте. Схема БД создается и обновляется
+миграциями (см. модуль migrations).
+
+Настройки соединений и разделение чтения и записи описаны в модуле profile,
+измерение SQL-запросов - в модуле profiler.
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from app.database.profile import (
+    DATABASE_READ_POOL_SIZE, DATABASE_READ_WRITE_SPLIT, DATABASE_WRITE_TIMEOUT,
+    RoutingSession, apply_pragmas, readonly_url,
+)
+from app.database.profiler import install_profiler
+from app.metrics import phase
+from typing import Optional
 import os
+import threading
+
+# Режим работы с базой данных: "sync" или "async"
+DATABASE_MODE = os.getenv("DATABASE_MODE", "sync")
 
-# Создание директории для базы данных, если она не существует
-os.makedirs("./data", exist_ok=True)
+# Каталог файла базы данных
+DATABASE_DIR = "./data"
 
 # Строка подключения к базе данных (SQLite)
 SQLALCHEMY_DATABASE_URL = "sqlite:///./data/app.db"
 
-# Создание движка SQLAlchemy с поддержкой внешних ключей для SQLite
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
-
-# Создание класса SessionLocal для создания экземпляров сессий
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Строка подключения к той же базе данных через асинхронный драйвер
+SQLALCHEMY_ASYNC_DATABASE_URL = "sqlite+aiosqlite:///./data/app.db"
 
 # Базовый класс для моделей SQLAlchemy
 Base = declarative_base()
 
+# Движки и фабрики сессий создаются при первом обращении (см. get_engine),
+# а не при импорте: импорт модуля не создает каталогов и пулов соединений
+_engine: Optional[Engine] = None
+_session_factory: Optional[sessionmaker] = None
+_async_session_factory = None
+_lock = threading.Lock()
+
+def _listen_pragmas(sync_engine, readonly: bool) -> None:
+    """
+    Подписывает движок на применение настроек профиля к новым соединениям
+    и на измерение SQL-запросов.
+
+    Args:
+        sync_engine (Engine): Синхронный движок (для асинхронного - его sync_engine)
+        readonly (bool): Соединения движка только для чтения
+    """
+    event.listen(
+        sync_engine, "connect",
+        lambda dbapi_connection, connection_record: apply_pragmas(dbapi_connection, readonly)
+    )
+    install_profiler(sync_engine)
+
+def _create_engines() -> None:
+    global _engine, _session_factory
+    os.makedirs(DATABASE_DIR, exist_ok=True)
+
+    # Движок для записи. При разделении чтения и записи у него одно соединение:
+    # транзакции записи ждут его в очереди пула, а не конкурируют за блокировку файла
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        **({"pool_size": 1, "max_overflow": 0, "pool_timeout": DATABASE_WRITE_TIMEOUT}
+           if DATABASE_READ_WRITE_SPLIT else {})
+    )
+    _listen_pragmas(engine, readonly=False)
+
+    # Движок для чтения: пул соединений только для чтения. Сессия удерживает
+    # соединение между await, поэтому сверх пула разрешены временные соединения
+    read_engine = None
+    if DATABASE_READ_WRITE_SPLIT:
+        read_engine = create_engine(
+            readonly_url(SQLALCHEMY_DATABASE_URL),
+            connect_args={"check_same_thread": False},
+            pool_size=DATABASE_READ_POOL_SIZE,
+            max_overflow=-1,
+        )
+        _listen_pragmas(read_engine, readonly=True)
+
+    _session_factory = sessionmaker(
+        class_=RoutingSession, autocommit=False, autoflush=False,
+        writer=engine, reader=read_engine
+    )
+    _engine = engine
+
+def get_engine() -> Engine:
+    """
+    Возвращает движок для записи, создавая движки при первом обращении.
+
+    Returns:
+        Engine: Синхронный движок для записи
+    """
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                _create_engines()
+    return _engine
+
+def get_session_factory() -> sessionmaker:
+    """
+    Возвращает фабрику синхронных сессий.
+
+    Returns:
+        sessionmaker: Фабрика сессий RoutingSession
+    """
+    get_engine()
+    return _session_factory
+
+def _create_async_engines() -> None:
+    global _async_session_factory
+    # Асинхронные движки создаются только в режиме async,
+    # чтобы синхронный режим не требовал установленного aiosqlite
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    os.makedirs(DATABASE_DIR, exist_ok=True)
+
+    # По умолчанию aiosqlite для файловой БД использует NullPool, то есть
+    # открывает новое соединение (и поток драйвера) на каждую сессию
+    async_engine = create_async_engine(
+        SQLALCHEMY_ASYNC_DATABASE_URL,
+        poolclass=AsyncAdaptedQueuePool,
+        **({"pool_size": 1, "max_overflow": 0, "pool_timeout": DATABASE_WRITE_TIMEOUT}
+           if DATABASE_READ_WRITE_SPLIT else {})
+    )
+    _listen_pragmas(async_engine.sync_engine, readonly=False)
+
+    async_read_engine = None
+    if DATABASE_READ_WRITE_SPLIT:
+        async_read_engine = create_async_engine(
+            readonly_url(SQLALCHEMY_ASYNC_DATABASE_URL),
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=DATABASE_READ_POOL_SIZE,
+            max_overflow=-1,
+        )
+        _listen_pragmas(async_read_engine.sync_engine, readonly=True)
+
+    # expire_on_commit=False: после commit атрибуты объектов остаются загруженными,
+    # иначе обращение к ним при сериализации ответа потребовало бы нового запроса
+    _async_session_factory = async_sessionmaker(
+        autoflush=False, expire_on_commit=False,
+        sync_session_class=RoutingSession,
+        writer=async_engine.sync_engine,
+        reader=async_read_engine.sync_engine if async_read_engine is not None else None,
+    )
+
+def get_async_session_factory():
+    """
+    Возвращает фабрику асинхронных сессий, создавая асинхронные движки при первом обращении.
+
+    Returns:
+        async_sessionmaker: Фабрика сессий AsyncSession
+    """
+    if _async_session_factory is None:
+        with _lock:
+            if _async_session_factory is None:
+                _create_async_engines()
+    return _async_session_factory
+
 # Функция зависимостей для получения сессии БД
 def get_db():
     """
@@ -32,8 +178,43 @@ def get_db():
     Yields:
         Session: Объект сессии базы данных.
     """
-    db = SessionLocal()
+    db = get_session_factory()()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    """
+    Функция-зависимость для получения асинхронной сессии базы данных.
+
+    Yields:
+        AsyncSession: Объект асинхронной сессии базы данных.
+    """
+    async with get_async_session_factory()() as db:
+        yield db
+
+# Зависимость, используемая роутерами: сессия выбирается по DATABASE_MODE
+get_session = get_async_db if DATABASE_MODE == "async" else get_db
+
+async def run_db(db, func, *args, **kwargs):
+    """
+    Выполняет синхронную функцию сервиса в контексте переданной сессии.
+
+    Для AsyncSession функция выполняется через run_sync: запросы уходят
+    в асинхронный драйвер, и цикл событий не блокируется на время ввода-вывода.
+    Для обычной Session функция вызывается напрямую.
+
+    Args:
+        db (Session | AsyncSession): Сессия базы данных
+        func (Callable): Функция, первым аргументом принимающая Session
+        *args: Позиционные аргументы функции
+        **kwargs: Именованные аргументы функции
+
+    Returns:
+        Any: Результат функции
+    """
+    with phase("db"):
+        if DATABASE_MODE == "async":
+            return await db.run_sync(func, *args, **kwargs)
+        return func(db, *args, **kwargs)
\ No newline at end of file
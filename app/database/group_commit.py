@@ -0,0 +1,174 @@
+"""
+Модуль содержит групповую фиксацию записей (group commit).
+
+Операции записи из конкурентных запросов ставятся в очередь и выполняются
+пачкой в одной транзакции: пачка отправляется, когда набралось
+GROUP_COMMIT_MAX_BATCH операций или прошло GROUP_COMMIT_INTERVAL_MS
+миллисекунд с момента поступления первой. Каждый вызывающий получает
+собственный результат или собственную ошибку.
+
+Режим включается переменной окружения GROUP_COMMIT=1.
+
+Операция - синхронная функция, первым аргументом принимающая Session.
+Она не должна вызывать commit и должна выполнять проверки до изменения
+данных: HTTPException, выброшенное операцией, возвращается только ее
+вызывающему, а остальные операции пачки фиксируются. Любая другая ошибка
+откатывает пачку, после чего операции повторяются по одной.
+"""
+import asyncio
+import contextvars
+import os
+from typing import Any, Callable, List, Optional, Tuple
+from fastapi import HTTPException
+from app.database import config
+from app.metrics import phase
+
+GROUP_COMMIT = os.getenv("GROUP_COMMIT", "0") == "1"
+GROUP_COMMIT_INTERVAL_MS = float(os.getenv("GROUP_COMMIT_INTERVAL_MS", "2"))
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "64"))
+
+# Операция пачки: функция и ее аргументы
+Operation = Tuple[Callable, tuple]
+
+# Результат операции: значение или исключение
+Outcome = Tuple[Any, Optional[BaseException]]
+
+def _execute_batch(db, operations: List[Operation]) -> List[Outcome]:
+    """
+    Выполняет пачку операций в одной транзакции.
+
+    Args:
+        db (Session): Сессия базы данных
+        operations (List[Operation]): Операции пачки
+
+    Returns:
+        List[Outcome]: Результаты операций в порядке поступления
+    """
+    outcomes: List[Outcome] = []
+    try:
+        for func, args in operations:
+            try:
+                outcomes.append((func(db, *args), None))
+            except HTTPException as exc:
+                outcomes.append((None, exc))
+        db.commit()
+        return outcomes
+    except Exception:
+        db.rollback()
+
+    # Пачка не удалась целиком - выполняем операции по одной,
+    # чтобы ошибка досталась только ее вызывающему
+    outcomes = []
+    for func, args in operations:
+        try:
+            result = func(db, *args)
+            db.commit()
+            outcomes.append((result, None))
+        except Exception as exc:
+            db.rollback()
+            outcomes.append((None, exc))
+    return outcomes
+
+def _execute_batch_sync(operations: List[Operation]) -> List[Outcome]:
+    """
+    Выполняет пачку операций в отдельной синхронной сессии.
+
+    Args:
+        operations (List[Operation]): Операции пачки
+
+    Returns:
+        List[Outcome]: Результаты операций
+    """
+    db = config.get_session_factory()(expire_on_commit=False)
+    try:
+        return _execute_batch(db, operations)
+    finally:
+        db.close()
+
+class GroupCommitter:
+    """
+    Очередь операций записи с групповой фиксацией.
+
+    Атрибуты:
+        interval (float): Максимальное время накопления пачки в секундах
+        max_batch (int): Максимальное количество операций в пачке
+    """
+
+    def __init__(self, interval: float, max_batch: int):
+        self.interval = interval
+        self.max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(self, func: Callable, *args) -> Any:
+        """
+        Ставит операцию в очередь и ждет фиксации ее пачки.
+
+        Args:
+            func (Callable): Операция, первым аргументом принимающая Session
+            *args: Аргументы операции
+
+        Returns:
+            Any: Результат операции
+
+        Raises:
+            Exception: Ошибка, возникшая при выполнении операции
+        """
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            # Задача создается в пустом контексте, иначе она унаследовала бы
+            # контекст первого запроса (его метрики и статистику SQL-запросов)
+            self._task = contextvars.Context().run(asyncio.create_task, self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((func, args, future))
+        with phase("db"):
+            return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.interval
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(batch)
+
+    async def _flush(self, batch: list) -> None:
+        operations = [(func, args) for func, args, _ in batch]
+        try:
+            if config.DATABASE_MODE == "async":
+                async with config.get_async_session_factory()() as db:
+                    outcomes = await db.run_sync(_execute_batch, operations)
+            else:
+                # Синхронная сессия работает в потоке, чтобы фиксация не блокировала цикл событий
+                outcomes = await asyncio.get_running_loop().run_in_executor(
+                    None, _execute_batch_sync, operations
+                )
+        except Exception as exc:
+            outcomes = [(None, exc)] * len(batch)
+
+        for (_, _, future), (result, error) in zip(batch, outcomes):
+            # Вызывающий мог уже отменить ожидание
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def stop(self) -> None:
+        """
+        Останавливает фоновую задачу очереди.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+group_committer = GroupCommitter(GROUP_COMMIT_INTERVAL_MS / 1000, GROUP_COMMIT_MAX_BATCH)
@@ -0,0 +1,169 @@
+"""
+Перенос больших текстов существующих постов в хранилище больших текстов.
+
+Столбцы хранения текста (body_hash, body_size, preview, text_codec,
+text_compressed) добавляются миграцией схемы (см. database.migrations).
+Инструмент:
+    1. проверяет, что схема БД обновлена миграциями;
+    2. переносит тексты размером от BLOB_THRESHOLD байт в хранилище (см. blob_store),
+       оставляя в строке хеш, размер и превью;
+    3. с флагом --compress сжимает остальные тексты кодеком POST_COMPRESSION (см. models.codecs);
+    4. с флагом --gc удаляет из хранилища файлы, на которые не ссылается ни один пост.
+
+Сборка мусора безопасна при работающем сервере: файл нового поста пишется до
+фиксации строки, поэтому удаляются только файлы старше --gc-grace секунд
+(по умолчанию час). Запись файла, который уже есть в хранилище, обновляет
+время его изменения (см. blob_store.put_blob).
+
+Перенос идет пачками по id, каждая пачка - отдельная транзакция, поэтому
+инструмент можно прервать и запустить повторно.
+
+Запуск:
+    python -m app.database.migrate_blobs --batch-size 100 --gc
+    POST_COMPRESSION=zlib python -m app.database.migrate_blobs --compress
+"""
+import argparse
+import time
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from app.database.config import get_engine
+from app.database.migrations import check_schema_version
+from app.models.codecs import POST_COMPRESSION_THRESHOLD, encode_text
+from app.services import blob_store
+
+# Минимальный возраст файла, удаляемого сборкой мусора, в секундах
+BLOB_GC_GRACE = 3600
+
+def move_large_bodies(bind: Engine, batch_size: int) -> int:
+    """
+    Переносит большие тексты в хранилище.
+
+    Args:
+        bind (Engine): Движок базы данных
+        batch_size (int): Количество постов в одной транзакции
+
+    Returns:
+        int: Количество перенесенных постов
+    """
+    if blob_store.BLOB_THRESHOLD <= 0:
+        return 0
+
+    moved = 0
+    last_id = 0
+    while True:
+        with bind.begin() as conn:
+            rows = conn.execute(
+                text(
+                    "SELECT id, text FROM posts "
+                    "WHERE id > :last_id AND body_hash IS NULL "
+                    "AND length(CAST(text AS BLOB)) >= :threshold "
+                    "ORDER BY id LIMIT :limit"
+                ),
+                {"last_id": last_id, "threshold": blob_store.BLOB_THRESHOLD, "limit": batch_size},
+            ).all()
+            if not rows:
+                return moved
+
+            for post_id, body in rows:
+                conn.execute(
+                    text(
+                        "UPDATE posts SET text = '', body_hash = :digest, "
+                        "body_size = :size, preview = :preview WHERE id = :id"
+                    ),
+                    {
+                        "digest": blob_store.put_blob(body.encode("utf-8")),
+                        "size": len(body.encode("utf-8")),
+                        "preview": body[:blob_store.BLOB_PREVIEW_CHARS],
+                        "id": post_id,
+                    },
+                )
+            moved += len(rows)
+            last_id = rows[-1][0]
+
+def compress_bodies(bind: Engine, batch_size: int) -> int:
+    """
+    Сжимает тексты, хранящиеся в строках постов.
+
+    Args:
+        bind (Engine): Движок базы данных
+        batch_size (int): Количество постов в одной транзакции
+
+    Returns:
+        int: Количество сжатых постов
+    """
+    compressed = 0
+    last_id = 0
+    while True:
+        with bind.begin() as conn:
+            rows = conn.execute(
+                text(
+                    "SELECT id, text FROM posts "
+                    "WHERE id > :last_id AND body_hash IS NULL AND text_codec IS NULL "
+                    "AND length(CAST(text AS BLOB)) >= :threshold "
+                    "ORDER BY id LIMIT :limit"
+                ),
+                {"last_id": last_id, "threshold": POST_COMPRESSION_THRESHOLD, "limit": batch_size},
+            ).all()
+            if not rows:
+                return compressed
+
+            for post_id, body in rows:
+                encoded = encode_text(body.encode("utf-8"))
+                if encoded is None:
+                    continue
+                conn.execute(
+                    text(
+                        "UPDATE posts SET text = '', text_codec = :codec, "
+                        "text_compressed = :data WHERE id = :id"
+                    ),
+                    {"codec": encoded[0], "data": encoded[1], "id": post_id},
+                )
+                compressed += 1
+            last_id = rows[-1][0]
+
+def collect_garbage(bind: Engine, grace: float = BLOB_GC_GRACE) -> int:
+    """
+    Удаляет файлы хранилища, на которые не ссылается ни один пост.
+
+    Файлы, измененные за последние grace секунд, не удаляются: на них могут
+    ссылаться посты, которые создаются сейчас и еще не зафиксированы.
+    Время изменения проверяется еще раз непосредственно перед удалением:
+    файл мог быть записан повторно (см. blob_store.put_blob) после того,
+    как были прочитаны ссылки.
+
+    Args:
+        bind (Engine): Движок базы данных
+        grace (float): Минимальный возраст удаляемого файла в секундах
+
+    Returns:
+        int: Количество удаленных файлов
+    """
+    cutoff = time.time() - grace
+    candidates = blob_store.list_blobs(modified_before=cutoff)
+    with bind.connect() as conn:
+        referenced = set(conn.execute(
+            text("SELECT DISTINCT body_hash FROM posts WHERE body_hash IS NOT NULL")
+        ).scalars())
+
+    orphaned = candidates - referenced
+    return sum(blob_store.delete_blob(digest, modified_before=cutoff) for digest in orphaned)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--compress", action="store_true", help="сжать тексты кодеком POST_COMPRESSION")
+    parser.add_argument("--gc", action="store_true", help="удалить файлы, на которые не ссылается ни один пост")
+    parser.add_argument("--gc-grace", type=float, default=BLOB_GC_GRACE, help="минимальный возраст удаляемого файла в секундах")
+    args = parser.parse_args()
+
+    engine = get_engine()
+    check_schema_version(engine)
+
+    print(f"moved to blob store: {move_large_bodies(engine, args.batch_size)}")
+    if args.compress:
+        print(f"compressed: {compress_bodies(engine, args.batch_size)}")
+    if args.gc:
+        print(f"removed orphaned blobs: {collect_garbage(engine, args.gc_grace)}")
+
+if __name__ == "__main__":
+    main()
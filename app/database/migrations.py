@@ -0,0 +1,198 @@
+"""
+Версионированные миграции схемы базы данных.
+
+Версия схемы хранится в заголовке файла SQLite (PRAGMA user_version), поэтому
+проверка версии при запуске приложения (check_schema_version) - одно чтение
+без обращения к таблицам. Приложение схему не создает: миграции применяются
+отдельной командой до запуска сервера.
+
+Каждая миграция выполняется в своей транзакции BEGIN IMMEDIATE вместе
+с записью нового номера версии: прерванная миграция откатывается целиком,
+а одновременно запущенные экземпляры команды применяют миграции по очереди.
+Миграции учитывают базы данных, созданные до появления версий
+(Base.metadata.create_all): таблицы и индексы создаются только при отсутствии,
+столбцы добавляются только недостающие.
+
+Новая миграция добавляется в конец MIGRATIONS со следующим номером версии.
+
+Запуск:
+    python -m app.database.migrations          - применить недостающие миграции
+    python -m app.database.migrations --check  - только проверить версию (код возврата 1, если схема устарела)
+"""
+import argparse
+import sys
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from app.database.config import get_engine
+from app.models.post import SEARCH_TOKENIZER
+from app.models.user import User  # noqa: F401 - нужен для настройки связи Post.user
+from app.services.search_service import create_search_index, index_all_posts
+from app.services.stats_service import find_stale_stats, repair_stats
+from typing import Callable, List, Tuple
+
+# Количество постов, загружаемых за раз при построении индексов
+MIGRATION_BATCH_SIZE = 500
+
+# Столбцы хранения текста, которые добавляются в таблицу posts
+POST_STORAGE_COLUMNS = {
+    "body_hash": "VARCHAR(64)",
+    "body_size": "INTEGER",
+    "preview": "TEXT",
+    "text_codec": "VARCHAR(16)",
+    "text_compressed": "BLOB",
+}
+
+def _create_users_and_posts(conn: Connection) -> None:
+    conn.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS users ("
+        "id INTEGER NOT NULL, email VARCHAR NOT NULL, password VARCHAR NOT NULL, "
+        "created_at DATETIME NOT NULL, PRIMARY KEY (id))"
+    )
+    conn.exec_driver_sql("CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email)")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_users_id ON users (id)")
+    conn.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS posts ("
+        "id INTEGER NOT NULL, text TEXT NOT NULL, user_id INTEGER NOT NULL, "
+        "created_at DATETIME NOT NULL, PRIMARY KEY (id), "
+        "FOREIGN KEY(user_id) REFERENCES users (id))"
+    )
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_posts_id ON posts (id)")
+
+def _add_post_storage_columns(conn: Connection) -> None:
+    # Столбцы хранилища больших текстов и сжатия (см. services.blob_store, models.codecs)
+    existing = {column["name"] for column in inspect(conn).get_columns("posts")}
+    for name, ddl_type in POST_STORAGE_COLUMNS.items():
+        if name not in existing:
+            conn.exec_driver_sql(f"ALTER TABLE posts ADD COLUMN {name} {ddl_type}")
+    conn.exec_driver_sql(
+        "UPDATE posts SET body_size = length(CAST(text AS BLOB)) WHERE body_size IS NULL"
+    )
+
+def _add_posts_page_index(conn: Connection) -> None:
+    # Индекс постраничной выборки постов пользователя (см. post_service.get_user_posts_page)
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_posts_user_id_created_at_id ON posts (user_id, created_at, id)"
+    )
+
+def _create_search_index(conn: Connection) -> None:
+    # Полнотекстовый индекс (см. services.search_service). Если таблица уже была,
+    # она поддерживалась приложением и заполнена; новая заполняется всеми постами
+    if inspect(conn).has_table("posts_fts"):
+        return
+    conn.exec_driver_sql(
+        "CREATE VIRTUAL TABLE posts_fts USING fts5("
+        f"owner, text, content='', tokenize='{SEARCH_TOKENIZER}')"
+    )
+    with Session(bind=conn) as db:
+        index_all_posts(db, MIGRATION_BATCH_SIZE)
+
+def _recreate_search_index(conn: Connection) -> None:
+    # Contentless-таблица индекса заменяется таблицей с копией текста: запись
+    # удаляется по rowid без исходного текста (см. services.search_service)
+    with Session(bind=conn) as db:
+        create_search_index(db, MIGRATION_BATCH_SIZE)
+
+def _create_post_stats(conn: Connection) -> None:
+    # Статистика постов (см. services.stats_service) вычисляется для существующих постов
+    conn.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS user_post_stats ("
+        "user_id INTEGER NOT NULL, post_count INTEGER NOT NULL, total_bytes INTEGER NOT NULL, "
+        "last_post_at DATETIME, PRIMARY KEY (user_id), "
+        "FOREIGN KEY(user_id) REFERENCES users (id))"
+    )
+    repair_stats(conn, find_stale_stats(conn))
+
+# Миграции в порядке применения: (версия, описание, функция)
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "таблицы users и posts", _create_users_and_posts),
+    (2, "столбцы хранения текста постов", _add_post_storage_columns),
+    (3, "индекс постов (user_id, created_at, id)", _add_posts_page_index),
+    (4, "полнотекстовый индекс posts_fts", _create_search_index),
+    (5, "таблица статистики постов user_post_stats", _create_post_stats),
+    (6, "полнотекстовый индекс posts_fts с удалением по rowid", _recreate_search_index),
+]
+
+# Версия схемы, которую ожидает приложение
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def schema_version(conn: Connection) -> int:
+    """
+    Возвращает версию схемы БД.
+
+    Args:
+        conn (Connection): Соединение с базой данных
+
+    Returns:
+        int: Номер последней примененной миграции (0 для новой БД)
+    """
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+def check_schema_version(bind: Engine) -> None:
+    """
+    Проверяет, что версия схемы БД совпадает с ожидаемой приложением.
+
+    Args:
+        bind (Engine): Движок базы данных
+
+    Raises:
+        RuntimeError: Если схема устарела или создана более новой версией приложения
+    """
+    with bind.connect() as conn:
+        version = schema_version(conn)
+    if version < SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Версия схемы БД {version}, приложению нужна {SCHEMA_VERSION}: "
+            "выполните python -m app.database.migrations"
+        )
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Версия схемы БД {version} новее версии приложения {SCHEMA_VERSION}"
+        )
+
+def migrate(bind: Engine) -> List[int]:
+    """
+    Применяет недостающие миграции.
+
+    Args:
+        bind (Engine): Движок базы данных
+
+    Returns:
+        List[int]: Версии примененных миграций
+    """
+    applied = []
+    for version, _, apply in MIGRATIONS:
+        with bind.connect() as conn:
+            # Версия перечитывается под блокировкой записи: миграцию могла
+            # применить другая одновременно запущенная команда
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            if schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            apply(conn)
+            conn.exec_driver_sql(f"PRAGMA user_version = {version}")
+            conn.commit()
+        applied.append(version)
+    return applied
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="только проверить версию схемы")
+    args = parser.parse_args()
+
+    engine = get_engine()
+    if args.check:
+        with engine.connect() as conn:
+            version = schema_version(conn)
+        print(f"schema version: {version} (expected {SCHEMA_VERSION})")
+        if version != SCHEMA_VERSION:
+            sys.exit(1)
+        return
+
+    descriptions = {version: description for version, description, _ in MIGRATIONS}
+    for version in migrate(engine):
+        print(f"applied {version}: {descriptions[version]}")
+    print(f"schema version: {SCHEMA_VERSION}")
+
+if __name__ == "__main__":
+    main()
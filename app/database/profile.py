@@ -0,0 +1,118 @@
+"""
+Модуль содержит профиль работы с SQLite: настройки соединений (PRAGMA)
+и разделение чтения и записи.
+
+Настройки задаются переменными окружения:
+    SQLITE_JOURNAL_MODE   - режим журнала (по умолчанию WAL)
+    SQLITE_SYNCHRONOUS    - режим синхронизации (по умолчанию NORMAL)
+    SQLITE_MMAP_SIZE      - размер отображаемой в память области в байтах (по умолчанию 256 МБ)
+    SQLITE_CACHE_SIZE     - размер кэша страниц; отрицательное значение - в КиБ (по умолчанию 64 МБ)
+    DATABASE_READ_WRITE_SPLIT - 1, чтобы читать через пул соединений только для чтения,
+                                а писать через одно выделенное соединение (по умолчанию 0)
+    DATABASE_READ_POOL_SIZE   - размер пула соединений для чтения (по умолчанию 8)
+"""
+import os
+from typing import Any, Optional
+from sqlalchemy import Delete, Insert, Update, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", str(-64 * 1024)))
+DATABASE_READ_WRITE_SPLIT = os.getenv("DATABASE_READ_WRITE_SPLIT", "0") == "1"
+DATABASE_READ_POOL_SIZE = int(os.getenv("DATABASE_READ_POOL_SIZE", "8"))
+
+# Сколько секунд запрос ждет освобождения соединения писателя
+DATABASE_WRITE_TIMEOUT = float(os.getenv("DATABASE_WRITE_TIMEOUT", "30"))
+
+def readonly_url(url: str) -> str:
+    """
+    Преобразует строку подключения к файлу SQLite в подключение только для чтения.
+
+    Args:
+        url (str): Строка подключения вида sqlite:///./path.db
+
+    Returns:
+        str: Строка подключения с mode=ro
+    """
+    prefix, path = url.split(":///", 1)
+    return f"{prefix}:///file:{path}?mode=ro&uri=true"
+
+def apply_pragmas(dbapi_connection: Any, readonly: bool) -> None:
+    """
+    Применяет настройки профиля к новому соединению SQLite.
+
+    Режим журнала и синхронизации задаются только соединению для записи:
+    соединение только для чтения не может менять режим журнала.
+
+    Args:
+        dbapi_connection (Any): DBAPI-соединение
+        readonly (bool): Соединение только для чтения
+    """
+    cursor = dbapi_connection.cursor()
+    if not readonly:
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+    cursor.close()
+
+class RoutingSession(Session):
+    """
+    Сессия, направляющая запись в соединение писателя, а чтение - в пул читателей.
+
+    Запись (flush и явные INSERT/UPDATE/DELETE) всегда идет через writer.
+    У writer одно соединение, поэтому конкурирующие транзакции записи
+    встают в очередь пула, а не получают "database is locked". После первой
+    записи и до конца транзакции чтение тоже идет через writer, чтобы сессия
+    видела собственные незафиксированные изменения.
+
+    Операции вида чтение-проверка-запись объявляют запись заранее
+    (use_writer): тогда и чтение до первой записи идет через writer. Сессия удерживает единственное соединение writer
+    до конца транзакции, поэтому между проверкой и записью данные не может
+    изменить другая транзакция, а читатель мог бы вернуть уже устаревшие данные.
+
+    Атрибуты:
+        writer (Engine): Движок с единственным соединением для записи
+        reader (Optional[Engine]): Движок с пулом соединений только для чтения
+    """
+
+    def __init__(self, *args, writer: Engine, reader: Optional[Engine] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writer = writer
+        self.reader = reader
+        self.writing = False
+
+    def use_writer(self) -> None:
+        """
+        Направляет все запросы до конца текущей транзакции в соединение писателя.
+        """
+        self.writing = True
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.reader is None:
+            return self.writer
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            self.writing = True
+        return self.writer if self.writing else self.reader
+
+def use_writer(db: Session) -> None:
+    """
+    Объявляет, что транзакция сессии будет изменять данные.
+
+    Для RoutingSession чтение до конца транзакции идет через writer
+    (см. RoutingSession.use_writer); для остальных сессий ничего не меняется.
+
+    Args:
+        db (Session): Сессия базы данных
+    """
+    if isinstance(db, RoutingSession):
+        db.use_writer()
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _reset_writing(session: RoutingSession, transaction) -> None:
+    # После завершения корневой транзакции чтение снова идет через пул читателей
+    if transaction.parent is None:
+        session.writing = False
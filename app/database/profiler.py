@@ -0,0 +1,165 @@
+"""
+Модуль содержит профилирование SQL-запросов.
+
+Обработчики событий движка (см. install_profiler) измеряют каждый запрос,
+отправленный драйверу, и:
+    1. добавляют его к статистике текущего контекста, открытой profile_queries:
+       QueryProfilerMiddleware открывает ее на время HTTP-запроса, тесты -
+       вокруг проверяемого кода (см. assert_query_budget);
+    2. записывают запросы дольше SQL_SLOW_QUERY_MS в журнал медленных
+       запросов app.sql.slow вместе с планом (EXPLAIN QUERY PLAN) и ID
+       HTTP-запроса (см. app.middlewares.request_context).
+
+Учитываются запросы к курсору; COMMIT и ROLLBACK выполняются методами
+DBAPI-соединения и в статистику не входят. Запросы пачек групповой фиксации
+выполняются в фоновой задаче и не относятся ни к одному HTTP-запросу.
+
+Настройки задаются переменными окружения:
+    SQL_SLOW_QUERY_MS   - порог медленного запроса в миллисекундах (по умолчанию 100; 0 отключает журнал)
+"""
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.middlewares.request_context import current_request_id
+
+SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "100"))
+
+# Запросы, для которых SQLite может построить план
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+slow_query_logger = logging.getLogger("app.sql.slow")
+
+class QueryStats:
+    """
+    Статистика SQL-запросов, выполненных в контексте.
+
+    Атрибуты:
+        count (int): Количество запросов
+        duration (float): Суммарное время запросов в секундах
+        statements (Optional[List[str]]): Тексты запросов, если их запись включена
+    """
+    __slots__ = ("count", "duration", "statements")
+
+    def __init__(self, record_statements: bool = False):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Optional[List[str]] = [] if record_statements else None
+
+    def add(self, statement: str, duration: float) -> None:
+        """
+        Учитывает выполненный запрос.
+
+        Args:
+            statement (str): Текст запроса
+            duration (float): Время выполнения в секундах
+        """
+        self.count += 1
+        self.duration += duration
+        if self.statements is not None:
+            self.statements.append(statement)
+
+# Статистика текущего контекста. None, если профилирование не открыто
+_current_queries: ContextVar[Optional[QueryStats]] = ContextVar("current_queries", default=None)
+
+@contextmanager
+def profile_queries(record_statements: bool = False) -> Iterator[QueryStats]:
+    """
+    Собирает статистику SQL-запросов, выполненных внутри блока.
+
+    Вложенный блок заменяет статистику внешнего на время своего выполнения.
+
+    Args:
+        record_statements (bool): Сохранять тексты запросов
+
+    Yields:
+        QueryStats: Статистика, заполняемая по мере выполнения запросов
+    """
+    stats = QueryStats(record_statements)
+    token = _current_queries.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_queries.reset(token)
+
+@contextmanager
+def assert_query_budget(max_queries: int) -> Iterator[QueryStats]:
+    """
+    Проверяет, что код внутри блока выполняет не больше max_queries SQL-запросов.
+
+    Предназначено для тестов: рост числа запросов в сервисах приводит
+    к падению теста с перечнем выполненных запросов.
+
+    Args:
+        max_queries (int): Допустимое количество запросов
+
+    Yields:
+        QueryStats: Статистика запросов блока
+
+    Raises:
+        AssertionError: Если запросов больше max_queries
+    """
+    with profile_queries(record_statements=True) as stats:
+        yield stats
+    if stats.count > max_queries:
+        listing = "\n".join(f"  {index}. {statement}" for index, statement in enumerate(stats.statements, 1))
+        raise AssertionError(f"выполнено {stats.count} SQL-запросов при бюджете {max_queries}:\n{listing}")
+
+def explain_query_plan(conn, statement: str, parameters: Any) -> List[str]:
+    """
+    Возвращает план запроса SQLite.
+
+    План строится отдельным курсором того же DBAPI-соединения, поэтому
+    видит ту же транзакцию и те же временные данные, что и сам запрос.
+
+    Args:
+        conn (Connection): Соединение SQLAlchemy
+        statement (str): Текст запроса
+        parameters (Any): Параметры запроса
+
+    Returns:
+        List[str]: Строки плана (столбец detail)
+    """
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[-1] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+def _log_slow_query(conn, statement: str, parameters: Any, executemany: bool, duration: float) -> None:
+    plan: List[str] = []
+    if statement.lstrip().upper().startswith(EXPLAINABLE):
+        try:
+            plan = explain_query_plan(conn, statement, parameters[0] if executemany else parameters)
+        except Exception as exc:
+            plan = [f"(план недоступен: {exc})"]
+    slow_query_logger.warning(
+        "медленный запрос %.1f мс (запрос %s): %s%s",
+        duration * 1000, current_request_id() or "-", statement, "".join(f"\n  {line}" for line in plan),
+    )
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    duration = time.perf_counter() - conn.info["query_started"].pop()
+    stats = _current_queries.get()
+    if stats is not None:
+        stats.add(statement, duration)
+    if SQL_SLOW_QUERY_MS and duration * 1000 >= SQL_SLOW_QUERY_MS:
+        _log_slow_query(conn, statement, parameters, executemany, duration)
+
+def install_profiler(sync_engine: Engine) -> None:
+    """
+    Подписывает движок на измерение SQL-запросов.
+
+    Args:
+        sync_engine (Engine): Синхронный движок (для асинхронного - его sync_engine)
+    """
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
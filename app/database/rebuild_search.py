@@ -0,0 +1,49 @@
+"""
+Построение полнотекстового индекса постов (см. services.search_service) заново.
+
+Инструмент:
+    1. проверяет, что схема БД обновлена миграциями (см. database.migrations);
+    2. удаляет таблицу индекса и создает ее с текущим токенизатором SEARCH_TOKENIZER;
+    3. добавляет в нее все посты пачками по id (тексты из хранилища больших
+       текстов и сжатые тексты восстанавливаются).
+
+Индекс строится в одной транзакции: до ее фиксации приложение продолжает
+искать по прежнему индексу, а прерванная перестройка не оставляет индекс
+частично заполненным.
+
+Запуск:
+    python -m app.database.rebuild_search --batch-size 500
+"""
+import argparse
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.database.config import get_engine
+from app.database.migrations import check_schema_version
+from app.models.user import User  # noqa: F401 - нужен для настройки связи Post.user
+from app.services.search_service import create_search_index
+
+def rebuild_search_index(bind: Engine, batch_size: int) -> int:
+    """
+    Строит полнотекстовый индекс постов заново.
+
+    Args:
+        bind (Engine): Движок базы данных
+        batch_size (int): Количество постов, загружаемых за раз
+
+    Returns:
+        int: Количество проиндексированных постов
+    """
+    check_schema_version(bind)
+
+    with Session(bind) as db, db.begin():
+        return create_search_index(db, batch_size)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"indexed posts: {rebuild_search_index(get_engine(), args.batch_size)}")
+
+if __name__ == "__main__":
+    main()
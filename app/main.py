@@ -1,71 +1,151 @@
 """
 Главный модуль приложения FastAPI.
+
+Приложение собирается фабрикой create_app. Импорт модуля не создает схему БД
+и не открывает соединений: схема обновляется миграциями
+(python -m app.database.migrations), а при запуске только проверяется
+ее версия (см. database.migrations.check_schema_version).
+
+Запуск:
+    uvicorn app.main:app
+    uvicorn --factory app.main:create_app
 """
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.exc import SQLAlchemyError
-
-from app.database.config import engine, Base
-from app.routers import auth, posts
-
-# Создание таблиц в базе данных
-Base.metadata.create_all(bind=engine)
-
-# Инициализация приложения FastAPI
-app = FastAPI(
-    title="User Posts API",
-    description="API для управления постами пользователей",
-    version="1.0.0"
-)
-
-# Настройка CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Подключение роутеров
-app.include_router(auth.router)
-app.include_router(posts.router)
-
-@app.get("/")
-async def root():
-    """
-    Корневой endpoint API.
-    
-    Returns:
-        dict: Информация о приложении
-    """
-    return {
-        "message": "Добро пожаловать в API управления постами пользователей",
-        "docs": "/docs",
-        "version": "1.0.0"
-    }
-
-@app.middleware("http")
-async def db_exception_handler(request: Request, call_next):
+
+from app.database.config import get_engine
+from app.database.migrations import check_schema_version
+from app.routers import auth, metrics, posts
+from app.services.password_service import shutdown_executor
+from app.middlewares.token_store import run_sweeper
+from app.middlewares.body_limit import RequestBodyLimitMiddleware
+from app.middlewares.compression import ResponseCompressionMiddleware
+from app.middlewares.load_shedding import LOAD_SHEDDING, LoadSheddingMiddleware, run_lag_monitor
+from app.metrics import METRICS
+from app.middlewares.metrics import MetricsMiddleware
+from app.middlewares.query_profiler import SQL_PROFILE, QueryProfilerMiddleware
+from app.middlewares.request_context import RequestContextMiddleware
+from app.database.group_commit import group_committer
+import asyncio
+
+def create_app() -> FastAPI:
     """
-    Middleware для обработки исключений SQLAlchemy.
-    
-    Args:
-        request (Request): Объект запроса FastAPI
-        call_next: Следующий обработчик в цепочке
-        
+    Создает и настраивает приложение FastAPI.
+
     Returns:
-        Response: Объект ответа
+        FastAPI: Приложение с middleware, роутерами и обработчиками запуска и остановки
     """
-    try:
-        return await call_next(request)
-    except SQLAlchemyError as exc:
-        # В реальном приложении здесь должно быть логирование
-        return Response(
-            content=str({"detail": "Ошибка базы данных"}),
-            status_code=500,
-            media_type="application/json"
-        )
+    # Инициализация приложения FastAPI
+    app = FastAPI(
+        title="User Posts API",
+        description="API для управления постами пользователей",
+        version="1.0.0"
+    )
+
+    # Ограничение размера тела запроса: слишком большие запросы отклоняются до разбора
+    app.add_middleware(RequestBodyLimitMiddleware)
+
+    # Сжатие ответов по Accept-Encoding (закэшированные ответы сжимаются в модуле caching)
+    app.add_middleware(ResponseCompressionMiddleware)
+
+    # Управление допуском: запросы сверх адаптивного лимита класса получают 503 до разбора тела
+    if LOAD_SHEDDING:
+        app.add_middleware(LoadSheddingMiddleware)
+
+    # Настройка CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Количество и время SQL-запросов в заголовках ответа (только при SQL_PROFILE=1)
+    if SQL_PROFILE:
+        app.add_middleware(QueryProfilerMiddleware)
+
+    # Метрики задержки запросов и их фаз (только при METRICS=1)
+    if METRICS:
+        app.add_middleware(MetricsMiddleware)
+
+    # Внешний слой: ID запроса, Server-Timing и ответ 500 на ошибки базы данных
+    app.add_middleware(RequestContextMiddleware)
+
+    # Подключение роутеров
+    app.include_router(auth.router)
+    app.include_router(posts.router)
+    if METRICS:
+        app.include_router(metrics.router)
+
+    @app.get("/")
+    async def root():
+        """
+        Корневой endpoint API.
+
+        Returns:
+            dict: Информация о приложении
+        """
+        return {
+            "message": "Добро пожаловать в API управления постами пользователей",
+            "docs": "/docs",
+            "version": "1.0.0"
+        }
+
+    @app.on_event("startup")
+    async def check_schema():
+        """
+        Проверяет версию схемы БД: приложение не запускается с непримененными миграциями.
+        """
+        check_schema_version(get_engine())
+
+    @app.on_event("startup")
+    async def start_token_sweeper():
+        """
+        Запускает фоновую очистку истекших токенов.
+        """
+        app.state.token_sweeper = asyncio.create_task(run_sweeper())
+
+    @app.on_event("startup")
+    async def start_lag_monitor():
+        """
+        Запускает измерение задержки цикла событий для управления допуском.
+        """
+        if LOAD_SHEDDING:
+            app.state.lag_monitor = asyncio.create_task(run_lag_monitor())
+
+    @app.on_event("shutdown")
+    async def stop_lag_monitor():
+        """
+        Останавливает измерение задержки цикла событий.
+        """
+        if LOAD_SHEDDING:
+            app.state.lag_monitor.cancel()
+
+    @app.on_event("shutdown")
+    async def shutdown_password_pool():
+        """
+        Останавливает пул воркеров хеширования паролей при завершении приложения.
+        """
+        shutdown_executor()
+
+    @app.on_event("shutdown")
+    async def stop_token_sweeper():
+        """
+        Останавливает фоновую очистку истекших токенов.
+        """
+        app.state.token_sweeper.cancel()
+
+    @app.on_event("shutdown")
+    async def stop_group_commit():
+        """
+        Останавливает очередь групповой фиксации записей.
+        """
+        group_committer.stop()
+
+    return app
+
+app = create_app()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,208 @@
+"""
+Модуль содержит метрики запросов: гистограммы общей задержки по маршрутам
+и времени, потраченного запросом на отдельные фазы обработки.
+
+Модуль не зависит от слоя middleware, поэтому phase() могут использовать
+и база данных, и сервисы, и маршруты.
+
+Фазы (PHASES):
+    auth      - проверка токена и поиск пользователя в кэше
+    db        - запросы к базе данных (run_db и групповая фиксация)
+    password  - хеширование и проверка паролей в пуле воркеров
+    cache     - обращения к кэшу ответов
+    encode    - сериализация и сжатие ответа
+
+Код отмечает фазу контекстным менеджером phase(name). MetricsMiddleware
+(см. app.middlewares.metrics) создает для каждого запроса словарь фаз
+в request_phases и после ответа записывает измерения record_request. Метрики отдаются в текстовом формате Prometheus
+(см. render_request_metrics и роутер metrics).
+
+Сбор включается переменной окружения METRICS=1. При выключенном сборе
+middleware не подключается, а phase() возвращает общий пустой контекстный
+менеджер, поэтому инструментирование почти ничего не стоит.
+"""
+from bisect import bisect_left
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+import os
+import threading
+import time
+
+METRICS = os.getenv("METRICS", "0") == "1"
+
+# Границы корзин гистограмм в секундах
+METRICS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PHASES = ("auth", "db", "password", "cache", "encode")
+
+# Метка маршрута для запросов, не совпавших ни с одним маршрутом
+UNMATCHED_ROUTE = "<unmatched>"
+
+class Histogram:
+    """
+    Гистограмма с фиксированными границами корзин.
+
+    Атрибуты:
+        buckets (Sequence[float]): Верхние границы корзин
+    """
+
+    def __init__(self, buckets: Sequence[float] = METRICS_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """
+        Добавляет измерение.
+
+        Args:
+            value (float): Значение в секундах
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """
+        Возвращает накопленные количества по корзинам, как принято в Prometheus.
+
+        Returns:
+            List[Tuple[str, int]]: Граница корзины (le) и количество измерений не больше нее
+        """
+        result = []
+        total = 0
+        for bound, count in zip((*map(repr, self.buckets), "+Inf"), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+# Время фаз текущего запроса: фаза -> секунды. None вне запроса или при выключенном сборе
+request_phases: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_phases", default=None)
+
+_lock = threading.Lock()
+_requests: Dict[Tuple[str, str, int], int] = {}
+_latency: Dict[Tuple[str, str], Histogram] = {}
+_phase_latency: Dict[Tuple[str, str, str], Histogram] = {}
+
+class _PhaseTimer:
+    __slots__ = ("name", "phases", "started")
+
+    def __init__(self, name: str, phases: Dict[str, float]):
+        self.name = name
+        self.phases = phases
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.phases[self.name] = self.phases.get(self.name, 0.0) + time.perf_counter() - self.started
+        return False
+
+_NOOP = nullcontext()
+
+def phase(name: str):
+    """
+    Возвращает контекстный менеджер, учитывающий время блока в фазе текущего запроса.
+
+    Время повторных блоков одной фазы суммируется.
+
+    Args:
+        name (str): Название фазы (см. PHASES)
+
+    Returns:
+        ContextManager: Контекстный менеджер замера
+    """
+    if not METRICS:
+        return _NOOP
+    phases = request_phases.get()
+    if phases is None:
+        return _NOOP
+    return _PhaseTimer(name, phases)
+
+def record_request(method: str, route: str, status: int, duration: float, phases: Dict[str, float]) -> None:
+    """
+    Записывает измерения завершенного запроса.
+
+    Args:
+        method (str): HTTP-метод
+        route (str): Шаблон пути маршрута
+        status (int): Код ответа
+        duration (float): Общая задержка в секундах
+        phases (Dict[str, float]): Время фаз в секундах
+    """
+    with _lock:
+        key = (method, route, status)
+        _requests[key] = _requests.get(key, 0) + 1
+        _latency.setdefault((method, route), Histogram()).observe(duration)
+        for name, value in phases.items():
+            _phase_latency.setdefault((method, route, name), Histogram()).observe(value)
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(**labels: object) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+def _render_histogram(lines: List[str], name: str, histogram: Histogram, **labels: object) -> None:
+    for bound, count in histogram.cumulative():
+        lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {count}")
+    lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum!r}")
+    lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+
+def render_metric(
+    lines: List[str], name: str, kind: str, help_text: str,
+    samples: Dict[Tuple, float], label_names: Sequence[str] = (),
+) -> None:
+    """
+    Добавляет метрику типа counter или gauge в текстовом формате Prometheus.
+
+    Args:
+        lines (List[str]): Строки вывода
+        name (str): Имя метрики
+        kind (str): Тип метрики: counter или gauge
+        help_text (str): Описание метрики
+        samples (Dict[Tuple, float]): Значения меток -> значение
+        label_names (Sequence[str]): Имена меток
+    """
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for label_values, value in samples.items():
+        labels = _labels(**dict(zip(label_names, label_values))) if label_names else ""
+        lines.append(f"{name}{labels} {value!r}")
+
+def render_request_metrics(lines: List[str]) -> None:
+    """
+    Добавляет метрики запросов в текстовом формате Prometheus.
+
+    Args:
+        lines (List[str]): Строки вывода
+    """
+    with _lock:
+        requests = dict(_requests)
+        latency = {key: _copy(histogram) for key, histogram in _latency.items()}
+        phase_latency = {key: _copy(histogram) for key, histogram in _phase_latency.items()}
+
+    render_metric(
+        lines, "http_requests_total", "counter", "Количество обработанных запросов",
+        requests, ("method", "route", "status"),
+    )
+
+    lines.append("# HELP http_request_duration_seconds Общая задержка запроса")
+    lines.append("# TYPE http_request_duration_seconds histogram")
+    for (method, route), histogram in latency.items():
+        _render_histogram(lines, "http_request_duration_seconds", histogram, method=method, route=route)
+
+    lines.append("# HELP http_request_phase_seconds Время запроса, потраченное на фазу обработки")
+    lines.append("# TYPE http_request_phase_seconds histogram")
+    for (method, route, name), histogram in phase_latency.items():
+        _render_histogram(lines, "http_request_phase_seconds", histogram, method=method, route=route, phase=name)
+
+def _copy(histogram: Histogram) -> Histogram:
+    copy = Histogram(histogram.buckets)
+    copy.counts = list(histogram.counts)
+    copy.sum = histogram.sum
+    copy.count = histogram.count
+    return copy
@@ -1,13 +1,17 @@
 """
 Модуль содержит middleware и функции для работы с аутентификацией.
+
+Библиотека jwt импортируется при первом обращении к JWT-токенам: основной
+путь использует простые токены, и импорт не замедляет запуск приложения.
 """
-import jwt
 from fastapi import Depends, HTTPException, Header, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import datetime, timedelta
 from app.database.config import get_db
+from app.middlewares.token_store import save_token, lookup_token
+from app.metrics import phase
 import secrets
 import string
 
@@ -16,10 +20,6 @@ SECRET_KEY = "YOUR_SECRET_KEY_HERE"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Для имитации хранения простых токенов доступа (для более простой реализации)
-# В реальном приложении следует использовать базу данных или Redis
-token_storage = {}
-
 security = HTTPBearer()
 
 def create_jwt_token(user_id: int) -> str:
@@ -32,6 +32,8 @@ def create_jwt_token(user_id: int) -> str:
     Returns:
         str: Сгенерированный JWT токен
     """
+    import jwt
+    
     expires_delta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     expire = datetime.utcnow() + expires_delta
     
@@ -53,8 +55,8 @@ def create_simple_token(user_id: int) -> str:
     alphabet = string.ascii_letters + string.digits
     token = ''.join(secrets.choice(alphabet) for _ in range(32))
     
-    # Сохранение связи токена с пользователем
-    token_storage[token] = user_id
+    # Сохранение связи токена с пользователем (в общем хранилище, с ограниченным сроком жизни)
+    save_token(token, user_id)
     
     return token
 
@@ -69,10 +71,13 @@ def verify_token(token: str) -> Optional[int]:
         Optional[int]: Идентификатор пользователя, если токен валиден, иначе None
     """
     # Проверка по хранилищу токенов
-    if token in token_storage:
-        return token_storage[token]
+    user_id = lookup_token(token)
+    if user_id is not None:
+        return user_id
     
     # Попытка расшифровать JWT токен
+    import jwt
+    
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id = int(payload.get("sub"))
@@ -96,7 +101,8 @@ def get_current_user_id(
         HTTPException: Если токен недействителен
     """
     token = credentials.credentials
-    user_id = verify_token(token)
+    with phase("auth"):
+        user_id = verify_token(token)
     
     if user_id is None:
         raise HTTPException(
@@ -0,0 +1,91 @@
+"""
+Модуль содержит ограничение размера тела запроса.
+
+RequestBodyLimitMiddleware - ASGI-middleware, которое отклоняет запрос с кодом
+413 до разбора тела:
+    1. если заголовок Content-Length превышает лимит, ответ отправляется сразу,
+       тело не читается;
+    2. иначе байты тела подсчитываются по мере поступления, и чтение
+       прерывается, как только лимит превышен, не дожидаясь конца загрузки.
+
+Настройки задаются переменными окружения:
+    REQUEST_BODY_MAX_BYTES      - лимит по умолчанию (по умолчанию 64 КиБ)
+    POST_BODY_MAX_BYTES         - лимит для POST /api/posts (по умолчанию 3 МиБ: текст
+                                  до 1 МБ в UTF-8 с учетом экранирования \\uXXXX)
+    POST_BATCH_BODY_MAX_BYTES   - лимит для POST /api/posts/batch (по умолчанию 32 МиБ)
+"""
+from typing import Dict, Tuple
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+import os
+
+REQUEST_BODY_MAX_BYTES = int(os.getenv("REQUEST_BODY_MAX_BYTES", str(64 * 1024)))
+POST_BODY_MAX_BYTES = int(os.getenv("POST_BODY_MAX_BYTES", str(3 * 1024 * 1024)))
+POST_BATCH_BODY_MAX_BYTES = int(os.getenv("POST_BATCH_BODY_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# Лимиты для отдельных маршрутов: (метод, путь) -> максимальный размер тела в байтах
+ROUTE_BODY_LIMITS: Dict[Tuple[str, str], int] = {
+    ("POST", "/api/posts"): POST_BODY_MAX_BYTES,
+    ("POST", "/api/posts/batch"): POST_BATCH_BODY_MAX_BYTES,
+}
+
+TOO_LARGE_DETAIL = "Размер тела запроса превышает допустимый"
+
+def body_limit(method: str, path: str) -> int:
+    """
+    Возвращает лимит размера тела для маршрута.
+
+    Args:
+        method (str): HTTP-метод
+        path (str): Путь запроса
+
+    Returns:
+        int: Максимальный размер тела в байтах
+    """
+    return ROUTE_BODY_LIMITS.get((method, path.rstrip("/") or "/"), REQUEST_BODY_MAX_BYTES)
+
+class RequestBodyLimitMiddleware:
+    """
+    ASGI-middleware, ограничивающее размер тела запроса.
+
+    Атрибуты:
+        app (ASGIApp): Следующее приложение в цепочке
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limit = body_limit(scope["method"], scope["path"])
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            response = JSONResponse(
+                {"detail": TOO_LARGE_DETAIL},
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                headers={"Connection": "close"},
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Исключение доходит до обработчика HTTPException приложения,
+                    # который отвечает 413, не дочитывая тело
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=TOO_LARGE_DETAIL,
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -1,86 +1,515 @@
 """
 Модуль содержит функции и классы для кэширования ответов API.
+
+Хранение вынесено в сменный бэкенд (CacheBackend). По умолчанию используется
+LRUCacheBackend: LRU-кэш в памяти с TTL и ограничением по суммарному размеру
+записей. Бэкенд можно заменить через set_cache_backend.
+
+В кэше хранится готовое JSON-тело ответа вместе со строгим ETag, поэтому
+попадание в кэш не требует ни валидации, ни сериализации, а запрос с
+совпадающим If-None-Match получает 304 Not Modified.
+
+Если клиент поддерживает сжатие (см. модуль compression), сжатое тело
+сохраняется в кэш как отдельный вариант того же ключа: повторные попадания
+отдают его без пересжатия, а инвалидация ключа удаляет и его.
+
+Кэш хранится в памяти каждого воркера, а инвалидация должна действовать во всех
+воркерах. Поэтому у каждого ключа есть поколение (см. CacheGenerations), общее
+для воркеров: инвалидация увеличивает его, а поколение входит в вариант записи.
+Записи, сохраненные до инвалидации, больше не находятся ни одним воркером
+(ни для ответа, ни для 304) и вытесняются по LRU или TTL. При TOKEN_STORE=sqlite
+поколения хранятся в общем файле хранилища токенов, при TOKEN_STORE=memory -
+в памяти процесса (только для одного воркера).
 """
 from fastapi import Request, Response
-from typing import Dict, Any, Callable
+from fastapi.encoders import jsonable_encoder
+from typing import Dict, Any, Callable, Hashable, NamedTuple, Optional, Sequence, Set, Tuple
+from collections import OrderedDict
+from pydantic import BaseModel
+import hashlib
+import json
+import os
+import sqlite3
+import threading
 import time
 from functools import wraps
-
-# Простой кэш в памяти
-# Ключ: user_id-endpoint, значение: (timestamp, cached_data)
-cache_storage: Dict[str, tuple] = {}
+from app.metrics import phase
+from app.middlewares.token_store import TOKEN_STORE, TOKEN_STORE_PATH, connect_shared
+from app.middlewares.compression import (
+    RESPONSE_COMPRESSION_MIN_BYTES, choose_encoding, compress_body,
+    representation_etag, strip_encoding_suffix,
+)
 
 # Время жизни кэша в секундах (5 минут)
-CACHE_TTL = 300
+CACHE_TTL = int(os.getenv("CACHE_TTL", "300"))
+
+# Максимальный суммарный размер записей кэша в байтах (по умолчанию 64 МБ)
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+class CachedResponse(NamedTuple):
+    """
+    Закэшированный ответ.
+
+    Атрибуты:
+        body (bytes): Готовое JSON-тело ответа
+        etag (str): Строгий ETag тела (в кавычках)
+    """
+    body: bytes
+    etag: str
+
+class CacheBackend:
+    """
+    Интерфейс бэкенда кэша.
+
+    Записи группируются по ключу (user_id-endpoint): у одного ключа может быть
+    несколько вариантов (например, разные страницы), и инвалидация ключа
+    удаляет их все.
+    """
+
+    def get(self, key: str, variant: Hashable = None) -> Optional[CachedResponse]:
+        """
+        Возвращает ответ из кэша или None, если его нет или он устарел.
+
+        Args:
+            key (str): Ключ кэша
+            variant (Hashable): Вариант запроса
+
+        Returns:
+            Optional[CachedResponse]: Кэшированный ответ или None
+        """
+        raise NotImplementedError
+
+    def set(self, key: str, variant: Hashable, data: CachedResponse) -> None:
+        """
+        Сохраняет ответ в кэш.
+
+        Args:
+            key (str): Ключ кэша
+            variant (Hashable): Вариант запроса
+            data (CachedResponse): Ответ для кэширования
+        """
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """
+        Удаляет все варианты ключа.
+
+        Args:
+            key (str): Ключ кэша
+        """
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Возвращает счетчики работы кэша.
+
+        Returns:
+            Dict[str, int]: Счетчики попаданий, промахов, вытеснений и текущий объем
+        """
+        raise NotImplementedError
+
+class LRUCacheBackend(CacheBackend):
+    """
+    LRU-кэш в памяти с TTL и ограничением по суммарному размеру.
+
+    Размер записи - длина тела ответа. При превышении лимита
+    вытесняются давно не использованные записи.
+
+    Атрибуты:
+        ttl (float): Время жизни записи в секундах
+        max_bytes (int): Максимальный суммарный размер записей в байтах
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL, max_bytes: int = CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        # (key, variant) -> (timestamp, size, data), в порядке от старых обращений к новым
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, int, CachedResponse]]" = OrderedDict()
+        # key -> варианты, сохраненные для этого ключа
+        self._variants: Dict[str, Set[Hashable]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def _remove(self, entry_key: Tuple[str, Hashable]) -> None:
+        _, size, _ = self._entries.pop(entry_key)
+        self._bytes -= size
+        key, variant = entry_key
+        variants = self._variants[key]
+        variants.discard(variant)
+        if not variants:
+            del self._variants[key]
+
+    def get(self, key: str, variant: Hashable = None) -> Optional[CachedResponse]:
+        entry_key = (key, variant)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+
+            timestamp, _, data = entry
+            if time.time() - timestamp > self.ttl:
+                self._remove(entry_key)
+                self._counters["expirations"] += 1
+                self._counters["misses"] += 1
+                return None
+
+            self._entries.move_to_end(entry_key)
+            self._counters["hits"] += 1
+            return data
+
+    def set(self, key: str, variant: Hashable, data: CachedResponse) -> None:
+        size = len(data.body) + len(data.etag)
+        entry_key = (key, variant)
+        with self._lock:
+            if entry_key in self._entries:
+                self._remove(entry_key)
+
+            # Запись больше всего бюджета не кэшируется
+            if size > self.max_bytes:
+                return
+
+            self._entries[entry_key] = (time.time(), size, data)
+            self._variants.setdefault(key, set()).add(variant)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._counters["evictions"] += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            for variant in list(self._variants.get(key, ())):
+                self._remove((key, variant))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters, entries=len(self._entries), bytes=self._bytes)
+
+class CacheGenerations:
+    """
+    Интерфейс хранилища поколений ключей кэша.
+    """
+
+    def current(self, key: str) -> int:
+        """
+        Возвращает текущее поколение ключа.
+
+        Args:
+            key (str): Ключ кэша
+
+        Returns:
+            int: Поколение (0, если ключ ни разу не инвалидировался)
+        """
+        raise NotImplementedError
+
+    def bump(self, key: str) -> None:
+        """
+        Увеличивает поколение ключа.
+
+        Args:
+            key (str): Ключ кэша
+        """
+        raise NotImplementedError
+
+class MemoryCacheGenerations(CacheGenerations):
+    """
+    Поколения ключей в памяти процесса (только для одного воркера).
+    """
+
+    def __init__(self):
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def current(self, key: str) -> int:
+        return self._generations.get(key, 0)
+
+    def bump(self, key: str) -> None:
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+class SQLiteCacheGenerations(CacheGenerations):
+    """
+    Поколения ключей в файле SQLite, общем для всех процессов на хосте.
+
+    Поколение ищется по первичному ключу; у каждого потока свое соединение.
+
+    Атрибуты:
+        path (str): Путь к файлу базы данных
+    """
+
+    def __init__(self, path: str = TOKEN_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS cache_generations ("
+            "key TEXT PRIMARY KEY, generation INTEGER NOT NULL"
+            ") WITHOUT ROWID"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        return connect_shared(self._local, self.path)
+
+    def current(self, key: str) -> int:
+        row = self._connect().execute(
+            "SELECT generation FROM cache_generations WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, key: str) -> None:
+        self._connect().execute(
+            "INSERT INTO cache_generations (key, generation) VALUES (?, 1) "
+            "ON CONFLICT (key) DO UPDATE SET generation = generation + 1",
+            (key,),
+        )
+
+_backend: CacheBackend = LRUCacheBackend()
+_generations: Optional[CacheGenerations] = None
+
+def get_cache_backend() -> CacheBackend:
+    """
+    Возвращает текущий бэкенд кэша.
+
+    Returns:
+        CacheBackend: Бэкенд кэша
+    """
+    return _backend
+
+def set_cache_backend(backend: CacheBackend) -> None:
+    """
+    Заменяет бэкенд кэша.
+
+    Args:
+        backend (CacheBackend): Новый бэкенд
+    """
+    global _backend
+    _backend = backend
+
+def get_cache_generations() -> CacheGenerations:
+    """
+    Возвращает хранилище поколений ключей, создавая его при первом обращении.
+
+    Returns:
+        CacheGenerations: Общее для воркеров хранилище при TOKEN_STORE=sqlite, иначе хранилище процесса
+    """
+    global _generations
+    if _generations is None:
+        _generations = SQLiteCacheGenerations() if TOKEN_STORE == "sqlite" else MemoryCacheGenerations()
+    return _generations
 
 def get_cache_key(user_id: int, endpoint: str) -> str:
     """
     Генерирует ключ кэша на основе ID пользователя и эндпоинта.
-    
+
     Args:
         user_id (int): ID пользователя
         endpoint (str): Эндпоинт API
-        
+
     Returns:
         str: Ключ кэша
     """
     return f"{user_id}-{endpoint}"
 
-def get_cached_data(user_id: int, endpoint: str) -> Any:
+def get_cached_data(user_id: int, endpoint: str, variant: Hashable = None) -> Optional[CachedResponse]:
     """
-    Получает данные из кэша, если они не устарели.
-    
+    Получает ответ из кэша, если он не устарел.
+
     Args:
         user_id (int): ID пользователя
         endpoint (str): Эндпоинт API
-        
+        variant (Hashable): Вариант запроса (например, параметры страницы)
+
     Returns:
-        Any: Кэшированные данные или None, если данных нет или они устарели
+        Optional[CachedResponse]: Кэшированный ответ или None, если его нет или он устарел
     """
-    key = get_cache_key(user_id, endpoint)
-    
-    if key in cache_storage:
-        timestamp, data = cache_storage[key]
-        current_time = time.time()
-        
-        # Проверяем, не устарел ли кэш
-        if current_time - timestamp <= CACHE_TTL:
-            return data
-    
-    return None
+    return _backend.get(get_cache_key(user_id, endpoint), variant)
 
-def set_cache_data(user_id: int, endpoint: str, data: Any) -> None:
+def set_cache_data(user_id: int, endpoint: str, data: CachedResponse, variant: Hashable = None) -> None:
     """
-    Сохраняет данные в кэш.
-    
+    Сохраняет ответ в кэш.
+
     Args:
         user_id (int): ID пользователя
         endpoint (str): Эндпоинт API
-        data (Any): Данные для кэширования
+        data (CachedResponse): Ответ для кэширования
+        variant (Hashable): Вариант запроса (например, параметры страницы)
     """
-    key = get_cache_key(user_id, endpoint)
-    current_time = time.time()
-    cache_storage[key] = (current_time, data)
+    _backend.set(get_cache_key(user_id, endpoint), variant, data)
+
+def cache_generation(user_id: int, endpoint: str) -> int:
+    """
+    Возвращает текущее поколение ключа кэша.
+
+    Args:
+        user_id (int): ID пользователя
+        endpoint (str): Эндпоинт API
+
+    Returns:
+        int: Поколение ключа
+    """
+    return get_cache_generations().current(get_cache_key(user_id, endpoint))
 
 def invalidate_cache(user_id: int, endpoint: str) -> None:
     """
-    Инвалидирует (удаляет) кеш для указанного пользователя и эндпоинта.
-    
+    Инвалидирует кеш для указанного пользователя и эндпоинта во всех воркерах.
+
+    Поколение ключа увеличивается, поэтому сохраненные ранее варианты
+    не находятся ни одним воркером; в текущем воркере они сразу удаляются.
+
     Args:
         user_id (int): ID пользователя
         endpoint (str): Эндпоинт API
     """
     key = get_cache_key(user_id, endpoint)
-    if key in cache_storage:
-        del cache_storage[key]
+    get_cache_generations().bump(key)
+    _backend.delete(key)
+
+def render_json(result: Any) -> CachedResponse:
+    """
+    Сериализует результат обработчика в JSON-тело и вычисляет для него ETag.
+
+    Args:
+        result (Any): Готовое JSON-тело (bytes), Pydantic-модель или JSON-совместимые данные
+
+    Returns:
+        CachedResponse: Тело ответа и его строгий ETag
+    """
+    if isinstance(result, bytes):
+        body = result
+    elif isinstance(result, BaseModel):
+        body = result.model_dump_json().encode("utf-8")
+    else:
+        body = json.dumps(
+            jsonable_encoder(result), ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    return CachedResponse(body, etag)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Проверяет, совпадает ли ETag с одним из значений заголовка If-None-Match.
+
+    Для If-None-Match используется слабое сравнение: префикс W/ и суффикс
+    кодировки сжатия (см. compression.representation_etag) не учитываются.
+
+    Args:
+        if_none_match (Optional[str]): Значение заголовка If-None-Match
+        etag (str): ETag текущего ответа
+
+    Returns:
+        bool: True, если клиенту можно ответить 304 Not Modified
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etag = strip_encoding_suffix(etag)
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if strip_encoding_suffix(candidate) == etag:
+            return True
+    return False
 
-def cache_response(endpoint: str):
+def cached_response_headers(etag: str) -> Dict[str, str]:
+    """
+    Возвращает заголовки ответа, сформированного из кэша.
+
+    Args:
+        etag (str): ETag тела
+
+    Returns:
+        Dict[str, str]: Заголовки ответа
+    """
+    # Ответ персональный, поэтому разрешаем хранить его только клиенту
+    # и требуем перепроверки по ETag при каждом использовании
+    return {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept-Encoding"}
+
+def cached_json_response(
+    cached: CachedResponse, request: Optional[Request], encoding: Optional[str] = None
+) -> Response:
+    """
+    Формирует ответ из закэшированного тела с учетом If-None-Match.
+
+    Args:
+        cached (CachedResponse): Тело ответа и его ETag
+        request (Optional[Request]): Текущий запрос
+        encoding (Optional[str]): Кодировка сжатия тела или None
+
+    Returns:
+        Response: 304 Not Modified или 200 с готовым JSON-телом
+    """
+    headers = cached_response_headers(cached.etag)
+    if request is not None and etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+def encoded_json_response(
+    user_id: int, endpoint: str, variant: Hashable, cached: CachedResponse, request: Optional[Request]
+) -> Response:
+    """
+    Формирует ответ из закэшированного тела, сжимая его, если клиент это поддерживает.
+
+    Сжатое тело сохраняется в кэш под вариантом (variant, кодировка) и
+    переиспользуется, пока совпадает ETag исходного тела.
+
+    Args:
+        user_id (int): ID пользователя
+        endpoint (str): Эндпоинт API
+        variant (Hashable): Вариант запроса
+        cached (CachedResponse): Несжатое тело ответа и его ETag
+        request (Optional[Request]): Текущий запрос
+
+    Returns:
+        Response: Ответ с несжатым или сжатым телом либо 304 Not Modified
+    """
+    encoding = None
+    if request is not None and len(cached.body) >= RESPONSE_COMPRESSION_MIN_BYTES:
+        encoding = choose_encoding(request.headers.get("accept-encoding"))
+    if encoding is None:
+        return cached_json_response(cached, request)
+
+    etag = representation_etag(cached.etag, encoding)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cached_response_headers(etag))
+
+    encoded_variant = (variant, encoding)
+    with phase("cache"):
+        encoded = get_cached_data(user_id, endpoint, encoded_variant)
+    if encoded is None or encoded.etag != etag:
+        with phase("encode"):
+            encoded = CachedResponse(compress_body(cached.body, encoding), etag)
+        with phase("cache"):
+            set_cache_data(user_id, endpoint, encoded, encoded_variant)
+    return cached_json_response(encoded, request, encoding)
+
+def cache_response(
+    endpoint: str,
+    vary: Sequence[str] = (),
+    bypass: Optional[Callable[[Request], bool]] = None,
+):
     """
     Декоратор для кэширования ответов API.
-    
+
+    Результат функции сериализуется один раз и сохраняется как готовое
+    JSON-тело с ETag, поэтому кэш не удерживает ORM-объекты, а попадание
+    в кэш обходится без обращения к БД и сериализатору. Если обработчик
+    принимает аргумент request, учитывается заголовок If-None-Match.
+
+    Поколение ключа читается до вызова обработчика: если данные изменятся
+    во время его выполнения, ответ сохранится под уже устаревшим поколением.
+
     Args:
         endpoint (str): Название эндпоинта для формирования ключа кэша
-        
+        vary (Sequence[str]): Имена аргументов, значения которых различают
+            варианты ответа (например, параметры пагинации)
+        bypass (Optional[Callable[[Request], bool]]): Условие, при котором
+            запрос обрабатывается без кэша (например, потоковый формат ответа)
+
     Returns:
         Callable: Декорированная функция
     """
@@ -95,22 +524,34 @@ def cache_response(endpoint: str):
                     if isinstance(arg, int):
                         user_id = arg
                         break
-            
+
             if not user_id:
                 # Если user_id не найден, не используем кэш
                 return await func(*args, **kwargs)
-            
-            # Проверяем кэш
-            cached_data = get_cached_data(user_id, endpoint)
-            if cached_data is not None:
-                return cached_data
-            
+
+            request = kwargs.get('request')
+            if bypass is not None and request is not None and bypass(request):
+                return await func(*args, **kwargs)
+
+            # Проверяем кэш; вариант включает поколение ключа
+            with phase("cache"):
+                generation = cache_generation(user_id, endpoint)
+                variant = (generation, *(kwargs.get(name) for name in vary))
+                cached = get_cached_data(user_id, endpoint, variant)
+            if cached is not None:
+                return encoded_json_response(user_id, endpoint, variant, cached, request)
+
             # Выполняем оригинальную функцию
             result = await func(*args, **kwargs)
-            
-            # Сохраняем результат в кэш
-            set_cache_data(user_id, endpoint, result)
-            
-            return result
+            if isinstance(result, Response):
+                return result
+
+            # Сохраняем готовое тело ответа в кэш
+            with phase("encode"):
+                cached = render_json(result)
+            with phase("cache"):
+                set_cache_data(user_id, endpoint, cached, variant)
+
+            return encoded_json_response(user_id, endpoint, variant, cached, request)
         return wrapper
-    return decorator 
\ No newline at end of file
+    return decorator
@@ -0,0 +1,310 @@
+"""
+Модуль содержит сжатие ответов API, согласуемое по заголовку Accept-Encoding.
+
+Поддерживаются кодировки gzip и zstd (быстрее gzip при сопоставимой степени
+сжатия; требует пакета zstandard и отключается, если он не установлен).
+При равных весах q в Accept-Encoding выбирается кодировка, стоящая раньше
+в ENCODERS.
+
+Ответы, закэшированные cache_response, сжимаются в модуле caching: сжатый
+вариант хранится в кэше рядом с исходным и не пересжимается при попадании.
+Остальные ответы сжимает ResponseCompressionMiddleware; потоковые ответы
+сжимаются по частям, и каждая часть отправляется клиенту сразу.
+
+У сжатого ответа к ETag добавляется суффикс кодировки ("<etag>-gzip"),
+поскольку это другое представление ресурса; etag_matches в модуле caching
+сравнивает значения If-None-Match без этого суффикса.
+
+Настройки задаются переменными окружения:
+    RESPONSE_COMPRESSION             - 1 включает сжатие (по умолчанию), 0 отключает
+    RESPONSE_COMPRESSION_MIN_BYTES   - минимальный размер тела для сжатия (по умолчанию 1024)
+    RESPONSE_COMPRESSION_GZIP_LEVEL  - уровень сжатия gzip (по умолчанию 6)
+    RESPONSE_COMPRESSION_ZSTD_LEVEL  - уровень сжатия zstd (по умолчанию 3)
+"""
+from collections import OrderedDict
+from typing import Callable, NamedTuple, Optional
+from app.metrics import phase
+import os
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "1") == "1"
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+RESPONSE_COMPRESSION_GZIP_LEVEL = int(os.getenv("RESPONSE_COMPRESSION_GZIP_LEVEL", "6"))
+RESPONSE_COMPRESSION_ZSTD_LEVEL = int(os.getenv("RESPONSE_COMPRESSION_ZSTD_LEVEL", "3"))
+
+# Типы содержимого, которые имеет смысл сжимать
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+# Формат gzip для zlib: заголовок и контрольная сумма gzip вместо zlib
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+class GzipStream:
+    """
+    Потоковый кодировщик gzip.
+    """
+
+    def __init__(self):
+        self._compressor = zlib.compressobj(RESPONSE_COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        """
+        Сжимает часть тела так, чтобы клиент мог сразу ее распаковать.
+
+        Args:
+            data (bytes): Часть тела
+
+        Returns:
+            bytes: Сжатые данные
+        """
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        """
+        Завершает поток.
+
+        Returns:
+            bytes: Остаток сжатых данных
+        """
+        return self._compressor.flush()
+
+class ZstdStream:
+    """
+    Потоковый кодировщик zstd.
+    """
+
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=RESPONSE_COMPRESSION_ZSTD_LEVEL).compressobj()
+
+    def chunk(self, data: bytes) -> bytes:
+        """
+        Сжимает часть тела так, чтобы клиент мог сразу ее распаковать.
+
+        Args:
+            data (bytes): Часть тела
+
+        Returns:
+            bytes: Сжатые данные
+        """
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        """
+        Завершает поток.
+
+        Returns:
+            bytes: Остаток сжатых данных
+        """
+        return self._compressor.flush()
+
+class Encoder(NamedTuple):
+    """
+    Кодировка ответа.
+
+    Атрибуты:
+        compress (Callable[[bytes], bytes]): Сжатие тела целиком
+        stream (Callable[[], object]): Создание потокового кодировщика
+    """
+    compress: Callable[[bytes], bytes]
+    stream: Callable[[], object]
+
+# Доступные кодировки в порядке предпочтения сервера
+ENCODERS: "OrderedDict[str, Encoder]" = OrderedDict()
+if zstandard is not None:
+    ENCODERS["zstd"] = Encoder(
+        compress=lambda data: zstandard.ZstdCompressor(level=RESPONSE_COMPRESSION_ZSTD_LEVEL).compress(data),
+        stream=ZstdStream,
+    )
+ENCODERS["gzip"] = Encoder(
+    compress=lambda data: zlib.compress(data, RESPONSE_COMPRESSION_GZIP_LEVEL, GZIP_WBITS),
+    stream=GzipStream,
+)
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Выбирает кодировку ответа по заголовку Accept-Encoding.
+
+    Args:
+        accept_encoding (Optional[str]): Значение заголовка Accept-Encoding
+
+    Returns:
+        Optional[str]: Имя кодировки или None, если ответ отправляется без сжатия
+    """
+    if not RESPONSE_COMPRESSION or not accept_encoding:
+        return None
+
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    default = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for name in ENCODERS:
+        weight = weights.get(name, default)
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    """
+    Сжимает тело ответа целиком.
+
+    Args:
+        body (bytes): Тело ответа
+        encoding (str): Имя кодировки
+
+    Returns:
+        bytes: Сжатое тело
+    """
+    return ENCODERS[encoding].compress(body)
+
+def representation_etag(etag: str, encoding: str) -> str:
+    """
+    Возвращает ETag сжатого представления ресурса.
+
+    Args:
+        etag (str): ETag несжатого ответа (в кавычках, возможно с префиксом W/)
+        encoding (str): Имя кодировки
+
+    Returns:
+        str: ETag с суффиксом кодировки
+    """
+    if etag.endswith('"'):
+        return f'{etag[:-1]}-{encoding}"'
+    return f"{etag}-{encoding}"
+
+def strip_encoding_suffix(etag: str) -> str:
+    """
+    Убирает из ETag суффикс кодировки, добавленный representation_etag.
+
+    Args:
+        etag (str): ETag (в кавычках)
+
+    Returns:
+        str: ETag несжатого представления
+    """
+    for name in ENCODERS:
+        suffix = f'-{name}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+def is_compressible(content_type: str) -> bool:
+    """
+    Проверяет, имеет ли смысл сжимать ответ с указанным типом содержимого.
+
+    Args:
+        content_type (str): Значение заголовка Content-Type
+
+    Returns:
+        bool: True для текстовых форматов
+    """
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+def _add_vary(headers: list) -> None:
+    for index, (name, value) in enumerate(headers):
+        if name.lower() == b"vary":
+            if b"accept-encoding" not in value.lower():
+                headers[index] = (name, value + b", Accept-Encoding")
+            return
+    headers.append((b"vary", b"Accept-Encoding"))
+
+class ResponseCompressionMiddleware:
+    """
+    ASGI-middleware, сжимающее ответы по Accept-Encoding.
+
+    Ответы, у которых уже задан Content-Encoding (например, готовые сжатые
+    записи кэша), передаются без изменений.
+
+    Атрибуты:
+        app (ASGIApp): Следующее приложение в цепочке
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not RESPONSE_COMPRESSION:
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = dict(scope["headers"])
+        encoding = choose_encoding(request_headers.get(b"accept-encoding", b"").decode("latin-1"))
+
+        start_message = None
+        stream = None
+        passthrough = False
+
+        async def compressing_send(message):
+            nonlocal start_message, stream, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            if stream is not None:
+                with phase("encode"):
+                    body = stream.chunk(message.get("body", b""))
+                    if not message.get("more_body", False):
+                        body += stream.finish()
+                await send({**message, "body": body})
+                return
+
+            # Первая часть тела: решаем, сжимать ли ответ
+            headers = list(start_message.get("headers", []))
+            names = {name.lower(): value for name, value in headers}
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            status = start_message["status"]
+
+            compressible = (
+                status >= 200 and status not in (204, 304)
+                and b"content-encoding" not in names
+                and is_compressible(names.get(b"content-type", b"").decode("latin-1"))
+            )
+            if compressible:
+                _add_vary(headers)
+            if not compressible or encoding is None or (not more_body and len(body) < RESPONSE_COMPRESSION_MIN_BYTES):
+                passthrough = True
+                await send({**start_message, "headers": headers})
+                await send(message)
+                return
+
+            headers = [
+                (name, value) for name, value in headers
+                if name.lower() not in (b"content-length", b"etag")
+            ]
+            headers.append((b"content-encoding", encoding.encode("latin-1")))
+            if b"etag" in names:
+                etag = representation_etag(names[b"etag"].decode("latin-1"), encoding)
+                headers.append((b"etag", etag.encode("latin-1")))
+
+            with phase("encode"):
+                if more_body:
+                    stream = ENCODERS[encoding].stream()
+                    body = stream.chunk(body)
+                else:
+                    body = compress_body(body, encoding)
+            if not more_body:
+                headers.append((b"content-length", str(len(body)).encode("latin-1")))
+
+            await send({**start_message, "headers": headers})
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, compressing_send)
@@ -0,0 +1,129 @@
+"""
+Модуль содержит разрешение личности аутентифицированного пользователя.
+
+После проверки токена нужно убедиться, что пользователь все еще существует.
+Подтвержденный пользователь (principal) запоминается в LRU-кэше воркера,
+поэтому на горячем пути запрос к таблице users не выполняется. Запись
+удаляется из кэша при удалении пользователя (invalidate_principal) и в любом
+случае устаревает через PRINCIPAL_CACHE_TTL секунд - это ограничивает
+задержку инвалидации в других воркерах.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+from fastapi import Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from app.database.config import get_session
+from app.middlewares.auth import get_current_user_id
+from app.metrics import phase
+from app.services.async_user_service import get_user_by_id
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+
+class Principal(NamedTuple):
+    """
+    Подтвержденный аутентифицированный пользователь.
+
+    Атрибуты:
+        user_id (int): ID пользователя
+        email (str): Email пользователя
+    """
+    user_id: int
+    email: str
+
+# user_id -> (principal, момент, до которого запись актуальна)
+_principals: "OrderedDict[int, tuple]" = OrderedDict()
+_lock = threading.Lock()
+
+def get_cached_principal(user_id: int) -> Optional[Principal]:
+    """
+    Возвращает подтвержденного пользователя из кэша.
+
+    Args:
+        user_id (int): ID пользователя
+
+    Returns:
+        Optional[Principal]: Пользователь или None, если записи нет или она устарела
+    """
+    with _lock:
+        entry = _principals.get(user_id)
+        if entry is None:
+            return None
+        principal, fresh_until = entry
+        if time.time() >= fresh_until:
+            del _principals[user_id]
+            return None
+        _principals.move_to_end(user_id)
+        return principal
+
+def remember_principal(principal: Principal) -> None:
+    """
+    Сохраняет подтвержденного пользователя в кэш.
+
+    Args:
+        principal (Principal): Пользователь
+    """
+    with _lock:
+        _principals[principal.user_id] = (principal, time.time() + PRINCIPAL_CACHE_TTL)
+        _principals.move_to_end(principal.user_id)
+        while len(_principals) > PRINCIPAL_CACHE_SIZE:
+            _principals.popitem(last=False)
+
+def invalidate_principal(user_id: int) -> None:
+    """
+    Удаляет пользователя из кэша (например, после удаления пользователя).
+
+    Args:
+        user_id (int): ID пользователя
+    """
+    with _lock:
+        _principals.pop(user_id, None)
+
+async def get_current_principal(
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_session)
+) -> Principal:
+    """
+    Получает подтвержденного текущего пользователя.
+
+    Args:
+        user_id (int): ID пользователя из токена
+        db (Session): Сессия базы данных
+
+    Returns:
+        Principal: Текущий пользователь
+
+    Raises:
+        HTTPException: Если пользователь не найден
+    """
+    with phase("auth"):
+        principal = get_cached_principal(user_id)
+    if principal is not None:
+        return principal
+
+    # Проверка наличия пользователя
+    user = await get_user_by_id(db, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Пользователь не найден"
+        )
+
+    principal = Principal(user_id=user.id, email=user.email)
+    remember_principal(principal)
+    return principal
+
+async def get_verified_user_id(principal: Principal = Depends(get_current_principal)) -> int:
+    """
+    Получает ID текущего пользователя, существование которого подтверждено.
+
+    Args:
+        principal (Principal): Текущий пользователь
+
+    Returns:
+        int: ID пользователя
+    """
+    return principal.user_id
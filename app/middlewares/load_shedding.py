@@ -0,0 +1,225 @@
+"""
+Модуль содержит управление допуском запросов (load shedding).
+
+Когда SQLite или пул bcrypt не успевают, запросы копятся в сервере, пока
+клиенты не отвалятся по тайм-ауту, и в итоге не обслуживается никто.
+LoadSheddingMiddleware ограничивает количество одновременно обрабатываемых
+запросов каждого класса и сразу отвечает 503 с заголовком Retry-After на
+лишние, чтобы принятые запросы укладывались в приемлемую задержку.
+
+Классы запросов (route_class):
+    auth   - вход и регистрация (bcrypt)
+    write  - остальные запросы, изменяющие данные (POST, PUT, PATCH, DELETE)
+    read   - GET и HEAD
+Маршрут метрик (GET /metrics) не ограничивается: мониторинг должен работать
+и под перегрузкой.
+
+Лимит класса адаптивный. Фоновая задача (run_lag_monitor) каждые
+SHED_LAG_INTERVAL_MS измеряет задержку цикла событий - насколько позже
+запланированного просыпается asyncio.sleep. Пока задержка выше
+SHED_LOOP_LAG_MS, лимиты всех классов уменьшаются в SHED_DECREASE_FACTOR раз
+(но не ниже SHED_MIN_IN_FLIGHT); когда задержка в норме, лимиты растут на 5%
+от максимума за интервал, до значений SHED_MAX_IN_FLIGHT_*.
+
+Решения (admitted, shed_in_flight - лимит не снижен, shed_loop_lag - лимит
+снижен из-за задержки цикла) считаются по классам и отдаются в /metrics.
+
+Управление допуском выключено по умолчанию: отклонение запросов с кодом 503
+меняет поведение API, а лимиты нужно подобрать под нагрузку конкретной
+установки. Настройки задаются переменными окружения:
+    LOAD_SHEDDING               - 1 включает управление допуском (по умолчанию 0)
+    SHED_MAX_IN_FLIGHT_AUTH     - максимум одновременных запросов auth (по умолчанию 32)
+    SHED_MAX_IN_FLIGHT_READ     - максимум одновременных запросов read (по умолчанию 256)
+    SHED_MAX_IN_FLIGHT_WRITE    - максимум одновременных запросов write (по умолчанию 64)
+    SHED_MIN_IN_FLIGHT          - нижняя граница адаптивного лимита (по умолчанию 4)
+    SHED_LOOP_LAG_MS            - задержка цикла событий, при которой лимиты снижаются (по умолчанию 100)
+    SHED_LAG_INTERVAL_MS        - интервал измерения задержки цикла событий (по умолчанию 50)
+    SHED_DECREASE_FACTOR        - множитель лимита при перегрузке (по умолчанию 0.75)
+"""
+from typing import Dict, Tuple
+from fastapi import status
+from fastapi.responses import JSONResponse
+import asyncio
+import os
+
+LOAD_SHEDDING = os.getenv("LOAD_SHEDDING", "0") == "1"
+SHED_MAX_IN_FLIGHT_AUTH = int(os.getenv("SHED_MAX_IN_FLIGHT_AUTH", "32"))
+SHED_MAX_IN_FLIGHT_READ = int(os.getenv("SHED_MAX_IN_FLIGHT_READ", "256"))
+SHED_MAX_IN_FLIGHT_WRITE = int(os.getenv("SHED_MAX_IN_FLIGHT_WRITE", "64"))
+SHED_MIN_IN_FLIGHT = int(os.getenv("SHED_MIN_IN_FLIGHT", "4"))
+SHED_LOOP_LAG_MS = float(os.getenv("SHED_LOOP_LAG_MS", "100"))
+SHED_LAG_INTERVAL_MS = float(os.getenv("SHED_LAG_INTERVAL_MS", "50"))
+SHED_DECREASE_FACTOR = float(os.getenv("SHED_DECREASE_FACTOR", "0.75"))
+
+DECISIONS = ("admitted", "shed_in_flight", "shed_loop_lag")
+
+# Маршруты входа и регистрации: (метод, путь)
+AUTH_ROUTES = {("POST", "/api/login"), ("POST", "/api/signup")}
+
+# Маршруты, которые не ограничиваются
+EXEMPT_PATHS = {"/metrics"}
+
+OVERLOADED_DETAIL = "Сервер перегружен, повторите позже"
+
+def route_class(method: str, path: str) -> str:
+    """
+    Возвращает класс запроса для управления допуском.
+
+    Args:
+        method (str): HTTP-метод
+        path (str): Путь запроса
+
+    Returns:
+        str: auth, read или write
+    """
+    if (method, path) in AUTH_ROUTES:
+        return "auth"
+    if method in ("GET", "HEAD"):
+        return "read"
+    return "write"
+
+class AdmissionController:
+    """
+    Адаптивные лимиты одновременных запросов по классам.
+
+    Используется только из цикла событий, поэтому блокировки не нужны.
+
+    Атрибуты:
+        max_limits (Dict[str, int]): Максимальные лимиты классов
+        limits (Dict[str, float]): Текущие лимиты классов
+        in_flight (Dict[str, int]): Обрабатываемые запросы по классам
+        lag (float): Последняя измеренная задержка цикла событий в секундах
+        decisions (Dict[Tuple[str, str], int]): (класс, решение) -> количество
+    """
+
+    def __init__(
+        self,
+        max_limits: Dict[str, int],
+        min_limit: int = SHED_MIN_IN_FLIGHT,
+        lag_threshold: float = SHED_LOOP_LAG_MS / 1000,
+        decrease_factor: float = SHED_DECREASE_FACTOR,
+    ):
+        self.max_limits = dict(max_limits)
+        self.min_limit = min_limit
+        self.lag_threshold = lag_threshold
+        self.decrease_factor = decrease_factor
+        self.limits: Dict[str, float] = {name: float(limit) for name, limit in max_limits.items()}
+        self.in_flight: Dict[str, int] = {name: 0 for name in max_limits}
+        self.lag = 0.0
+        self.decisions: Dict[Tuple[str, str], int] = {
+            (name, decision): 0 for name in max_limits for decision in DECISIONS
+        }
+
+    def try_acquire(self, name: str) -> bool:
+        """
+        Принимает запрос класса, если лимит класса не исчерпан.
+
+        Args:
+            name (str): Класс запроса
+
+        Returns:
+            bool: True, если запрос принят (затем обязателен вызов release)
+        """
+        limit = self.limits[name]
+        if self.in_flight[name] >= limit:
+            decision = "shed_in_flight" if limit >= self.max_limits[name] else "shed_loop_lag"
+            self.decisions[(name, decision)] += 1
+            return False
+        self.in_flight[name] += 1
+        self.decisions[(name, "admitted")] += 1
+        return True
+
+    def release(self, name: str) -> None:
+        """
+        Отмечает завершение принятого запроса.
+
+        Args:
+            name (str): Класс запроса
+        """
+        self.in_flight[name] -= 1
+
+    def observe_lag(self, lag: float) -> None:
+        """
+        Пересчитывает лимиты по измеренной задержке цикла событий.
+
+        Args:
+            lag (float): Задержка цикла событий в секундах
+        """
+        self.lag = lag
+        for name, limit in self.limits.items():
+            if lag > self.lag_threshold:
+                self.limits[name] = max(self.min_limit, limit * self.decrease_factor)
+            else:
+                maximum = self.max_limits[name]
+                self.limits[name] = min(maximum, limit + max(1.0, maximum * 0.05))
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Возвращает состояние для метрик.
+
+        Returns:
+            Dict[str, object]: Лимиты, обрабатываемые запросы, задержка цикла событий и решения
+        """
+        return {
+            "limits": dict(self.limits),
+            "in_flight": dict(self.in_flight),
+            "lag": self.lag,
+            "decisions": dict(self.decisions),
+        }
+
+admission = AdmissionController({
+    "auth": SHED_MAX_IN_FLIGHT_AUTH,
+    "read": SHED_MAX_IN_FLIGHT_READ,
+    "write": SHED_MAX_IN_FLIGHT_WRITE,
+})
+
+async def run_lag_monitor(
+    controller: AdmissionController = admission, interval: float = SHED_LAG_INTERVAL_MS / 1000
+) -> None:
+    """
+    Периодически измеряет задержку цикла событий и передает ее контроллеру допуска.
+
+    Args:
+        controller (AdmissionController): Контроллер допуска
+        interval (float): Интервал измерения в секундах
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        controller.observe_lag(max(0.0, loop.time() - started - interval))
+
+class LoadSheddingMiddleware:
+    """
+    ASGI-middleware, отклоняющее запросы сверх лимита их класса с кодом 503.
+
+    Отклонение происходит до чтения тела запроса и вызова маршрута.
+
+    Атрибуты:
+        app (ASGIApp): Следующее приложение в цепочке
+        controller (AdmissionController): Контроллер допуска
+    """
+
+    def __init__(self, app, controller: AdmissionController = admission):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        name = route_class(scope["method"], scope["path"])
+        if not self.controller.try_acquire(name):
+            response = JSONResponse(
+                {"detail": OVERLOADED_DETAIL},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name)
@@ -0,0 +1,59 @@
+"""
+Модуль содержит MetricsMiddleware, измеряющее задержку запросов и время
+их фаз. Гистограммы, phase() и вывод в формате Prometheus - в app.metrics.
+"""
+from typing import Dict
+import time
+from app.metrics import UNMATCHED_ROUTE, record_request, request_phases
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware, измеряющее задержку запросов и время их фаз.
+
+    Маршрут определяется по шаблону пути (например, /api/posts/{post_id}),
+    чтобы количество рядов метрик не зависело от значений параметров.
+
+    Атрибуты:
+        app (ASGIApp): Следующее приложение в цепочке
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: Dict[object, str] = {}
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        route = self._routes.get(endpoint)
+        if route is None:
+            for candidate in scope["app"].routes:
+                if getattr(candidate, "endpoint", None) is endpoint:
+                    route = self._routes[endpoint] = candidate.path
+                    break
+            else:
+                route = UNMATCHED_ROUTE
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        phases: Dict[str, float] = {}
+        token = request_phases.set(phases)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - started
+            request_phases.reset(token)
+            record_request(scope["method"], self._route(scope), status, duration, phases)
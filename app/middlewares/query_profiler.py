@@ -0,0 +1,47 @@
+"""
+Модуль содержит учет SQL-запросов каждого HTTP-запроса.
+
+QueryProfilerMiddleware открывает статистику запросов (см. app.database.profiler)
+на время обработки запроса и сообщает ее в заголовках ответа:
+    X-DB-Queries    - количество SQL-запросов
+    Server-Timing   - db;dur=<суммарное время в мс>;desc="<количество> queries"
+
+У потоковых ответов заголовки отправляются до тела, поэтому в них
+попадают только запросы, выполненные до начала ответа.
+
+Middleware подключается переменной окружения SQL_PROFILE=1 (по умолчанию 0).
+"""
+from app.database.profiler import profile_queries
+import os
+
+SQL_PROFILE = os.getenv("SQL_PROFILE", "0") == "1"
+
+class QueryProfilerMiddleware:
+    """
+    ASGI-middleware, добавляющее к ответу статистику SQL-запросов.
+
+    Атрибуты:
+        app (ASGIApp): Следующее приложение в цепочке
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with profile_queries() as stats:
+            async def send_with_stats(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-queries", str(stats.count).encode("latin-1")))
+                    headers.append((
+                        b"server-timing",
+                        f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries"'.encode("latin-1"),
+                    ))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
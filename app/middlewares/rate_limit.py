@@ -0,0 +1,191 @@
+"""
+Модуль содержит ограничение частоты запросов по алгоритму token bucket.
+
+Вход и регистрация вычисляют bcrypt при каждом вызове, поэтому поток неверных
+паролей может занять весь пул хеширования (см. services.password_service).
+Ограничение проверяется зависимостью маршрута (rate_limit) до вызова сервисов:
+отклоненный запрос не доходит ни до БД, ни до bcrypt.
+
+Для каждого ключа (IP клиента, email) хранится корзина - количество токенов
+и момент последнего обращения. Токены пополняются со скоростью rate в секунду,
+но не больше burst; запрос забирает один токен, а если токена нет, отклоняется
+с кодом 429 и заголовком Retry-After. Проверка выполняется за O(1).
+
+Корзины хранятся в OrderedDict в порядке последнего обращения. Корзины,
+к которым не обращались дольше времени полного пополнения (они не отличаются
+от новой), удаляются с начала словаря при каждой проверке; при превышении
+RATE_LIMIT_MAX_KEYS удаляется самая давняя корзина. Память ограничена.
+
+Ограничение действует в пределах воркера. Скорость и всплеск должны быть
+положительными (лимитер с нулевой скоростью никогда не пополнялся бы);
+ограничение целиком отключается переменной AUTH_RATE_LIMIT=0.
+Настройки задаются переменными окружения:
+    AUTH_RATE_LIMIT             - 1 (по умолчанию) включает ограничение входа и регистрации
+    AUTH_IP_RATE_PER_MINUTE     - попыток в минуту с одного IP (по умолчанию 60)
+    AUTH_IP_BURST               - допустимый всплеск попыток с одного IP (по умолчанию 20)
+    AUTH_EMAIL_RATE_PER_MINUTE  - попыток в минуту для одного email (по умолчанию 10)
+    AUTH_EMAIL_BURST            - допустимый всплеск попыток для одного email (по умолчанию 5)
+    RATE_LIMIT_MAX_KEYS         - максимальное количество корзин в лимитере (по умолчанию 100000)
+"""
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from fastapi import HTTPException, Request, status
+
+AUTH_RATE_LIMIT = os.getenv("AUTH_RATE_LIMIT", "1") == "1"
+AUTH_IP_RATE_PER_MINUTE = float(os.getenv("AUTH_IP_RATE_PER_MINUTE", "60"))
+AUTH_IP_BURST = int(os.getenv("AUTH_IP_BURST", "20"))
+AUTH_EMAIL_RATE_PER_MINUTE = float(os.getenv("AUTH_EMAIL_RATE_PER_MINUTE", "10"))
+AUTH_EMAIL_BURST = int(os.getenv("AUTH_EMAIL_BURST", "5"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+TOO_MANY_REQUESTS_DETAIL = "Слишком много попыток, повторите позже"
+
+class TokenBucketLimiter:
+    """
+    Набор корзин token bucket с общими параметрами.
+
+    Атрибуты:
+        rate (float): Скорость пополнения, токенов в секунду
+        burst (int): Емкость корзины
+        max_keys (int): Максимальное количество хранимых корзин
+        rejected (int): Количество отклоненных запросов
+
+    Raises:
+        ValueError: Если rate или burst не положительны
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        if not rate > 0:
+            raise ValueError(f"Скорость пополнения должна быть положительной: {rate}")
+        if burst < 1:
+            raise ValueError(f"Емкость корзины должна быть не меньше 1: {burst}")
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.rejected = 0
+        # ключ -> (токенов, момент последнего обращения); порядок - по последнему обращению
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, now: Optional[float] = None) -> float:
+        """
+        Забирает токен из корзины ключа.
+
+        Args:
+            key (str): Ключ корзины
+            now (Optional[float]): Текущее время (time.monotonic())
+
+        Returns:
+            float: 0, если токен получен, иначе сколько секунд ждать следующего токена
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._evict_idle(now)
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / self.rate
+                self.rejected += 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def _evict_idle(self, now: float) -> None:
+        # Корзина, к которой не обращались burst / rate секунд, заполнена целиком
+        # и равна новой. Словарь упорядочен по времени обращения, поэтому
+        # проверка останавливается на первой недавней корзине; каждая корзина
+        # удаляется один раз, и стоимость проверки в среднем O(1)
+        idle_after = self.burst / self.rate
+        while self._buckets:
+            key, (_, updated) = next(iter(self._buckets.items()))
+            if now - updated < idle_after:
+                break
+            del self._buckets[key]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Возвращает счетчики лимитера.
+
+        Returns:
+            Dict[str, int]: Количество корзин и отклоненных запросов
+        """
+        return {"buckets": len(self._buckets), "rejected": self.rejected}
+
+async def client_ip(request: Request) -> Optional[str]:
+    """
+    Возвращает IP клиента для ключа ограничения.
+
+    Args:
+        request (Request): Объект запроса
+
+    Returns:
+        Optional[str]: Адрес клиента или None, если он неизвестен
+    """
+    return request.client.host if request.client else None
+
+async def body_email(request: Request) -> Optional[str]:
+    """
+    Возвращает email из JSON-тела запроса для ключа ограничения.
+
+    Тело уже прочитано FastAPI и кэшировано в объекте запроса, поэтому
+    повторного чтения нет. Некорректное тело пропускается: его отклонит
+    валидация запроса.
+
+    Args:
+        request (Request): Объект запроса
+
+    Returns:
+        Optional[str]: Email в нижнем регистре или None
+    """
+    try:
+        data = await request.json()
+    except ValueError:
+        return None
+    email = data.get("email") if isinstance(data, dict) else None
+    return email.strip().lower() if isinstance(email, str) else None
+
+def rate_limit(
+    limiter: TokenBucketLimiter, key: Callable[[Request], Awaitable[Optional[str]]]
+) -> Callable[[Request], Awaitable[None]]:
+    """
+    Создает зависимость FastAPI, ограничивающую частоту запросов.
+
+    Подключается к маршруту или роутеру через dependencies=[Depends(...)].
+
+    Args:
+        limiter (TokenBucketLimiter): Лимитер
+        key (Callable[[Request], Awaitable[Optional[str]]]): Функция ключа
+            (запросы без ключа не ограничиваются)
+
+    Returns:
+        Callable[[Request], Awaitable[None]]: Зависимость
+
+    Raises:
+        HTTPException: 429 с заголовком Retry-After, если лимит исчерпан
+    """
+    async def dependency(request: Request) -> None:
+        value = await key(request)
+        if value is None:
+            return
+        wait = limiter.acquire(value)
+        if wait > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=TOO_MANY_REQUESTS_DETAIL,
+                headers={"Retry-After": str(math.ceil(wait))}
+            )
+    return dependency
+
+# Лимитеры входа и регистрации: общие для обоих маршрутов, так как оба вычисляют bcrypt
+auth_ip_limiter = TokenBucketLimiter(AUTH_IP_RATE_PER_MINUTE / 60, AUTH_IP_BURST)
+auth_email_limiter = TokenBucketLimiter(AUTH_EMAIL_RATE_PER_MINUTE / 60, AUTH_EMAIL_BURST)
+
+AUTH_LIMITERS: Dict[str, TokenBucketLimiter] = {"ip": auth_ip_limiter, "email": auth_email_limiter}
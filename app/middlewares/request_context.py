@@ -0,0 +1,99 @@
+"""
+Модуль содержит внешний слой обработки запроса: контекст запроса, замер
+времени и преобразование ошибок базы данных в ответ.
+
+RequestContextMiddleware - ASGI-middleware без промежуточных задач
+и буферизации тела (в отличие от BaseHTTPMiddleware), поэтому потоковые
+ответы проходят через него по частям. Для каждого запроса оно:
+    1. назначает ID запроса: берет заголовок X-Request-ID клиента или
+       создает новый; ID доступен коду через current_request_id() и
+       возвращается в заголовке X-Request-ID ответа;
+    2. добавляет заголовок Server-Timing: app;dur=<мс до начала ответа>;
+    3. отвечает 500 с JSON {"detail": "Ошибка базы данных"} на SQLAlchemyError,
+       если ответ еще не начат; иначе ошибка передается дальше и соединение
+       обрывается сервером. Ошибка записывается в журнал app.request вместе
+       с методом, путем и ID запроса.
+"""
+from contextvars import ContextVar
+from typing import Optional
+from fastapi import status
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import SQLAlchemyError
+import logging
+import time
+import uuid
+
+DATABASE_ERROR_DETAIL = "Ошибка базы данных"
+
+# Максимальная длина ID запроса, принимаемого от клиента
+REQUEST_ID_MAX_LENGTH = 128
+
+logger = logging.getLogger("app.request")
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+def current_request_id() -> Optional[str]:
+    """
+    Возвращает ID текущего запроса.
+
+    Returns:
+        Optional[str]: ID запроса или None вне обработки запроса
+    """
+    return _request_id.get()
+
+def _client_request_id(value: Optional[bytes]) -> Optional[str]:
+    if not value or len(value) > REQUEST_ID_MAX_LENGTH:
+        return None
+    request_id = value.decode("latin-1")
+    return request_id if request_id.isascii() and request_id.isprintable() else None
+
+class RequestContextMiddleware:
+    """
+    ASGI-middleware, задающее контекст запроса и обрабатывающее ошибки БД.
+
+    Атрибуты:
+        app (ASGIApp): Следующее приложение в цепочке
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _client_request_id(dict(scope["headers"]).get(b"x-request-id")) or uuid.uuid4().hex
+        token = _request_id.set(request_id)
+        started = time.perf_counter()
+        response_started = False
+
+        async def send_with_context(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                headers.append((
+                    b"server-timing",
+                    f"app;dur={(time.perf_counter() - started) * 1000:.2f}".encode("latin-1"),
+                ))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_context)
+        except SQLAlchemyError:
+            logger.exception(
+                "Ошибка базы данных при обработке %s %s [request_id=%s]",
+                scope["method"], scope["path"], request_id,
+            )
+            if response_started:
+                raise
+            response = JSONResponse(
+                {"detail": DATABASE_ERROR_DETAIL},
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+            await response(scope, receive, send_with_context)
+        finally:
+            _request_id.reset(token)
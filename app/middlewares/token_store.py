@@ -0,0 +1,288 @@
+"""
+Модуль содержит хранилища простых токенов доступа.
+
+Токен живет TOKEN_TTL секунд. Хранилище выбирается переменной окружения TOKEN_STORE:
+    sqlite - общий для всех воркеров файл SQLite в режиме WAL (по умолчанию)
+    memory - словарь в памяти процесса (только для одного воркера)
+
+Перед хранилищем стоит LRU-кэш воркера: повторные проверки одного токена
+не обращаются к общему хранилищу. Истекшие токены удаляются фоновой задачей
+(см. run_sweeper).
+
+Тот же файл SQLite хранит поколения ключей кэша ответов (см. caching.CacheGenerations).
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+TOKEN_STORE = os.getenv("TOKEN_STORE", "sqlite")
+TOKEN_STORE_PATH = os.getenv("TOKEN_STORE_PATH", "./data/tokens.db")
+TOKEN_TTL = int(os.getenv("TOKEN_TTL", str(30 * 60)))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+# Сколько секунд запись может жить в кэше воркера, прежде чем будет перечитана
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", "60"))
+
+# Интервал фоновой очистки истекших токенов в секундах
+TOKEN_SWEEP_INTERVAL = int(os.getenv("TOKEN_SWEEP_INTERVAL", "60"))
+
+def connect_shared(local: threading.local, path: str) -> sqlite3.Connection:
+    """
+    Возвращает соединение текущего потока с общим файлом SQLite.
+
+    Соединение открывается при первом обращении в режиме WAL и автофиксации.
+    Соединение нельзя переиспользовать после fork, поэтому оно привязано к PID.
+
+    Args:
+        local (threading.local): Хранилище соединений потоков
+        path (str): Путь к файлу базы данных
+
+    Returns:
+        sqlite3.Connection: Соединение
+    """
+    conn = getattr(local, "conn", None)
+    if conn is None or local.pid != os.getpid():
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = sqlite3.connect(path, timeout=5.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        local.conn = conn
+        local.pid = os.getpid()
+    return conn
+
+class TokenStore:
+    """
+    Интерфейс хранилища токенов.
+    """
+
+    def put(self, token: str, user_id: int, expires_at: float) -> None:
+        """
+        Сохраняет токен.
+
+        Args:
+            token (str): Токен
+            user_id (int): ID пользователя
+            expires_at (float): Момент истечения (time.time())
+        """
+        raise NotImplementedError
+
+    def get(self, token: str) -> Optional[Tuple[int, float]]:
+        """
+        Возвращает владельца токена и момент его истечения.
+
+        Args:
+            token (str): Токен
+
+        Returns:
+            Optional[Tuple[int, float]]: ID пользователя и момент истечения или None
+        """
+        raise NotImplementedError
+
+    def sweep(self, now: float) -> int:
+        """
+        Удаляет истекшие токены.
+
+        Args:
+            now (float): Текущее время (time.time())
+
+        Returns:
+            int: Количество удаленных токенов
+        """
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Возвращает счетчики хранилища.
+
+        Returns:
+            Dict[str, int]: Количество токенов и, для кэша воркера, попадания и промахи
+        """
+        raise NotImplementedError
+
+class MemoryTokenStore(TokenStore):
+    """
+    Хранилище токенов в памяти процесса.
+    """
+
+    def __init__(self):
+        self._tokens: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def put(self, token: str, user_id: int, expires_at: float) -> None:
+        with self._lock:
+            self._tokens[token] = (user_id, expires_at)
+
+    def get(self, token: str) -> Optional[Tuple[int, float]]:
+        return self._tokens.get(token)
+
+    def sweep(self, now: float) -> int:
+        with self._lock:
+            expired = [token for token, (_, expires_at) in self._tokens.items() if expires_at <= now]
+            for token in expired:
+                del self._tokens[token]
+        return len(expired)
+
+    def stats(self) -> Dict[str, int]:
+        return {"tokens": len(self._tokens)}
+
+class SQLiteTokenStore(TokenStore):
+    """
+    Хранилище токенов в файле SQLite, общее для всех процессов на хосте.
+
+    Журнал WAL позволяет читать параллельно с записью, токен ищется
+    по первичному ключу. У каждого потока свое соединение.
+
+    Атрибуты:
+        path (str): Путь к файлу базы данных
+    """
+
+    def __init__(self, path: str = TOKEN_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tokens ("
+                "token TEXT PRIMARY KEY, user_id INTEGER NOT NULL, expires_at REAL NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_tokens_expires_at ON tokens (expires_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return connect_shared(self._local, self.path)
+
+    def put(self, token: str, user_id: int, expires_at: float) -> None:
+        self._connect().execute(
+            "INSERT OR REPLACE INTO tokens (token, user_id, expires_at) VALUES (?, ?, ?)",
+            (token, user_id, expires_at),
+        )
+
+    def get(self, token: str) -> Optional[Tuple[int, float]]:
+        row = self._connect().execute(
+            "SELECT user_id, expires_at FROM tokens WHERE token = ?", (token,)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def sweep(self, now: float) -> int:
+        return self._connect().execute("DELETE FROM tokens WHERE expires_at <= ?", (now,)).rowcount
+
+    def stats(self) -> Dict[str, int]:
+        return {"tokens": self._connect().execute("SELECT COUNT(*) FROM tokens").fetchone()[0]}
+
+class CachedTokenStore(TokenStore):
+    """
+    LRU-кэш воркера поверх общего хранилища токенов (read-through).
+
+    Атрибуты:
+        backend (TokenStore): Общее хранилище
+        max_entries (int): Максимальное количество токенов в кэше
+        ttl (float): Сколько секунд запись кэша считается актуальной
+    """
+
+    def __init__(self, backend: TokenStore, max_entries: int = TOKEN_CACHE_SIZE, ttl: float = TOKEN_CACHE_TTL):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # token -> (user_id, expires_at, момент, до которого запись кэша актуальна)
+        self._entries: "OrderedDict[str, Tuple[int, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0}
+
+    def _remember(self, token: str, user_id: int, expires_at: float) -> None:
+        with self._lock:
+            self._entries[token] = (user_id, expires_at, min(expires_at, time.time() + self.ttl))
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put(self, token: str, user_id: int, expires_at: float) -> None:
+        self.backend.put(token, user_id, expires_at)
+        self._remember(token, user_id, expires_at)
+
+    def get(self, token: str) -> Optional[Tuple[int, float]]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                user_id, expires_at, fresh_until = entry
+                if time.time() < fresh_until:
+                    self._entries.move_to_end(token)
+                    self._counters["hits"] += 1
+                    return user_id, expires_at
+                del self._entries[token]
+            self._counters["misses"] += 1
+
+        found = self.backend.get(token)
+        if found is not None:
+            self._remember(token, *found)
+        return found
+
+    def sweep(self, now: float) -> int:
+        with self._lock:
+            expired = [token for token, entry in self._entries.items() if entry[1] <= now]
+            for token in expired:
+                del self._entries[token]
+        return self.backend.sweep(now)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counters = dict(self._counters, cached=len(self._entries))
+        return dict(self.backend.stats(), **counters)
+
+_store: Optional[TokenStore] = None
+
+def get_token_store() -> TokenStore:
+    """
+    Возвращает хранилище токенов, создавая его при первом обращении.
+
+    Returns:
+        TokenStore: Хранилище токенов с кэшем воркера
+    """
+    global _store
+    if _store is None:
+        backend = SQLiteTokenStore() if TOKEN_STORE == "sqlite" else MemoryTokenStore()
+        _store = CachedTokenStore(backend)
+    return _store
+
+def save_token(token: str, user_id: int) -> None:
+    """
+    Сохраняет токен со сроком жизни TOKEN_TTL.
+
+    Args:
+        token (str): Токен
+        user_id (int): ID пользователя
+    """
+    get_token_store().put(token, user_id, time.time() + TOKEN_TTL)
+
+def lookup_token(token: str) -> Optional[int]:
+    """
+    Возвращает ID владельца токена, если токен существует и не истек.
+
+    Args:
+        token (str): Токен
+
+    Returns:
+        Optional[int]: ID пользователя или None
+    """
+    found = get_token_store().get(token)
+    if found is None:
+        return None
+    user_id, expires_at = found
+    if expires_at <= time.time():
+        return None
+    return user_id
+
+async def run_sweeper() -> None:
+    """
+    Фоновая задача, периодически удаляющая истекшие токены.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(TOKEN_SWEEP_INTERVAL)
+        try:
+            await loop.run_in_executor(None, get_token_store().sweep, time.time())
+        except sqlite3.Error:
+            # Хранилище могло быть занято другим воркером, повторим на следующем шаге
+            continue
@@ -0,0 +1,80 @@
+"""
+Модуль содержит кодеки хранения текста постов.
+
+Имя кодека сохраняется в строке поста (Post.text_codec), поэтому смена
+настроек не влияет на чтение уже сохраненных постов.
+
+Настройки задаются переменными окружения:
+    POST_COMPRESSION            - кодек для новых постов: none (по умолчанию) или zlib
+    POST_COMPRESSION_THRESHOLD  - минимальный размер текста в байтах для сжатия (по умолчанию 1024)
+    POST_COMPRESSION_LEVEL      - уровень сжатия zlib (по умолчанию 6)
+"""
+import os
+import zlib
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+POST_COMPRESSION = os.getenv("POST_COMPRESSION", "none")
+POST_COMPRESSION_THRESHOLD = int(os.getenv("POST_COMPRESSION_THRESHOLD", "1024"))
+POST_COMPRESSION_LEVEL = int(os.getenv("POST_COMPRESSION_LEVEL", "6"))
+
+class Codec(NamedTuple):
+    """
+    Кодек хранения текста.
+
+    Атрибуты:
+        compress (Callable[[bytes], bytes]): Функция сжатия
+        decompress (Callable[[bytes], bytes]): Функция распаковки
+    """
+    compress: Callable[[bytes], bytes]
+    decompress: Callable[[bytes], bytes]
+
+CODECS: Dict[str, Codec] = {
+    "zlib": Codec(
+        compress=lambda data: zlib.compress(data, POST_COMPRESSION_LEVEL),
+        decompress=zlib.decompress,
+    ),
+}
+
+def should_encode(size: int) -> bool:
+    """
+    Проверяет, будет ли текст указанного размера сжиматься при сохранении.
+
+    Args:
+        size (int): Размер текста в байтах (UTF-8)
+
+    Returns:
+        bool: True, если сжатие включено и текст не меньше порога
+    """
+    return POST_COMPRESSION in CODECS and size >= POST_COMPRESSION_THRESHOLD
+
+def encode_text(data: bytes) -> Optional[Tuple[str, bytes]]:
+    """
+    Сжимает текст кодеком POST_COMPRESSION, если это имеет смысл.
+
+    Args:
+        data (bytes): Текст в UTF-8
+
+    Returns:
+        Optional[Tuple[str, bytes]]: Имя кодека и сжатые данные или None,
+        если сжатие отключено, текст меньше порога или сжатие не уменьшает размер
+    """
+    if not should_encode(len(data)):
+        return None
+
+    compressed = CODECS[POST_COMPRESSION].compress(data)
+    if len(compressed) >= len(data):
+        return None
+    return POST_COMPRESSION, compressed
+
+def decode_text(codec_name: str, data: bytes) -> str:
+    """
+    Распаковывает текст, сохраненный кодеком.
+
+    Args:
+        codec_name (str): Имя кодека из строки поста
+        data (bytes): Сжатые данные
+
+    Returns:
+        str: Исходный текст
+    """
+    return CODECS[codec_name].decompress(data).decode("utf-8")
@@ -1,10 +1,15 @@
 """
 Модуль с определением модели поста для SQLAlchemy.
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index, LargeBinary
+from sqlalchemy.sql import column, func, table
 from sqlalchemy.orm import relationship
 from app.database.config import Base
+from app.models.codecs import decode_text
+import os
+
+# Токенизатор полнотекстового индекса постов
+SEARCH_TOKENIZER = os.getenv("SEARCH_TOKENIZER", "unicode61 remove_diacritics 2")
 
 class Post(Base):
     """
@@ -12,17 +17,61 @@ class Post(Base):
     
     Атрибуты:
         id (int): Уникальный идентификатор поста
-        text (str): Текст поста
+        text (str): Текст поста (пустая строка, если текст вынесен в хранилище или сжат)
+        text_codec (str): Кодек, которым сжат текст (см. models.codecs), или None
+        text_compressed (bytes): Сжатый текст или None
+        body_hash (str): SHA-256 текста в хранилище больших текстов или None
+        body_size (int): Размер текста в байтах (UTF-8)
+        preview (str): Начало текста для постов, текст которых вынесен в хранилище
         user_id (int): Идентификатор пользователя-автора
         created_at (datetime): Дата и время создания поста
         user (User): Отношение к модели пользователя
     """
     __tablename__ = "posts"
+    __table_args__ = (
+        # Индекс для постраничной выборки постов пользователя (см. get_user_posts_page):
+        # каждая страница читается одним диапазонным сканированием индекса
+        Index("ix_posts_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     text = Column(Text, nullable=False)
+    text_codec = Column(String(16), nullable=True)
+    text_compressed = Column(LargeBinary, nullable=True)
+    body_hash = Column(String(64), nullable=True)
+    body_size = Column(Integer, nullable=True)
+    preview = Column(Text, nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, default=func.now(), nullable=False)
 
     # Связь с пользователем
-    user = relationship("User", backref="posts") 
\ No newline at end of file
+    user = relationship("User", backref="posts")
+
+    @property
+    def is_external(self) -> bool:
+        """
+        Текст поста вынесен в хранилище больших текстов.
+        """
+        return self.body_hash is not None
+
+    @property
+    def inline_text(self) -> str:
+        """
+        Текст, хранящийся в строке поста; сжатый текст распаковывается при обращении.
+        """
+        if self.text_codec is not None:
+            return decode_text(self.text_codec, self.text_compressed)
+        return self.text
+
+    @property
+    def summary_text(self) -> str:
+        """
+        Текст для списков: полный текст или превью, если текст вынесен в хранилище.
+        """
+        return self.preview if self.is_external else self.inline_text
+
+# Полнотекстовый индекс постов (см. services.search_service): таблица FTS5
+# с копией текста. rowid - id поста, owner - токен владельца (u<user_id>).
+# Столбец posts_fts нужен для служебных команд FTS5 (например, 'integrity-check').
+# Таблица создается миграцией (см. database.migrations) с токенизатором SEARCH_TOKENIZER
+posts_fts = table("posts_fts", column("rowid"), column("owner"), column("text"), column("posts_fts"))
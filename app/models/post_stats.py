@@ -0,0 +1,25 @@
+"""
+Модуль с определением модели статистики постов пользователя для SQLAlchemy.
+"""
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from app.database.config import Base
+
+class UserPostStats(Base):
+    """
+    Агрегированная статистика постов пользователя.
+
+    Строка обновляется в той же транзакции, что и посты (см. services.stats_service),
+    поэтому чтение статистики - один поиск по первичному ключу.
+
+    Атрибуты:
+        user_id (int): Идентификатор пользователя
+        post_count (int): Количество постов
+        total_bytes (int): Суммарный размер текстов постов в байтах (UTF-8)
+        last_post_at (datetime): Дата и время создания последнего поста или None
+    """
+    __tablename__ = "user_post_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    post_count = Column(Integer, nullable=False, default=0)
+    total_bytes = Column(Integer, nullable=False, default=0)
+    last_post_at = Column(DateTime, nullable=True)
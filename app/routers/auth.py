@@ -3,9 +3,12 @@
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from app.database.config import get_db
-from app.services.user_service import create_user, authenticate_user, get_user_by_email
+from app.database.config import get_session
+from app.services.async_user_service import create_user, authenticate_user, get_user_by_email
 from app.middlewares.auth import create_simple_token
+from app.middlewares.rate_limit import (
+    AUTH_RATE_LIMIT, auth_email_limiter, auth_ip_limiter, body_email, client_ip, rate_limit,
+)
 from app.schemas.user import UserCreate, UserLogin, TokenResponse
 
 router = APIRouter(
@@ -13,8 +16,16 @@ router = APIRouter(
     tags=["authentication"]
 )
 
-@router.post("/signup", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
-async def signup(user_data: UserCreate, db: Session = Depends(get_db)):
+# Ограничение частоты попыток по IP и email проверяется до обращения к БД и bcrypt
+auth_rate_limits = [
+    Depends(rate_limit(auth_ip_limiter, client_ip)),
+    Depends(rate_limit(auth_email_limiter, body_email)),
+] if AUTH_RATE_LIMIT else []
+
+@router.post(
+    "/signup", response_model=TokenResponse, status_code=status.HTTP_201_CREATED, dependencies=auth_rate_limits
+)
+async def signup(user_data: UserCreate, db: Session = Depends(get_session)):
     """
     Регистрация нового пользователя.
     
@@ -26,29 +37,26 @@ async def signup(user_data: UserCreate, db: Session = Depends(get_db)):
         TokenResponse: Ответ с токеном аутентификации
         
     Raises:
-        HTTPException: Если пользователь с таким email уже существует
+        HTTPException: Если пользователь с таким email уже существует или попыток слишком много
     """
     # Проверка, существует ли пользователь с таким email
-    db_user = get_user_by_email(db, user_data.email)
+    db_user = await get_user_by_email(db, user_data.email)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Пользователь с таким email уже зарегистрирован"
         )
     
-    # Создание пользователя
-    user = create_user(db, user_data)
-    
-    # Аутентификация и получение ID пользователя
-    user_id = authenticate_user(db, UserLogin(email=user_data.email, password=user_data.password))
+    # Создание пользователя (пароль только что захеширован, повторная проверка не нужна)
+    user = await create_user(db, user_data)
     
     # Генерация токена
-    token = create_simple_token(user_id)
+    token = create_simple_token(user.id)
     
     return {"token": token}
 
-@router.post("/login", response_model=TokenResponse)
-async def login(user_data: UserLogin, db: Session = Depends(get_db)):
+@router.post("/login", response_model=TokenResponse, dependencies=auth_rate_limits)
+async def login(user_data: UserLogin, db: Session = Depends(get_session)):
     """
     Вход пользователя в систему.
     
@@ -60,10 +68,10 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
         TokenResponse: Ответ с токеном аутентификации
         
     Raises:
-        HTTPException: Если аутентификация не удалась
+        HTTPException: Если аутентификация не удалась или попыток слишком много
     """
     # Аутентификация пользователя
-    user_id = authenticate_user(db, user_data)
+    user_id = await authenticate_user(db, user_data)
     
     if user_id is None:
         raise HTTPException(
@@ -0,0 +1,112 @@
+"""
+Модуль содержит маршрут GET /metrics с метриками в текстовом формате Prometheus.
+
+Кроме метрик запросов (см. app.metrics) отдаются состояние
+кэша ответов, кэша токенов, лимитеров входа и регистрации, управления
+допуском и пула хеширования паролей. Маршрут подключается
+только при METRICS=1.
+"""
+from typing import List
+from fastapi import APIRouter, Response
+from starlette.concurrency import run_in_threadpool
+from app.middlewares.caching import get_cache_backend
+from app.metrics import render_metric, render_request_metrics
+from app.middlewares.load_shedding import admission
+from app.middlewares.rate_limit import AUTH_LIMITERS
+from app.middlewares.token_store import get_token_store
+from app.services import password_service
+
+# Response сам добавляет charset=utf-8 к текстовым типам
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4"
+
+router = APIRouter(tags=["metrics"])
+
+def render_process_metrics(lines: List[str]) -> None:
+    """
+    Добавляет метрики кэшей и пула хеширования паролей.
+
+    Args:
+        lines (List[str]): Строки вывода
+    """
+    cache = get_cache_backend().stats()
+    render_metric(
+        lines, "response_cache_events_total", "counter", "События кэша ответов",
+        {(name,): cache[name] for name in ("hits", "misses", "evictions", "expirations")}, ("event",),
+    )
+    render_metric(lines, "response_cache_entries", "gauge", "Записей в кэше ответов", {(): cache["entries"]})
+    render_metric(lines, "response_cache_bytes", "gauge", "Объем кэша ответов в байтах", {(): cache["bytes"]})
+
+    tokens = get_token_store().stats()
+    render_metric(lines, "token_store_tokens", "gauge", "Токенов в хранилище", {(): tokens["tokens"]})
+    render_metric(lines, "token_cache_entries", "gauge", "Токенов в кэше воркера", {(): tokens["cached"]})
+    render_metric(
+        lines, "token_cache_events_total", "counter", "Попадания и промахи кэша токенов",
+        {("hits",): tokens["hits"], ("misses",): tokens["misses"]}, ("event",),
+    )
+
+    limiters = {name: limiter.stats() for name, limiter in AUTH_LIMITERS.items()}
+    render_metric(
+        lines, "auth_rate_limit_buckets", "gauge", "Корзин в лимитерах входа и регистрации",
+        {(name,): stats["buckets"] for name, stats in limiters.items()}, ("key",),
+    )
+    render_metric(
+        lines, "auth_rate_limit_rejected_total", "counter", "Попытки входа и регистрации, отклоненные лимитером",
+        {(name,): stats["rejected"] for name, stats in limiters.items()}, ("key",),
+    )
+
+    shedding = admission.stats()
+    render_metric(
+        lines, "load_shedding_decisions_total", "counter", "Решения управления допуском по классам запросов",
+        shedding["decisions"], ("class", "decision"),
+    )
+    render_metric(
+        lines, "load_shedding_in_flight", "gauge", "Обрабатываемые запросы по классам",
+        {(name,): value for name, value in shedding["in_flight"].items()}, ("class",),
+    )
+    render_metric(
+        lines, "load_shedding_limit", "gauge", "Текущий адаптивный лимит одновременных запросов",
+        {(name,): value for name, value in shedding["limits"].items()}, ("class",),
+    )
+    render_metric(
+        lines, "event_loop_lag_seconds", "gauge", "Последняя измеренная задержка цикла событий",
+        {(): shedding["lag"]},
+    )
+
+    pool = password_service.pool_metrics
+    for name, help_text in (
+        ("queue_wait", "Ожидание задачи в очереди пула хеширования"),
+        ("hash_time", "Время хеширования или проверки пароля в воркере"),
+    ):
+        metric = f"password_pool_{name}_seconds"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} summary")
+        lines.append(f"{metric}_sum {pool[name]['total']!r}")
+        lines.append(f"{metric}_count {pool[name]['count']}")
+    render_metric(
+        lines, "password_pool_rejected_total", "counter",
+        "Задачи, отклоненные из-за переполнения очереди", {(): pool["rejected"]},
+    )
+
+def render_metrics() -> str:
+    """
+    Собирает все метрики в текстовом формате Prometheus.
+
+    Returns:
+        str: Текст метрик
+    """
+    lines: List[str] = []
+    render_request_metrics(lines)
+    render_process_metrics(lines)
+    lines.append("")
+    return "\n".join(lines)
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Метрики приложения в текстовом формате Prometheus.
+
+    Returns:
+        Response: Текст метрик
+    """
+    # Подсчет токенов в SQLite - блокирующий вызов, выполняем его вне цикла событий
+    return Response(await run_in_threadpool(render_metrics), media_type=PROMETHEUS_MEDIA_TYPE)
@@ -1,114 +1,328 @@
 """
 Модуль содержит маршруты API для работы с постами пользователей.
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
-from app.database.config import get_db
-from app.middlewares.auth import get_current_user_id
-from app.middlewares.caching import cache_response, invalidate_cache
-from app.services.post_service import create_post, get_user_posts, delete_post
-from app.services.user_service import get_user_by_id
-from app.models.user import User
-from app.schemas.post import PostCreate, PostResponse, PostDelete
+from typing import AsyncIterator, List, Optional
+import hashlib
+from app.database.config import get_session
+from app.middlewares.identity import get_verified_user_id
+from app.middlewares.caching import cache_response, invalidate_cache, etag_matches
+from app.metrics import phase
+from app.services.async_post_service import (
+    create_post, create_posts, get_user_posts_page, stream_user_posts,
+    get_owned_post, delete_post, delete_posts, search_posts, get_post_stats,
+)
+from app.services import blob_store
+from app.schemas.post import (
+    PostCreate, PostResponse, PostPage, PostDelete, PostStats, render_post, render_post_page,
+    PostBatchCreate, PostBatchCreateResponse, PostBatchDelete, PostBatchDeleteResponse,
+)
 
 router = APIRouter(
     prefix="/api/posts",
     tags=["posts"]
 )
 
+# Формат потоковой выдачи постов: один JSON-объект поста на строку
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Минимальный размер части потокового ответа: строки накапливаются,
+# чтобы не отправлять каждый пост отдельной записью в сокет
+NDJSON_CHUNK_SIZE = 64 * 1024
+
+def accepts_ndjson(request: Request) -> bool:
+    """
+    Проверяет, запросил ли клиент потоковую выдачу в формате NDJSON.
+    
+    Args:
+        request (Request): Объект запроса
+        
+    Returns:
+        bool: True, если заголовок Accept содержит application/x-ndjson
+    """
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+async def ndjson_lines(posts: AsyncIterator) -> AsyncIterator[bytes]:
+    """
+    Кодирует посты в строки NDJSON по мере чтения из БД.
+    
+    Args:
+        posts (AsyncIterator[Post]): Посты
+        
+    Yields:
+        bytes: Часть тела ответа, состоящая из целых строк
+    """
+    buffer = bytearray()
+    async for post in posts:
+        with phase("encode"):
+            buffer += render_post(post)
+        buffer += b"\n"
+        if len(buffer) >= NDJSON_CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
 @router.post("", response_model=PostResponse, status_code=status.HTTP_201_CREATED)
 async def add_post(
     post_data: PostCreate,
-    user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    user_id: int = Depends(get_verified_user_id),
+    db: Session = Depends(get_session)
 ):
     """
     Создание нового поста.
     
     Args:
         post_data (PostCreate): Данные для создания поста
-        user_id (int): ID текущего аутентифицированного пользователя
+        user_id (int): ID текущего аутентифицированного пользователя (существование подтверждено)
         db (Session): Сессия базы данных
         
     Returns:
         PostResponse: Созданный пост
     """
-    # Проверка наличия пользователя
-    user = get_user_by_id(db, user_id)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Пользователь не найден"
-        )
-    
     # Создание поста
-    post = create_post(db, post_data, user_id)
+    post = await create_post(db, post_data, user_id)
     
     # Инвалидируем кеш для запроса постов этого пользователя
     invalidate_cache(user_id, "get_posts")
+    invalidate_cache(user_id, "search_posts")
     
     return post
 
-@router.get("", response_model=List[PostResponse])
-@cache_response("get_posts")
+@router.post("/batch", response_model=PostBatchCreateResponse, status_code=status.HTTP_201_CREATED)
+async def add_posts_batch(
+    batch: PostBatchCreate,
+    user_id: int = Depends(get_verified_user_id),
+    db: Session = Depends(get_session)
+):
+    """
+    Пакетное создание постов.
+    
+    Все посты вставляются одним запросом и одной транзакцией,
+    кеш списка постов инвалидируется один раз.
+    
+    Args:
+        batch (PostBatchCreate): Данные создаваемых постов
+        user_id (int): ID текущего аутентифицированного пользователя (существование подтверждено)
+        db (Session): Сессия базы данных
+        
+    Returns:
+        PostBatchCreateResponse: ID и время создания каждого поста
+    """
+    rows = await create_posts(db, batch.posts, user_id)
+    
+    # Инвалидируем кеш для запроса постов этого пользователя
+    invalidate_cache(user_id, "get_posts")
+    invalidate_cache(user_id, "search_posts")
+    
+    return {
+        "items": [
+            {"index": index, "id": row.id, "created_at": row.created_at}
+            for index, row in enumerate(rows)
+        ]
+    }
+
+@router.delete("/batch", response_model=PostBatchDeleteResponse)
+async def remove_posts_batch(
+    batch: PostBatchDelete,
+    user_id: int = Depends(get_verified_user_id),
+    db: Session = Depends(get_session)
+):
+    """
+    Пакетное удаление постов.
+    
+    Удаляются только посты текущего пользователя, одним запросом
+    DELETE ... WHERE id IN (...) AND user_id = ?.
+    
+    Args:
+        batch (PostBatchDelete): Идентификаторы постов для удаления
+        user_id (int): ID текущего аутентифицированного пользователя (существование подтверждено)
+        db (Session): Сессия базы данных
+        
+    Returns:
+        PostBatchDeleteResponse: Результат удаления каждого поста
+    """
+    deleted = set(await delete_posts(db, batch.post_ids, user_id))
+    
+    # Инвалидируем кеш для запроса постов этого пользователя
+    if deleted:
+        invalidate_cache(user_id, "get_posts")
+        invalidate_cache(user_id, "search_posts")
+    
+    return {
+        "items": [
+            {"post_id": post_id, "deleted": post_id in deleted}
+            for post_id in batch.post_ids
+        ]
+    }
+
+@router.get(
+    "",
+    response_model=PostPage,
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+)
+@cache_response("get_posts", vary=("limit", "cursor"), bypass=accepts_ndjson)
 async def get_posts(
-    user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    request: Request,
+    limit: int = Query(20, ge=1, le=100, description="Количество постов на странице"),
+    cursor: Optional[str] = Query(None, description="Курсор из next_cursor предыдущей страницы"),
+    user_id: int = Depends(get_verified_user_id),
+    db: Session = Depends(get_session)
 ):
     """
-    Получение всех постов пользователя.
+    Получение страницы постов пользователя, от новых к старым.
+    
+    Ответ кэшируется вместе с ETag; при совпадении If-None-Match
+    возвращается 304 Not Modified.
+    
+    С заголовком Accept: application/x-ndjson возвращаются все посты пользователя
+    (начиная с cursor, без учета limit) по одному JSON-объекту на строку.
+    Строки читаются из курсора БД частями и сразу отправляются клиенту,
+    поэтому память не зависит от количества постов. Такой ответ не кэшируется.
     
     Args:
-        user_id (int): ID текущего аутентифицированного пользователя
+        request (Request): Объект запроса (для заголовков Accept и If-None-Match)
+        limit (int): Количество постов на странице
+        cursor (Optional[str]): Курсор следующей страницы
+        user_id (int): ID текущего аутентифицированного пользователя (существование подтверждено)
         db (Session): Сессия базы данных
         
     Returns:
-        List[PostResponse]: Список постов пользователя
-    """
-    # Проверка наличия пользователя
-    user = get_user_by_id(db, user_id)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Пользователь не найден"
+        PostPage: Посты страницы и курсор следующей страницы
+    """
+    if accepts_ndjson(request):
+        posts = await stream_user_posts(db, user_id, cursor)
+        return StreamingResponse(
+            ndjson_lines(posts),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers={"Cache-Control": "private, no-store"},
         )
     
-    # Получение постов
-    posts = get_user_posts(db, user_id)
+    # Получение страницы постов
+    posts, next_cursor = await get_user_posts_page(db, user_id, limit, cursor)
+    
+    # Строки из БД сериализуются напрямую, без повторной валидации PostResponse;
+    # готовое JSON-тело сохраняется в кэш декоратором cache_response
+    with phase("encode"):
+        return render_post_page(posts, next_cursor)
+
+@router.get("/search", response_model=PostPage)
+@cache_response("search_posts", vary=("q", "limit", "cursor"))
+async def search_user_posts(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=256, description="Слова для поиска (слово* - поиск по префиксу)"),
+    limit: int = Query(20, ge=1, le=100, description="Количество постов на странице"),
+    cursor: Optional[str] = Query(None, description="Курсор из next_cursor предыдущей страницы"),
+    user_id: int = Depends(get_verified_user_id),
+    db: Session = Depends(get_session)
+):
+    """
+    Полнотекстовый поиск по постам пользователя.
+    
+    Возвращаются посты, содержащие все слова запроса, от более релевантных
+    к менее. Ответ кэшируется вместе с ETag, как и список постов.
+    
+    Args:
+        request (Request): Объект запроса (для заголовка If-None-Match)
+        q (str): Поисковый запрос
+        limit (int): Количество постов на странице
+        cursor (Optional[str]): Курсор следующей страницы
+        user_id (int): ID текущего аутентифицированного пользователя (существование подтверждено)
+        db (Session): Сессия базы данных
+        
+    Returns:
+        PostPage: Найденные посты и курсор следующей страницы
+    """
+    posts, next_cursor = await search_posts(db, user_id, q, limit, cursor)
+    
+    with phase("encode"):
+        return render_post_page(posts, next_cursor)
+
+@router.get("/stats", response_model=PostStats)
+async def get_posts_stats(
+    user_id: int = Depends(get_verified_user_id),
+    db: Session = Depends(get_session)
+):
+    """
+    Статистика постов пользователя: количество, суммарный размер и время последнего поста.
+    
+    Статистика поддерживается при создании и удалении постов, поэтому
+    ответ читается одной строкой, независимо от количества постов.
     
-    return posts
+    Args:
+        user_id (int): ID текущего аутентифицированного пользователя (существование подтверждено)
+        db (Session): Сессия базы данных
+        
+    Returns:
+        PostStats: Статистика постов
+    """
+    return await get_post_stats(db, user_id)
+
+@router.get("/{post_id}/body", response_class=Response)
+async def get_post_body(
+    post_id: int,
+    request: Request,
+    user_id: int = Depends(get_verified_user_id),
+    db: Session = Depends(get_session)
+):
+    """
+    Получение полного текста поста.
+    
+    Текст из хранилища больших текстов отдается из файла (FileResponse).
+    ETag - хеш содержимого; при совпадении If-None-Match возвращается 304.
+    
+    Args:
+        post_id (int): ID поста
+        request (Request): Объект запроса (для заголовка If-None-Match)
+        user_id (int): ID текущего аутентифицированного пользователя (существование подтверждено)
+        db (Session): Сессия базы данных
+        
+    Returns:
+        Response: Текст поста (text/plain)
+    """
+    post = await get_owned_post(db, post_id, user_id)
+    
+    if post.is_external:
+        digest, body = post.body_hash, None
+    else:
+        body = post.inline_text.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+    
+    headers = {"ETag": f'"{digest}"', "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    media_type = "text/plain; charset=utf-8"
+    if body is not None:
+        return Response(content=body, media_type=media_type, headers=headers)
+    
+    return FileResponse(blob_store.blob_path(digest), media_type=media_type, headers=headers)
 
 @router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def remove_post(
     post_id: int,
-    user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    user_id: int = Depends(get_verified_user_id),
+    db: Session = Depends(get_session)
 ):
     """
     Удаление поста.
     
     Args:
         post_id (int): ID поста для удаления
-        user_id (int): ID текущего аутентифицированного пользователя
+        user_id (int): ID текущего аутентифицированного пользователя (существование подтверждено)
         db (Session): Сессия базы данных
         
     Returns:
         None
     """
-    # Проверка наличия пользователя
-    user = get_user_by_id(db, user_id)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Пользователь не найден"
-        )
-    
     # Удаление поста
-    delete_post(db, post_id, user_id)
+    await delete_post(db, post_id, user_id)
     
     # Инвалидируем кеш для запроса постов этого пользователя
     invalidate_cache(user_id, "get_posts")
+    invalidate_cache(user_id, "search_posts")
     
     # Возвращаем 204 No Content
     return None 
\ No newline at end of file
@@ -1,37 +1,78 @@
 """
 Модуль содержит Pydantic-модели для валидации данных постов.
 """
-from pydantic import BaseModel, Field, validator
+from pydantic import AliasChoices, BaseModel, Field, PrivateAttr, ValidationError, model_validator
+from pydantic_core import to_json
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, Iterable, List, Optional
+import os
+
+# Максимальный размер текста поста в байтах (UTF-8)
+POST_TEXT_MAX_BYTES = 1_000_000
+
+# Максимальное количество постов в одном пакетном запросе
+POSTS_BATCH_MAX_SIZE = int(os.getenv("POSTS_BATCH_MAX_SIZE", "100"))
 
 class PostBase(BaseModel):
     """
     Базовая схема поста.
     
+    Текст кодируется в UTF-8 один раз при валидации: полученные байты
+    используются и для проверки размера, и для сохранения поста (text_bytes).
+    
     Атрибуты:
         text (str): Текст поста
     """
-    text: str = Field(..., min_length=1, max_length=1000000, description="Текст поста")
+    text: str = Field(..., min_length=1, max_length=POST_TEXT_MAX_BYTES, description="Текст поста")
+    _text_bytes: Optional[bytes] = PrivateAttr(None)
     
-    @validator('text')
-    def validate_text_size(cls, v):
+    @model_validator(mode="after")
+    def validate_text_size(self):
         """
         Валидатор для проверки размера текста поста.
         
-        Args:
-            v (str): Текст поста
-            
         Returns:
-            str: Проверенный текст
+            PostBase: Проверенная модель с сохраненным текстом в UTF-8
             
         Raises:
-            ValueError: Если размер текста превышает 1 МБ
+            ValidationError: Если размер текста превышает 1 МБ
         """
+        data = self.text.encode("utf-8")
+        
         # Проверка на размер (примерно 1 МБ)
-        if len(v.encode('utf-8')) > 1_000_000:
-            raise ValueError('Размер поста не должен превышать 1 МБ')
-        return v
+        if len(data) > POST_TEXT_MAX_BYTES:
+            raise _text_error(self, "Размер поста не должен превышать 1 МБ")
+        
+        self._text_bytes = data
+        return self
+    
+    @property
+    def text_bytes(self) -> bytes:
+        """
+        Текст поста в UTF-8, полученный при валидации.
+        """
+        if self._text_bytes is None:
+            self._text_bytes = self.text.encode("utf-8")
+        return self._text_bytes
+
+def _text_error(model: BaseModel, message: str) -> ValidationError:
+    """
+    Формирует ошибку валидации поля text.
+    
+    Args:
+        model (BaseModel): Проверяемая модель
+        message (str): Текст ошибки
+        
+    Returns:
+        ValidationError: Ошибка с расположением в поле text
+    """
+    return ValidationError.from_exception_data(type(model).__name__, [{
+        "type": "value_error",
+        "loc": ("text",),
+        # Текст не возвращается в ответе об ошибке: он может занимать мегабайты
+        "input": None,
+        "ctx": {"error": ValueError(message)},
+    }])
 
 class PostCreate(PostBase):
     """
@@ -42,23 +83,107 @@ class PostCreate(PostBase):
     """
     pass
 
-class PostResponse(PostBase):
+class PostResponse(BaseModel):
     """
     Схема для ответа с данными поста.
     
+    Для постов, текст которых вынесен в хранилище больших текстов, text содержит
+    превью, а полный текст доступен по GET /api/posts/{id}/body.
+    
+    Схема не наследует PostBase: ограничения на размер текста проверяются
+    при записи, и повторять их для каждого отдаваемого поста не нужно.
+    
     Атрибуты:
         id (int): Идентификатор поста
-        text (str): Текст поста
+        text (str): Текст поста или его превью
+        truncated (bool): text содержит только превью
+        size (Optional[int]): Размер полного текста в байтах
         created_at (datetime): Дата и время создания поста
         user_id (int): Идентификатор пользователя-автора
     """
+    text: str = Field(..., validation_alias=AliasChoices("summary_text", "text"), description="Текст поста или его превью")
+    truncated: bool = Field(False, validation_alias=AliasChoices("is_external", "truncated"))
+    size: Optional[int] = Field(None, validation_alias=AliasChoices("body_size", "size"))
     id: int
     user_id: int
     created_at: datetime
     
     class Config:
-        orm_mode = True
+        from_attributes = True
+        
+class PostPage(BaseModel):
+    """
+    Схема для ответа со страницей постов.
+    
+    Атрибуты:
+        items (List[PostResponse]): Посты страницы
+        next_cursor (Optional[str]): Курсор следующей страницы или None, если страница последняя
+    """
+    items: List[PostResponse]
+    next_cursor: Optional[str] = Field(None, description="Курсор следующей страницы")
+
+class PostStats(BaseModel):
+    """
+    Схема для ответа со статистикой постов пользователя.
+    
+    Атрибуты:
+        post_count (int): Количество постов
+        total_bytes (int): Суммарный размер текстов постов в байтах (UTF-8)
+        last_post_at (Optional[datetime]): Дата и время создания последнего поста или None
+    """
+    post_count: int
+    total_bytes: int
+    last_post_at: Optional[datetime] = None
+
+def post_response_data(post: Any) -> Dict[str, Any]:
+    """
+    Формирует поля PostResponse из строки ORM без валидации.
+    
+    Строки из БД считаются доверенными: их значения уже проверены при записи.
+    
+    Args:
+        post (Post): Пост
+        
+    Returns:
+        Dict[str, Any]: Поля ответа в порядке PostResponse
+    """
+    return {
+        "text": post.summary_text,
+        "truncated": post.is_external,
+        "size": post.body_size,
+        "id": post.id,
+        "user_id": post.user_id,
+        "created_at": post.created_at,
+    }
+
+def render_post(post: Any) -> bytes:
+    """
+    Сериализует пост в JSON, минуя валидацию PostResponse.
+    
+    Args:
+        post (Post): Пост
+        
+    Returns:
+        bytes: JSON-объект поста в формате PostResponse
+    """
+    return to_json(post_response_data(post))
+
+def render_post_page(posts: Iterable[Any], next_cursor: Optional[str]) -> bytes:
+    """
+    Сериализует страницу постов в JSON, минуя валидацию PostPage.
+    
+    Args:
+        posts (Iterable[Post]): Посты страницы
+        next_cursor (Optional[str]): Курсор следующей страницы
         
+    Returns:
+        bytes: JSON-объект в формате PostPage
+    """
+    return to_json({
+        "items": [post_response_data(post) for post in posts],
+        "next_cursor": next_cursor,
+    })
+
 class PostDelete(BaseModel):
     """
     Схема для удаления поста.
@@ -66,4 +191,64 @@ class PostDelete(BaseModel):
     Атрибуты:
         post_id (int): Идентификатор поста для удаления
     """
-    post_id: int = Field(..., description="Идентификатор поста для удаления") 
\ No newline at end of file
+    post_id: int = Field(..., description="Идентификатор поста для удаления")
+
+class PostBatchCreate(BaseModel):
+    """
+    Схема для пакетного создания постов.
+    
+    Атрибуты:
+        posts (List[PostCreate]): Данные создаваемых постов
+    """
+    posts: List[PostCreate] = Field(..., min_length=1, max_length=POSTS_BATCH_MAX_SIZE, description="Создаваемые посты")
+
+class PostBatchCreatedItem(BaseModel):
+    """
+    Схема результата создания одного поста в пакете.
+    
+    Атрибуты:
+        index (int): Позиция поста во входном списке
+        id (int): Идентификатор созданного поста
+        created_at (datetime): Дата и время создания поста
+    """
+    index: int
+    id: int
+    created_at: datetime
+
+class PostBatchCreateResponse(BaseModel):
+    """
+    Схема ответа на пакетное создание постов.
+    
+    Атрибуты:
+        items (List[PostBatchCreatedItem]): Результаты по каждому посту
+    """
+    items: List[PostBatchCreatedItem]
+
+class PostBatchDelete(BaseModel):
+    """
+    Схема для пакетного удаления постов.
+    
+    Атрибуты:
+        post_ids (List[int]): Идентификаторы постов для удаления
+    """
+    post_ids: List[int] = Field(..., min_length=1, max_length=POSTS_BATCH_MAX_SIZE, description="Идентификаторы постов для удаления")
+
+class PostBatchDeletedItem(BaseModel):
+    """
+    Схема результата удаления одного поста в пакете.
+    
+    Атрибуты:
+        post_id (int): Идентификатор поста
+        deleted (bool): True, если пост удален; False, если поста нет или он принадлежит другому пользователю
+    """
+    post_id: int
+    deleted: bool
+
+class PostBatchDeleteResponse(BaseModel):
+    """
+    Схема ответа на пакетное удаление постов.
+    
+    Атрибуты:
+        items (List[PostBatchDeletedItem]): Результаты по каждому посту
+    """
+    items: List[PostBatchDeletedItem]
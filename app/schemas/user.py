@@ -70,7 +70,7 @@ class UserOut(UserBase):
     created_at: datetime
     
     class Config:
-        orm_mode = True
+        from_attributes = True
         
 class TokenResponse(BaseModel):
     """
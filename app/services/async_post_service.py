@@ -0,0 +1,226 @@
+"""
+Модуль содержит асинхронный интерфейс бизнес-логики для работы с постами.
+
+Функции повторяют API модуля post_service, но вызываются через await и
+принимают как Session, так и AsyncSession (см. DATABASE_MODE).
+При GROUP_COMMIT=1 создание и удаление постов выполняются через групповую
+фиксацию (см. database.group_commit), а переданная сессия для них не используется.
+
+Запись больших текстов в хранилище (с fsync) и сжатие текста выполняются
+в пуле потоков до обращения к БД (см. build_values): в режиме async функции
+сервиса работают в потоке цикла событий и иначе задерживали бы все запросы.
+"""
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.database.config import DATABASE_MODE, run_db
+from app.database.group_commit import GROUP_COMMIT, group_committer
+from app.models.post import Post
+from app.schemas.post import PostCreate
+from sqlalchemy.engine import Row
+from app.services import post_service, search_service, stats_service
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+async def build_values(posts: List[PostCreate], user_id: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    Формирует значения столбцов постов в пуле потоков, если это требует
+    записи в хранилище больших текстов или сжатия.
+    
+    Args:
+        posts (List[PostCreate]): Данные постов
+        user_id (int): ID пользователя-автора
+        
+    Returns:
+        Optional[List[Dict[str, Any]]]: Значения столбцов постов или None, если их
+        дешевле сформировать в функции сервиса
+    """
+    if not any(post_service.is_costly_to_store(post) for post in posts):
+        return None
+    return await run_in_threadpool(
+        lambda: [post_service.build_post_values(post, user_id) for post in posts]
+    )
+
+async def create_post(db: Session, post: PostCreate, user_id: int) -> Post:
+    """
+    Создает новый пост.
+    
+    Args:
+        db (Session): Сессия базы данных
+        post (PostCreate): Данные поста
+        user_id (int): ID пользователя-автора
+        
+    Returns:
+        Post: Созданный пост
+    """
+    values = await build_values([post], user_id)
+    values = values[0] if values else None
+    if GROUP_COMMIT:
+        return await group_committer.submit(post_service.insert_post, post, user_id, values)
+    return await run_db(db, post_service.create_post, post, user_id, values)
+
+async def create_posts(db: Session, posts: List[PostCreate], user_id: int) -> List[Row]:
+    """
+    Создает несколько постов одним запросом INSERT.
+    
+    Args:
+        db (Session): Сессия базы данных
+        posts (List[PostCreate]): Данные постов
+        user_id (int): ID пользователя-автора
+        
+    Returns:
+        List[Row]: Строки (id, created_at) созданных постов в порядке входных данных
+    """
+    values = await build_values(posts, user_id)
+    return await run_db(db, post_service.create_posts, posts, user_id, values)
+
+async def delete_posts(db: Session, post_ids: List[int], user_id: int) -> List[int]:
+    """
+    Удаляет несколько постов пользователя одним запросом DELETE.
+    
+    Args:
+        db (Session): Сессия базы данных
+        post_ids (List[int]): ID постов
+        user_id (int): ID пользователя-владельца
+        
+    Returns:
+        List[int]: ID удаленных постов
+    """
+    return await run_db(db, post_service.delete_posts, post_ids, user_id)
+
+async def get_user_posts(db: Session, user_id: int) -> List[Post]:
+    """
+    Получает все посты пользователя.
+    
+    Args:
+        db (Session): Сессия базы данных
+        user_id (int): ID пользователя
+        
+    Returns:
+        List[Post]: Список постов пользователя
+    """
+    return await run_db(db, post_service.get_user_posts, user_id)
+
+async def get_user_posts_page(
+    db: Session, user_id: int, limit: int, cursor: Optional[str] = None
+) -> Tuple[List[Post], Optional[str]]:
+    """
+    Получает страницу постов пользователя, от новых к старым.
+    
+    Args:
+        db (Session): Сессия базы данных
+        user_id (int): ID пользователя
+        limit (int): Максимальное количество постов на странице
+        cursor (Optional[str]): Курсор из предыдущей страницы
+        
+    Returns:
+        Tuple[List[Post], Optional[str]]: Посты страницы и курсор следующей страницы
+    """
+    return await run_db(db, post_service.get_user_posts_page, user_id, limit, cursor)
+
+async def search_posts(
+    db: Session, user_id: int, query: str, limit: int, cursor: Optional[str] = None
+) -> Tuple[List[Post], Optional[str]]:
+    """
+    Ищет посты пользователя по словам запроса, от более релевантных к менее.
+    
+    Args:
+        db (Session): Сессия базы данных
+        user_id (int): ID пользователя
+        query (str): Поисковый запрос
+        limit (int): Максимальное количество постов на странице
+        cursor (Optional[str]): Курсор из предыдущей страницы
+        
+    Returns:
+        Tuple[List[Post], Optional[str]]: Посты страницы и курсор следующей страницы
+    """
+    return await run_db(db, search_service.search_posts, user_id, query, limit, cursor)
+
+async def get_post_stats(db: Session, user_id: int) -> Dict[str, Any]:
+    """
+    Возвращает статистику постов пользователя.
+    
+    Args:
+        db (Session): Сессия базы данных
+        user_id (int): ID пользователя
+        
+    Returns:
+        Dict[str, Any]: post_count, total_bytes и last_post_at
+    """
+    return await run_db(db, stats_service.get_post_stats, user_id)
+
+async def _iterate(posts: Iterable[Post]) -> AsyncIterator[Post]:
+    for post in posts:
+        yield post
+
+async def stream_user_posts(
+    db: Session, user_id: int, cursor: Optional[str] = None
+) -> AsyncIterator[Post]:
+    """
+    Открывает потоковое чтение всех постов пользователя, от новых к старым.
+    
+    Запрос выполняется и курсор проверяется при вызове, а строки читаются
+    из курсора БД частями по мере итерации. Сессия должна оставаться открытой,
+    пока итерация не завершится.
+    
+    Args:
+        db (Session): Сессия базы данных
+        user_id (int): ID пользователя
+        cursor (Optional[str]): Курсор, с которого начинается выдача
+        
+    Returns:
+        AsyncIterator[Post]: Посты пользователя
+        
+    Raises:
+        HTTPException: Если курсор некорректен
+    """
+    if DATABASE_MODE == "async":
+        return await db.stream_scalars(post_service.user_posts_statement(user_id, cursor))
+    return _iterate(post_service.iter_user_posts(db, user_id, cursor))
+
+async def get_post_by_id(db: Session, post_id: int) -> Optional[Post]:
+    """
+    Получает пост по ID.
+    
+    Args:
+        db (Session): Сессия базы данных
+        post_id (int): ID поста
+        
+    Returns:
+        Optional[Post]: Найденный пост или None
+    """
+    return await run_db(db, post_service.get_post_by_id, post_id)
+
+async def get_owned_post(db: Session, post_id: int, user_id: int) -> Post:
+    """
+    Получает пост, проверяя, что он принадлежит пользователю.
+    
+    Args:
+        db (Session): Сессия базы данных
+        post_id (int): ID поста
+        user_id (int): ID пользователя-владельца
+        
+    Returns:
+        Post: Найденный пост
+        
+    Raises:
+        HTTPException: Если пост не найден или пользователь не является владельцем
+    """
+    return await run_db(db, post_service.get_owned_post, post_id, user_id)
+
+async def delete_post(db: Session, post_id: int, user_id: int) -> bool:
+    """
+    Удаляет пост.
+    
+    Args:
+        db (Session): Сессия базы данных
+        post_id (int): ID поста
+        user_id (int): ID пользователя-владельца
+        
+    Returns:
+        bool: True, если пост успешно удален
+        
+    Raises:
+        HTTPException: Если пост не найден или пользователь не является владельцем
+    """
+    if GROUP_COMMIT:
+        return await group_committer.submit(post_service.remove_post, post_id, user_id)
+    return await run_db(db, post_service.delete_post, post_id, user_id)
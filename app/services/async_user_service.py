@@ -0,0 +1,95 @@
+"""
+Модуль содержит асинхронный интерфейс бизнес-логики для работы с пользователями.
+
+Функции повторяют API модуля user_service, но вызываются через await и
+принимают как Session, так и AsyncSession (см. DATABASE_MODE).
+Хеширование и проверка паролей выполняются в пуле воркеров password_service.
+"""
+from sqlalchemy.orm import Session
+from app.database.config import run_db
+from app.models.user import User
+from app.schemas.user import UserCreate, UserLogin
+from app.services import user_service
+from app.services.password_service import hash_password, check_password
+from typing import Optional
+
+async def get_user_by_email(db: Session, email: str) -> Optional[User]:
+    """
+    Получает пользователя по email.
+    
+    Args:
+        db (Session): Сессия базы данных
+        email (str): Email пользователя
+        
+    Returns:
+        Optional[User]: Найденный пользователь или None
+    """
+    return await run_db(db, user_service.get_user_by_email, email)
+
+async def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
+    """
+    Получает пользователя по ID.
+    
+    Args:
+        db (Session): Сессия базы данных
+        user_id (int): ID пользователя
+        
+    Returns:
+        Optional[User]: Найденный пользователь или None
+    """
+    return await run_db(db, user_service.get_user_by_id, user_id)
+
+async def create_user(db: Session, user: UserCreate) -> User:
+    """
+    Создает нового пользователя.
+    
+    Args:
+        db (Session): Сессия базы данных
+        user (UserCreate): Данные пользователя
+        
+    Returns:
+        User: Созданный пользователь
+    """
+    hashed_password = await hash_password(user.password)
+    return await run_db(db, user_service.save_user, user.email, hashed_password)
+
+async def authenticate_user(db: Session, user_data: UserLogin) -> Optional[int]:
+    """
+    Аутентифицирует пользователя.
+    
+    Args:
+        db (Session): Сессия базы данных
+        user_data (UserLogin): Данные для входа
+        
+    Returns:
+        Optional[int]: ID пользователя, если аутентификация успешна, иначе None
+    """
+    # Поиск пользователя в БД
+    user = await get_user_by_email(db, user_data.email)
+    
+    # Проверка наличия пользователя и пароля
+    if not user or not await check_password(user_data.password, user.password):
+        return None
+    
+    # Возвращаем ID пользователя
+    return user.id
+
+async def delete_user(db: Session, user_id: int) -> bool:
+    """
+    Удаляет пользователя вместе с его постами.
+    
+    Подтвержденный пользователь удаляется из кэша, чтобы выданные ему
+    токены перестали проходить проверку.
+    
+    Args:
+        db (Session): Сессия базы данных
+        user_id (int): ID пользователя
+        
+    Returns:
+        bool: True, если пользователь был удален, иначе False
+    """
+    from app.middlewares.identity import invalidate_principal
+
+    deleted = await run_db(db, user_service.delete_user, user_id)
+    invalidate_principal(user_id)
+    return deleted
\ No newline at end of file
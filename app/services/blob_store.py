@@ -0,0 +1,153 @@
+"""
+Модуль содержит контентно-адресуемое хранилище больших текстов постов.
+
+Тексты размером от BLOB_THRESHOLD байт хранятся не в таблице posts, а в файлах
+на локальном диске. Имя файла - SHA-256 содержимого, поэтому одинаковые тексты
+хранятся один раз. Файлы раскладываются по подкаталогам по первым двум
+символам хеша. Полный текст отдается клиенту прямо из файла (см. маршрут
+GET /api/posts/{id}/body), без загрузки в строку Python.
+
+Хранилище отключено по умолчанию: при его включении список постов возвращает
+для больших текстов только превью (truncated: true), а полный текст доступен
+по отдельному запросу, то есть меняется формат ответа API.
+
+Настройки задаются переменными окружения:
+    BLOB_STORE_DIR      - каталог хранилища (по умолчанию ./data/blobs)
+    BLOB_THRESHOLD      - минимальный размер текста в байтах для вынесения в хранилище
+                          (по умолчанию 0 - хранилище отключено)
+    BLOB_PREVIEW_CHARS  - длина превью, сохраняемого в строке поста (по умолчанию 512)
+"""
+import hashlib
+import os
+import tempfile
+from typing import Optional, Set
+
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", "./data/blobs")
+BLOB_THRESHOLD = int(os.getenv("BLOB_THRESHOLD", "0"))
+BLOB_PREVIEW_CHARS = int(os.getenv("BLOB_PREVIEW_CHARS", "512"))
+
+def should_store(size: int) -> bool:
+    """
+    Проверяет, нужно ли выносить текст указанного размера в хранилище.
+
+    Args:
+        size (int): Размер текста в байтах (UTF-8)
+
+    Returns:
+        bool: True, если текст хранится в хранилище, а не в строке поста
+    """
+    return BLOB_THRESHOLD > 0 and size >= BLOB_THRESHOLD
+
+def blob_path(digest: str) -> str:
+    """
+    Возвращает путь к файлу содержимого.
+
+    Args:
+        digest (str): SHA-256 содержимого в шестнадцатеричном виде
+
+    Returns:
+        str: Путь к файлу
+    """
+    return os.path.join(BLOB_STORE_DIR, digest[:2], digest)
+
+def put_blob(data: bytes) -> str:
+    """
+    Сохраняет содержимое в хранилище, если его там еще нет.
+
+    Запись атомарна: данные пишутся во временный файл, который затем
+    переименовывается, поэтому читатели никогда не видят частично записанный файл.
+    У уже существующего файла обновляется время изменения: пост, который
+    на него сошлется, еще не зафиксирован, и сборка мусора (см. list_blobs)
+    не должна удалить файл.
+
+    Args:
+        data (bytes): Содержимое
+
+    Returns:
+        str: SHA-256 содержимого
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    path = blob_path(digest)
+    try:
+        os.utime(path)
+        return digest
+    except FileNotFoundError:
+        pass
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(data)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return digest
+
+def read_blob(digest: str) -> bytes:
+    """
+    Читает содержимое целиком.
+
+    Args:
+        digest (str): SHA-256 содержимого
+
+    Returns:
+        bytes: Содержимое
+    """
+    with open(blob_path(digest), "rb") as file:
+        return file.read()
+
+def list_blobs(modified_before: Optional[float] = None) -> Set[str]:
+    """
+    Возвращает хеши сохраненных файлов.
+
+    Args:
+        modified_before (Optional[float]): Только файлы, измененные раньше этого
+            момента (time.time()); None - все файлы
+
+    Returns:
+        Set[str]: Хеши содержимого
+    """
+    digests = set()
+    if not os.path.isdir(BLOB_STORE_DIR):
+        return digests
+    for prefix in os.listdir(BLOB_STORE_DIR):
+        directory = os.path.join(BLOB_STORE_DIR, prefix)
+        if not os.path.isdir(directory):
+            continue
+        for entry in os.scandir(directory):
+            if entry.name.startswith("."):
+                continue
+            try:
+                if modified_before is not None and entry.stat().st_mtime >= modified_before:
+                    continue
+            except FileNotFoundError:
+                continue
+            digests.add(entry.name)
+    return digests
+
+def delete_blob(digest: str, modified_before: Optional[float] = None) -> bool:
+    """
+    Удаляет файл содержимого, если он существует.
+
+    Args:
+        digest (str): SHA-256 содержимого
+        modified_before (Optional[float]): Удалять, только если файл изменен
+            раньше этого момента (time.time()); None - без проверки
+
+    Returns:
+        bool: True, если файл удален
+    """
+    path = blob_path(digest)
+    try:
+        if modified_before is not None and os.stat(path).st_mtime >= modified_before:
+            return False
+        os.unlink(path)
+    except FileNotFoundError:
+        return False
+    return True
@@ -0,0 +1,149 @@
+"""
+Модуль содержит асинхронный интерфейс хеширования и проверки паролей.
+
+bcrypt намеренно медленный, поэтому вычисления выполняются не в цикле событий,
+а в ограниченном пуле воркеров. Пул настраивается переменными окружения:
+    PASSWORD_POOL_KIND       - тип пула: thread (по умолчанию) или process
+    PASSWORD_POOL_WORKERS    - количество воркеров (по умолчанию число CPU)
+    PASSWORD_POOL_MAX_QUEUE  - сколько задач может ждать свободного воркера
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from fastapi import HTTPException, status
+from app.metrics import phase
+from app.services import user_service
+
+PASSWORD_POOL_KIND = os.getenv("PASSWORD_POOL_KIND", "thread")
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_POOL_MAX_QUEUE = int(os.getenv("PASSWORD_POOL_MAX_QUEUE", "64"))
+
+# Метрики пула: время ожидания в очереди и время самого хеширования (в секундах)
+pool_metrics: Dict[str, Any] = {
+    "queue_wait": {"count": 0, "total": 0.0, "max": 0.0},
+    "hash_time": {"count": 0, "total": 0.0, "max": 0.0},
+    "rejected": 0,
+}
+
+_executor: Optional[Executor] = None
+
+# Количество задач, отправленных в пул и еще не завершенных
+_in_flight = 0
+
+def _observe(name: str, value: float) -> None:
+    """
+    Добавляет измерение в метрику пула.
+
+    Args:
+        name (str): Название метрики
+        value (float): Значение в секундах
+    """
+    metric = pool_metrics[name]
+    metric["count"] += 1
+    metric["total"] += value
+    metric["max"] = max(metric["max"], value)
+
+def _timed(func: Callable, *args) -> Tuple[Any, float]:
+    """
+    Выполняет функцию в воркере и измеряет время ее выполнения.
+
+    Args:
+        func (Callable): Функция для выполнения
+        *args: Аргументы функции
+
+    Returns:
+        Tuple[Any, float]: Результат функции и время выполнения в секундах
+    """
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+def get_executor() -> Executor:
+    """
+    Возвращает пул воркеров, создавая его при первом обращении.
+
+    Returns:
+        Executor: Пул потоков или процессов
+    """
+    global _executor
+    if _executor is None:
+        if PASSWORD_POOL_KIND == "process":
+            _executor = ProcessPoolExecutor(max_workers=PASSWORD_POOL_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(
+                max_workers=PASSWORD_POOL_WORKERS, thread_name_prefix="password"
+            )
+    return _executor
+
+def shutdown_executor() -> None:
+    """
+    Останавливает пул воркеров, если он был создан.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+async def _run_in_pool(func: Callable, *args) -> Any:
+    """
+    Выполняет функцию в пуле воркеров с ограничением длины очереди.
+
+    Args:
+        func (Callable): Функция для выполнения
+        *args: Аргументы функции
+
+    Returns:
+        Any: Результат функции
+
+    Raises:
+        HTTPException: Если очередь пула заполнена
+    """
+    global _in_flight
+    if _in_flight >= PASSWORD_POOL_WORKERS + PASSWORD_POOL_MAX_QUEUE:
+        pool_metrics["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Сервер перегружен, повторите попытку позже",
+            headers={"Retry-After": "1"},
+        )
+
+    _in_flight += 1
+    started = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        with phase("password"):
+            result, hash_time = await loop.run_in_executor(get_executor(), _timed, func, *args)
+    finally:
+        _in_flight -= 1
+
+    # Время ожидания - все, что не было потрачено на само хеширование
+    _observe("hash_time", hash_time)
+    _observe("queue_wait", max(0.0, time.perf_counter() - started - hash_time))
+    return result
+
+async def hash_password(password: str) -> str:
+    """
+    Создает хеш пароля в пуле воркеров.
+
+    Args:
+        password (str): Пароль в открытом виде
+
+    Returns:
+        str: Хешированный пароль
+    """
+    return await _run_in_pool(user_service.get_password_hash, password)
+
+async def check_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Проверяет соответствие пароля его хешу в пуле воркеров.
+
+    Args:
+        plain_password (str): Пароль в открытом виде
+        hashed_password (str): Хешированный пароль
+
+    Returns:
+        bool: True, если пароль соответствует хешу, иначе False
+    """
+    return await _run_in_pool(user_service.verify_password, plain_password, hashed_password)
@@ -1,35 +1,186 @@
 """
 Модуль содержит бизнес-логику для работы с постами.
 """
+from sqlalchemy import Select, String, delete, insert, select, tuple_, type_coerce
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
 from app.models.post import Post
 from app.models.user import User
 from app.schemas.post import PostCreate, PostResponse
-from typing import List, Optional
+from app.services import blob_store
+from app.services.search_service import index_post, index_posts, unindex_posts
+from app.services.stats_service import apply_post_delta, post_size_column
+from app.models.codecs import encode_text, should_encode
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from fastapi import HTTPException, status
+import base64
+import binascii
+import json
+import os
 
-def create_post(db: Session, post: PostCreate, user_id: int) -> Post:
+# Количество строк, которое потоковая выдача постов читает из курсора БД за раз
+POSTS_STREAM_BATCH_SIZE = int(os.getenv("POSTS_STREAM_BATCH_SIZE", "200"))
+
+def is_costly_to_store(post: PostCreate) -> bool:
+    """
+    Проверяет, требует ли сохранение поста записи в хранилище больших текстов или сжатия.
+    
+    Такие значения формируются вне цикла событий (см. async_post_service.build_values).
+    
+    Args:
+        post (PostCreate): Данные поста
+        
+    Returns:
+        bool: True, если build_post_values пишет файл с fsync или сжимает текст
+    """
+    size = len(post.text_bytes)
+    return blob_store.should_store(size) or should_encode(size)
+
+def build_post_values(post: PostCreate, user_id: int) -> Dict[str, Any]:
+    """
+    Формирует значения столбцов для нового поста.
+    
+    Большие тексты сохраняются в хранилище больших текстов (см. blob_store):
+    в строке поста остаются только хеш, размер и превью. Остальные тексты
+    при включенном сжатии (см. models.codecs) сохраняются сжатыми.
+    
+    Args:
+        post (PostCreate): Данные поста
+        user_id (int): ID пользователя-автора
+        
+    Returns:
+        Dict[str, Any]: Значения столбцов таблицы posts
+    """
+    data = post.text_bytes
+    values = {"user_id": user_id, "body_size": len(data)}
+    
+    if blob_store.should_store(len(data)):
+        values["text"] = ""
+        values["body_hash"] = blob_store.put_blob(data)
+        values["preview"] = post.text[:blob_store.BLOB_PREVIEW_CHARS]
+    elif (encoded := encode_text(data)) is not None:
+        values["text"] = ""
+        values["text_codec"], values["text_compressed"] = encoded
+    else:
+        values["text"] = post.text
+    
+    return values
+
+def create_post(
+    db: Session, post: PostCreate, user_id: int, values: Optional[Dict[str, Any]] = None
+) -> Post:
     """
-    Создает новый пост.
+    Создает новый пост, добавляет его в полнотекстовый индекс и статистику.
     
     Args:
         db (Session): Сессия базы данных
         post (PostCreate): Данные поста
         user_id (int): ID пользователя-автора
+        values (Optional[Dict[str, Any]]): Готовые значения столбцов (см. build_post_values);
+            если не переданы, формируются в этом вызове
         
     Returns:
         Post: Созданный пост
     """
     # Создание поста
-    db_post = Post(text=post.text, user_id=user_id)
+    db_post = Post(**(values or build_post_values(post, user_id)))
     
-    # Сохранение поста в БД
+    # Сохранение поста в БД: id нужен для индекса, поэтому сначала flush
     db.add(db_post)
+    db.flush()
+    index_post(db, db_post.id, user_id, post.text)
+    apply_post_delta(db, user_id, 1, db_post.body_size)
     db.commit()
     db.refresh(db_post)
     
     return db_post
 
+def insert_post(
+    db: Session, post: PostCreate, user_id: int, values: Optional[Dict[str, Any]] = None
+) -> Post:
+    """
+    Добавляет пост в текущую транзакцию без фиксации.
+    
+    Используется групповой фиксацией (см. database.group_commit): несколько
+    вставок из разных запросов фиксируются одной транзакцией.
+    
+    Args:
+        db (Session): Сессия базы данных
+        post (PostCreate): Данные поста
+        user_id (int): ID пользователя-автора
+        values (Optional[Dict[str, Any]]): Готовые значения столбцов (см. build_post_values);
+            если не переданы, формируются в этом вызове
+        
+    Returns:
+        Post: Созданный пост с заполненными id и created_at
+    """
+    db_post = Post(**(values or build_post_values(post, user_id)))
+    db.add(db_post)
+    db.flush()
+    index_post(db, db_post.id, user_id, post.text)
+    apply_post_delta(db, user_id, 1, db_post.body_size)
+    db.refresh(db_post)
+    
+    return db_post
+
+def create_posts(
+    db: Session, posts: List[PostCreate], user_id: int, values: Optional[List[Dict[str, Any]]] = None
+) -> List[Row]:
+    """
+    Создает несколько постов одним запросом INSERT и добавляет их в полнотекстовый индекс и статистику.
+    
+    Args:
+        db (Session): Сессия базы данных
+        posts (List[PostCreate]): Данные постов
+        user_id (int): ID пользователя-автора
+        values (Optional[List[Dict[str, Any]]]): Готовые значения столбцов постов
+            (см. build_post_values); если не переданы, формируются в этом вызове
+        
+    Returns:
+        List[Row]: Строки (id, created_at) созданных постов в порядке входных данных
+    """
+    if values is None:
+        values = [build_post_values(post, user_id) for post in posts]
+    rows = db.execute(
+        insert(Post).returning(Post.id, Post.created_at, sort_by_parameter_order=True),
+        values
+    ).all()
+    index_posts(db, [(row.id, user_id, post.text) for row, post in zip(rows, posts)])
+    apply_post_delta(db, user_id, len(rows), sum(item["body_size"] for item in values))
+    db.commit()
+    
+    return rows
+
+def delete_posts(db: Session, post_ids: List[int], user_id: int) -> List[int]:
+    """
+    Удаляет несколько постов пользователя одним запросом DELETE.
+    
+    Посты, которых нет или которые принадлежат другому пользователю, пропускаются:
+    запрос DELETE ... WHERE id IN (...) AND user_id = ? RETURNING выполняется
+    первым, и из полнотекстового индекса удаляются, а в статистике учитываются
+    только возвращенные им строки. Посты перед удалением не читаются.
+    
+    Args:
+        db (Session): Сессия базы данных
+        post_ids (List[int]): ID постов
+        user_id (int): ID пользователя-владельца
+        
+    Returns:
+        List[int]: ID удаленных постов
+    """
+    deleted = dict(db.execute(
+        delete(Post)
+        .where(Post.id.in_(post_ids), Post.user_id == user_id)
+        .returning(Post.id, post_size_column())
+        .execution_options(synchronize_session=False)
+    ).tuples().all())
+    if deleted:
+        unindex_posts(db, deleted)
+        apply_post_delta(db, user_id, -len(deleted), -sum(deleted.values()))
+    db.commit()
+    
+    return list(deleted)
+
 def get_user_posts(db: Session, user_id: int) -> List[Post]:
     """
     Получает все посты пользователя.
@@ -43,6 +194,133 @@ def get_user_posts(db: Session, user_id: int) -> List[Post]:
     """
     return db.query(Post).filter(Post.user_id == user_id).all()
 
+def encode_cursor(created_at: str, post_id: int) -> str:
+    """
+    Кодирует позицию в списке постов в непрозрачный курсор.
+    
+    Args:
+        created_at (str): Значение created_at в том виде, в котором оно хранится в БД
+        post_id (int): ID поста
+        
+    Returns:
+        str: Курсор для передачи клиенту
+    """
+    raw = json.dumps([created_at, post_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    Декодирует курсор, полученный от клиента.
+    
+    Args:
+        cursor (str): Курсор
+        
+    Returns:
+        Tuple[str, int]: Значение created_at и ID поста
+        
+    Raises:
+        HTTPException: Если курсор некорректен
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, post_id = json.loads(raw)
+        if not isinstance(created_at, str) or not isinstance(post_id, int):
+            raise ValueError(cursor)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректный курсор"
+        )
+    return created_at, post_id
+
+def get_user_posts_page(
+    db: Session, user_id: int, limit: int, cursor: Optional[str] = None
+) -> Tuple[List[Post], Optional[str]]:
+    """
+    Получает страницу постов пользователя, от новых к старым.
+    
+    Используется keyset-пагинация по (created_at, id): страница выбирается
+    диапазонным сканированием индекса (user_id, created_at, id), поэтому
+    стоимость запроса не зависит от номера страницы.
+    
+    Args:
+        db (Session): Сессия базы данных
+        user_id (int): ID пользователя
+        limit (int): Максимальное количество постов на странице
+        cursor (Optional[str]): Курсор из предыдущей страницы
+        
+    Returns:
+        Tuple[List[Post], Optional[str]]: Посты страницы и курсор следующей страницы
+        (None, если страница последняя)
+    """
+    # created_at сравнивается как хранимая строка: формат, в котором SQLite
+    # записывает CURRENT_TIMESTAMP, отличается от формата параметров DateTime
+    created_at_raw = type_coerce(Post.created_at, String)
+    
+    query = db.query(Post, created_at_raw).filter(Post.user_id == user_id)
+    if cursor is not None:
+        query = query.filter(tuple_(created_at_raw, Post.id) < tuple_(*decode_cursor(cursor)))
+    
+    # Запрашиваем на одну запись больше, чтобы узнать, есть ли следующая страница
+    rows = query.order_by(Post.created_at.desc(), Post.id.desc()).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_post, last_created_at = rows[-1]
+        next_cursor = encode_cursor(last_created_at, last_post.id)
+    
+    return [post for post, _ in rows], next_cursor
+
+def user_posts_statement(user_id: int, cursor: Optional[str] = None) -> Select:
+    """
+    Формирует запрос всех постов пользователя, от новых к старым, для потоковой выдачи.
+    
+    Курсор проверяется сразу, поэтому некорректный курсор приводит к ошибке
+    до начала отправки ответа. Запрос читает строки частями по
+    POSTS_STREAM_BATCH_SIZE (yield_per), не загружая весь результат в память.
+    
+    Args:
+        user_id (int): ID пользователя
+        cursor (Optional[str]): Курсор, с которого начинается выдача
+        
+    Returns:
+        Select: Запрос, возвращающий объекты Post
+        
+    Raises:
+        HTTPException: Если курсор некорректен
+    """
+    statement = select(Post).where(Post.user_id == user_id)
+    if cursor is not None:
+        created_at_raw = type_coerce(Post.created_at, String)
+        statement = statement.where(tuple_(created_at_raw, Post.id) < tuple_(*decode_cursor(cursor)))
+    
+    return (
+        statement
+        .order_by(Post.created_at.desc(), Post.id.desc())
+        .execution_options(yield_per=POSTS_STREAM_BATCH_SIZE)
+    )
+
+def iter_user_posts(db: Session, user_id: int, cursor: Optional[str] = None) -> Iterator[Post]:
+    """
+    Последовательно возвращает все посты пользователя, от новых к старым.
+    
+    Строки читаются из курсора БД частями (см. user_posts_statement), поэтому
+    память не зависит от количества постов пользователя.
+    
+    Args:
+        db (Session): Сессия базы данных
+        user_id (int): ID пользователя
+        cursor (Optional[str]): Курсор, с которого начинается выдача
+        
+    Returns:
+        Iterator[Post]: Посты пользователя
+        
+    Raises:
+        HTTPException: Если курсор некорректен
+    """
+    return iter(db.scalars(user_posts_statement(user_id, cursor)))
+
 def get_post_by_id(db: Session, post_id: int) -> Optional[Post]:
     """
     Получает пост по ID.
@@ -56,9 +334,9 @@ def get_post_by_id(db: Session, post_id: int) -> Optional[Post]:
     """
     return db.query(Post).filter(Post.id == post_id).first()
 
-def delete_post(db: Session, post_id: int, user_id: int) -> bool:
+def get_owned_post(db: Session, post_id: int, user_id: int) -> Post:
     """
-    Удаляет пост.
+    Получает пост, проверяя, что он принадлежит пользователю.
     
     Args:
         db (Session): Сессия базы данных
@@ -66,7 +344,7 @@ def delete_post(db: Session, post_id: int, user_id: int) -> bool:
         user_id (int): ID пользователя-владельца
         
     Returns:
-        bool: True, если пост успешно удален, иначе False
+        Post: Найденный пост
         
     Raises:
         HTTPException: Если пост не найден или пользователь не является владельцем
@@ -85,11 +363,76 @@ def delete_post(db: Session, post_id: int, user_id: int) -> bool:
     if post.user_id != user_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Нет прав для удаления этого поста"
+            detail="Нет прав для доступа к этому посту"
         )
     
-    # Удаление поста
-    db.delete(post)
+    return post
+
+def delete_post(db: Session, post_id: int, user_id: int) -> bool:
+    """
+    Удаляет пост.
+    
+    Args:
+        db (Session): Сессия базы данных
+        post_id (int): ID поста
+        user_id (int): ID пользователя-владельца
+        
+    Returns:
+        bool: True, если пост успешно удален, иначе False
+        
+    Raises:
+        HTTPException: Если пост не найден или пользователь не является владельцем
+    """
+    remove_post(db, post_id, user_id)
     db.commit()
     
+    return True
+
+def remove_post(db: Session, post_id: int, user_id: int) -> bool:
+    """
+    Удаляет пост в текущей транзакции без фиксации.
+    
+    Пост удаляется одним запросом DELETE с условием на владельца. Если запрос
+    не удалил строку, данные не изменены, и причина отказа (поста нет или он
+    принадлежит другому пользователю) определяется отдельным чтением.
+    
+    Args:
+        db (Session): Сессия базы данных
+        post_id (int): ID поста
+        user_id (int): ID пользователя-владельца
+        
+    Returns:
+        bool: True, если пост удален
+        
+    Raises:
+        HTTPException: Если пост не найден или пользователь не является владельцем
+    """
+    size = db.execute(
+        delete(Post)
+        .where(Post.id == post_id, Post.user_id == user_id)
+        .returning(post_size_column())
+    ).scalar_one_or_none()
+    
+    if size is None:
+        # Чтение выполняется в транзакции DELETE, на соединении записи
+        owner_id = db.scalar(select(Post.user_id).where(Post.id == post_id))
+        
+        # Проверка наличия поста
+        if owner_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Пост с ID {post_id} не найден"
+            )
+        
+        # Проверка владельца поста
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Нет прав для удаления этого поста"
+        )
+    
+    # Удаление записи поста из полнотекстового индекса; статистика изменяется
+    # после удаления, чтобы время последнего поста было вычислено без него
+    unindex_posts(db, [post_id])
+    apply_post_delta(db, user_id, -1, -size)
+    
     return True 
\ No newline at end of file
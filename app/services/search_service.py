@@ -0,0 +1,260 @@
+"""
+Модуль содержит полнотекстовый поиск по постам (SQLite FTS5).
+
+Индекс - таблица FTS5 posts_fts (см. models.post), rowid строки которой
+равен id поста. Таблица хранит копию проиндексированного текста: запись
+удаляется по rowid (DELETE ... WHERE rowid IN (...)) без исходного текста,
+поэтому удаление поста не читает ни строку поста, ни хранилище больших
+текстов, а ошибочное удаление не может повредить индекс. Индекс работает
+одинаково для обычных, сжатых и вынесенных в хранилище текстов постов.
+
+Поиск ограничен постами пользователя условием по столбцу owner (токен
+u<user_id>): FTS5 пересекает списки документов термов запроса и владельца,
+поэтому стоимость запроса зависит от количества совпадений, а не от общего
+объема постов. Результаты упорядочены по релевантности (bm25).
+
+Индекс обновляется в тех же транзакциях, что и посты: index_post при создании,
+unindex_posts по ID строк, которые вернул DELETE постов, при удалении.
+Индекс для существующих постов строится миграцией схемы (см. database.migrations)
+и заново - командой app.database.rebuild_search (см. create_search_index).
+"""
+from sqlalchemy import delete, func, insert, literal_column, select
+from sqlalchemy.orm import Session
+from app.models.post import SEARCH_TOKENIZER, Post, posts_fts
+from app.services import blob_store
+from fastapi import HTTPException, status
+from typing import Iterable, List, Optional, Tuple
+import base64
+import binascii
+import json
+
+# Максимальное количество слов в поисковом запросе
+SEARCH_MAX_TERMS = 16
+
+def owner_token(user_id: int) -> str:
+    """
+    Возвращает токен владельца для столбца owner индекса.
+
+    Args:
+        user_id (int): ID пользователя
+
+    Returns:
+        str: Токен вида u<user_id>
+    """
+    return f"u{user_id}"
+
+def post_text(post: Post) -> str:
+    """
+    Возвращает полный текст поста независимо от способа его хранения.
+
+    Args:
+        post (Post): Пост
+
+    Returns:
+        str: Текст поста
+    """
+    if post.is_external:
+        return blob_store.read_blob(post.body_hash).decode("utf-8")
+    return post.inline_text
+
+def index_posts(db: Session, posts: Iterable[Tuple[int, int, str]]) -> None:
+    """
+    Добавляет посты в полнотекстовый индекс в текущей транзакции.
+
+    Args:
+        db (Session): Сессия базы данных
+        posts (Iterable[Tuple[int, int, str]]): ID поста, ID владельца и текст
+    """
+    rows = [
+        {"rowid": post_id, "owner": owner_token(user_id), "text": text}
+        for post_id, user_id, text in posts
+    ]
+    if rows:
+        db.execute(insert(posts_fts), rows)
+
+def index_post(db: Session, post_id: int, user_id: int, text: str) -> None:
+    """
+    Добавляет пост в полнотекстовый индекс в текущей транзакции.
+
+    Args:
+        db (Session): Сессия базы данных
+        post_id (int): ID поста
+        user_id (int): ID владельца
+        text (str): Текст поста
+    """
+    index_posts(db, [(post_id, user_id, text)])
+
+def index_all_posts(db: Session, batch_size: int) -> int:
+    """
+    Добавляет все посты в полнотекстовый индекс в текущей транзакции.
+
+    Args:
+        db (Session): Сессия базы данных
+        batch_size (int): Количество постов, загружаемых за раз
+
+    Returns:
+        int: Количество проиндексированных постов
+    """
+    indexed = 0
+    posts = db.scalars(select(Post).order_by(Post.id).execution_options(yield_per=batch_size))
+    for batch in posts.partitions():
+        index_posts(db, [(post.id, post.user_id, post_text(post)) for post in batch])
+        indexed += len(batch)
+    return indexed
+
+def create_search_index(db: Session, batch_size: int) -> int:
+    """
+    Создает полнотекстовый индекс заново и добавляет в него все посты
+    в текущей транзакции.
+
+    Прежняя таблица удаляется, а не очищается, поэтому новая создается
+    с текущим токенизатором SEARCH_TOKENIZER.
+
+    Args:
+        db (Session): Сессия базы данных
+        batch_size (int): Количество постов, загружаемых за раз
+
+    Returns:
+        int: Количество проиндексированных постов
+    """
+    conn = db.connection()
+    conn.exec_driver_sql("DROP TABLE IF EXISTS posts_fts")
+    conn.exec_driver_sql(f"CREATE VIRTUAL TABLE posts_fts USING fts5(owner, text, tokenize='{SEARCH_TOKENIZER}')")
+    return index_all_posts(db, batch_size)
+
+def unindex_posts(db: Session, post_ids: Iterable[int]) -> None:
+    """
+    Удаляет посты из полнотекстового индекса в текущей транзакции.
+
+    Args:
+        db (Session): Сессия базы данных
+        post_ids (Iterable[int]): ID удаленных постов
+    """
+    post_ids = list(post_ids)
+    if post_ids:
+        db.execute(delete(posts_fts).where(posts_fts.c.rowid.in_(post_ids)))
+
+def unindex_user_posts(db: Session, user_id: int) -> None:
+    """
+    Удаляет из полнотекстового индекса все посты пользователя в текущей транзакции.
+
+    Args:
+        db (Session): Сессия базы данных
+        user_id (int): ID пользователя
+    """
+    owner = f'owner : "{owner_token(user_id)}"'
+    db.execute(delete(posts_fts).where(literal_column("posts_fts").op("MATCH")(owner)))
+
+def match_expression(query: str, user_id: int) -> str:
+    """
+    Формирует выражение MATCH для поискового запроса пользователя.
+
+    Каждое слово запроса ищется как фраза (кавычки экранируются), поэтому
+    синтаксис FTS5 в запросе не интерпретируется; слово с * на конце
+    ищется как префикс. Все слова должны встречаться в тексте поста.
+
+    Args:
+        query (str): Поисковый запрос
+        user_id (int): ID пользователя, среди постов которого идет поиск
+
+    Returns:
+        str: Выражение для оператора MATCH
+
+    Raises:
+        HTTPException: Если в запросе нет слов или их слишком много
+    """
+    terms = []
+    for word in query.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*")
+        if word:
+            terms.append('"' + word.replace('"', '""') + '"' + ("*" if prefix else ""))
+
+    if not terms or len(terms) > SEARCH_MAX_TERMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Запрос должен содержать от 1 до {SEARCH_MAX_TERMS} слов"
+        )
+    return f'owner : "{owner_token(user_id)}" AND text : ({" AND ".join(terms)})'
+
+def encode_search_cursor(offset: int) -> str:
+    """
+    Кодирует позицию в результатах поиска в непрозрачный курсор.
+
+    Args:
+        offset (int): Количество уже выданных результатов
+
+    Returns:
+        str: Курсор для передачи клиенту
+    """
+    raw = json.dumps([offset]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_search_cursor(cursor: str) -> int:
+    """
+    Декодирует курсор результатов поиска.
+
+    Args:
+        cursor (str): Курсор
+
+    Returns:
+        int: Количество уже выданных результатов
+
+    Raises:
+        HTTPException: Если курсор некорректен
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        offset, = json.loads(raw)
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError(cursor)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректный курсор"
+        )
+    return offset
+
+def search_posts(
+    db: Session, user_id: int, query: str, limit: int, cursor: Optional[str] = None
+) -> Tuple[List[Post], Optional[str]]:
+    """
+    Ищет посты пользователя по словам запроса, от более релевантных к менее.
+
+    Args:
+        db (Session): Сессия базы данных
+        user_id (int): ID пользователя
+        query (str): Поисковый запрос
+        limit (int): Максимальное количество постов на странице
+        cursor (Optional[str]): Курсор из предыдущей страницы
+
+    Returns:
+        Tuple[List[Post], Optional[str]]: Посты страницы и курсор следующей страницы
+        (None, если страница последняя)
+
+    Raises:
+        HTTPException: Если запрос или курсор некорректны
+    """
+    match = match_expression(query, user_id)
+    offset = decode_search_cursor(cursor) if cursor is not None else 0
+
+    # Столбец owner в ранжировании не участвует (вес 0)
+    fts = literal_column("posts_fts")
+    post_ids = db.scalars(
+        select(posts_fts.c.rowid)
+        .where(fts.op("MATCH")(match))
+        .order_by(func.bm25(fts, 0.0, 1.0))
+        .limit(limit + 1)
+        .offset(offset)
+    ).all()
+
+    next_cursor = None
+    if len(post_ids) > limit:
+        post_ids = post_ids[:limit]
+        next_cursor = encode_search_cursor(offset + limit)
+
+    posts = {
+        post.id: post
+        for post in db.scalars(select(Post).where(Post.id.in_(post_ids), Post.user_id == user_id))
+    }
+    return [posts[post_id] for post_id in post_ids if post_id in posts], next_cursor
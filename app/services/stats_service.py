@@ -0,0 +1,140 @@
+"""
+Модуль содержит статистику постов пользователей: количество постов,
+суммарный размер текстов и время последнего поста.
+
+Статистика хранится в строке user_post_stats и изменяется приращениями
+(apply_post_delta) в той же транзакции, что создание и удаление постов,
+поэтому чтение статистики не зависит от количества постов. Время последнего
+поста берется из индекса (user_id, created_at, id) таблицы posts одним
+поиском, поэтому остается верным и после удаления последнего поста.
+
+Статистика существующих постов вычисляется миграцией схемы (см.
+database.migrations), расхождения находит и исправляет команда
+app.database.check_post_stats.
+"""
+from sqlalchemy import LargeBinary, cast, func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from app.models.post import Post
+from app.models.post_stats import UserPostStats
+from typing import Any, Dict, List, Union
+
+def post_size_column():
+    """
+    Возвращает SQL-выражение размера текста поста в байтах, учитываемого в статистике.
+
+    Используется и при пересчете статистики, и в RETURNING запросов удаления,
+    чтобы приращение статистики вычислялось по фактически удаленным строкам.
+
+    Returns:
+        ColumnElement: body_size или, для старых постов без него, размер текста в строке
+    """
+    return func.coalesce(Post.body_size, func.length(cast(Post.text, LargeBinary)))
+
+def _last_post_at(user_id: int):
+    return select(func.max(Post.created_at)).where(Post.user_id == user_id).scalar_subquery()
+
+def apply_post_delta(db: Session, user_id: int, count: int, size: int) -> None:
+    """
+    Изменяет статистику пользователя в текущей транзакции.
+
+    Вызывается после того, как посты добавлены или удалены в этой же
+    транзакции: время последнего поста пересчитывается по таблице posts.
+
+    Args:
+        db (Session): Сессия базы данных
+        user_id (int): ID пользователя
+        count (int): Изменение количества постов (отрицательное при удалении)
+        size (int): Изменение суммарного размера текстов в байтах
+    """
+    statement = insert(UserPostStats).values(
+        user_id=user_id, post_count=count, total_bytes=size, last_post_at=_last_post_at(user_id)
+    )
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[UserPostStats.user_id],
+        set_={
+            "post_count": UserPostStats.post_count + statement.excluded.post_count,
+            "total_bytes": UserPostStats.total_bytes + statement.excluded.total_bytes,
+            "last_post_at": statement.excluded.last_post_at,
+        },
+    ))
+
+def get_post_stats(db: Session, user_id: int) -> Dict[str, Any]:
+    """
+    Возвращает статистику постов пользователя.
+
+    Args:
+        db (Session): Сессия базы данных
+        user_id (int): ID пользователя
+
+    Returns:
+        Dict[str, Any]: post_count, total_bytes и last_post_at (нули и None, если постов не было)
+    """
+    stats = db.get(UserPostStats, user_id)
+    if stats is None:
+        return {"post_count": 0, "total_bytes": 0, "last_post_at": None}
+    return {
+        "post_count": stats.post_count,
+        "total_bytes": stats.total_bytes,
+        "last_post_at": stats.last_post_at,
+    }
+
+def _actual_stats():
+    # Статистика, вычисленная по таблице posts
+    return (
+        select(
+            Post.user_id,
+            func.count().label("post_count"),
+            func.sum(post_size_column()).label("total_bytes"),
+            func.max(Post.created_at).label("last_post_at"),
+        )
+        .group_by(Post.user_id)
+    )
+
+def find_stale_stats(db: Union[Session, Connection]) -> List[Dict[str, Any]]:
+    """
+    Сравнивает сохраненную статистику с вычисленной по таблице posts.
+
+    Args:
+        db (Union[Session, Connection]): Сессия или соединение с базой данных
+
+    Returns:
+        List[Dict[str, Any]]: Расхождения: user_id, сохраненные (stored) и вычисленные (actual) значения
+    """
+    actual = {row.user_id: row for row in db.execute(_actual_stats())}
+    stored = {row.user_id: row for row in db.execute(select(UserPostStats.__table__))}
+
+    stale = []
+    for user_id in actual.keys() | stored.keys():
+        expected = actual.get(user_id)
+        saved = stored.get(user_id)
+        expected_values = (
+            (expected.post_count, expected.total_bytes, expected.last_post_at) if expected else (0, 0, None)
+        )
+        saved_values = (saved.post_count, saved.total_bytes, saved.last_post_at) if saved else (0, 0, None)
+        if expected_values != saved_values:
+            stale.append({"user_id": user_id, "stored": saved_values, "actual": expected_values})
+    return sorted(stale, key=lambda item: item["user_id"])
+
+def repair_stats(db: Union[Session, Connection], stale: List[Dict[str, Any]]) -> None:
+    """
+    Записывает вычисленные значения статистики для найденных расхождений.
+
+    Args:
+        db (Union[Session, Connection]): Сессия или соединение с базой данных
+        stale (List[Dict[str, Any]]): Расхождения (см. find_stale_stats)
+    """
+    for item in stale:
+        post_count, total_bytes, last_post_at = item["actual"]
+        statement = insert(UserPostStats).values(
+            user_id=item["user_id"], post_count=post_count, total_bytes=total_bytes, last_post_at=last_post_at
+        )
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[UserPostStats.user_id],
+            set_={
+                "post_count": statement.excluded.post_count,
+                "total_bytes": statement.excluded.total_bytes,
+                "last_post_at": statement.excluded.last_post_at,
+            },
+        ))
@@ -2,13 +2,29 @@
 Модуль содержит бизнес-логику для работы с пользователями.
 """
 from sqlalchemy.orm import Session
+from app.models.post import Post
+from app.models.post_stats import UserPostStats
 from app.models.user import User
+from app.services.search_service import unindex_user_posts
 from app.schemas.user import UserCreate, UserLogin
-from passlib.context import CryptContext
 from typing import Optional
 
-# Создание контекста для хеширования паролей
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Контекст хеширования паролей создается при первом обращении (get_pwd_context):
+# импорт passlib и bcrypt не замедляет запуск приложения
+_pwd_context = None
+
+def get_pwd_context():
+    """
+    Возвращает контекст хеширования паролей, создавая его при первом обращении.
+    
+    Returns:
+        CryptContext: Контекст passlib со схемой bcrypt
+    """
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
 
 def get_password_hash(password: str) -> str:
     """
@@ -20,7 +36,7 @@ def get_password_hash(password: str) -> str:
     Returns:
         str: Хешированный пароль
     """
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -33,7 +49,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         bool: True, если пароль соответствует хешу, иначе False
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
     """
@@ -75,8 +91,22 @@ def create_user(db: Session, user: UserCreate) -> User:
     # Хеширование пароля
     hashed_password = get_password_hash(user.password)
     
+    return save_user(db, user.email, hashed_password)
+
+def save_user(db: Session, email: str, hashed_password: str) -> User:
+    """
+    Сохраняет нового пользователя с уже вычисленным хешем пароля.
+    
+    Args:
+        db (Session): Сессия базы данных
+        email (str): Email пользователя
+        hashed_password (str): Хешированный пароль
+        
+    Returns:
+        User: Созданный пользователь
+    """
     # Создание пользователя
-    db_user = User(email=user.email, password=hashed_password)
+    db_user = User(email=email, password=hashed_password)
     
     # Сохранение пользователя в БД
     db.add(db_user)
@@ -104,4 +134,24 @@ def authenticate_user(db: Session, user_data: UserLogin) -> Optional[int]:
         return None
     
     # Возвращаем ID пользователя
-    return user.id 
\ No newline at end of file
+    return user.id
+
+def delete_user(db: Session, user_id: int) -> bool:
+    """
+    Удаляет пользователя вместе с его постами, их записями в полнотекстовом
+    индексе и статистикой постов.
+    
+    Args:
+        db (Session): Сессия базы данных
+        user_id (int): ID пользователя
+        
+    Returns:
+        bool: True, если пользователь был удален, иначе False
+    """
+    unindex_user_posts(db, user_id)
+    db.query(Post).filter(Post.user_id == user_id).delete(synchronize_session=False)
+    db.query(UserPostStats).filter(UserPostStats.user_id == user_id).delete(synchronize_session=False)
+    deleted = db.query(User).filter(User.id == user_id).delete(synchronize_session=False)
+    db.commit()
+    
+    return deleted > 0
\ No newline at end of file
@@ -0,0 +1 @@
+# Файл инициализации пакета бенчмарков
@@ -0,0 +1,270 @@
+"""
+Нагрузочный бенчмарк API: пропускная способность и задержки основных сценариев.
+
+Сценарии выполняются по очереди, каждый - заданным числом запросов
+с заданной конкурентностью:
+    signup              - регистрация новых пользователей
+    login               - вход существующих пользователей
+    create_post[SIZE]   - создание постов размером SIZE байт (для каждого --post-size)
+    list_cold           - чтение списка постов с промахом кэша: каждый запрос
+                          запрашивает еще не закэшированную страницу (новую пару limit, cursor)
+    list_cached         - повторное чтение первой страницы, закэшированной заранее
+    delete_post         - удаление созданных постов
+
+Приложение app.main:app запускается в отдельном процессе с чистой БД двумя способами:
+    inprocess - запросы подаются через ASGI-транспорт httpx, без сети
+    uvicorn   - запросы идут по HTTP к локальному серверу uvicorn
+
+Результаты можно сохранить как базовые (--save) и сравнить с ними
+следующий прогон (--baseline): ухудшение RPS или p95 больше чем на
+--tolerance отмечается как регрессия, и процесс завершается с кодом 1.
+
+Запуск:
+    python -m benchmarks.api --concurrency 16 --requests 200 --post-size 1024 65536 --save baseline.json
+    python -m benchmarks.api --baseline baseline.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List
+
+from benchmarks.common import PASSWORD, print_table, run_isolated, summarize
+
+TARGETS = ("inprocess", "uvicorn")
+
+# Размер первой страницы списка и время ожидания запуска uvicorn
+PAGE_SIZE = 20
+SERVER_START_TIMEOUT = 30.0
+
+async def _measure(concurrency: int, total: int, send: Callable[[int], Awaitable]) -> dict:
+    """
+    Выполняет total запросов с заданной конкурентностью и собирает статистику.
+
+    Args:
+        concurrency (int): Количество одновременных запросов
+        total (int): Общее количество запросов
+        send (Callable[[int], Awaitable]): Функция, отправляющая запрос с указанным номером
+
+    Returns:
+        dict: Статистика (см. summarize)
+    """
+    counter = itertools.count()
+    latencies = []
+    errors = 0
+
+    async def run_one() -> None:
+        nonlocal errors
+        while (index := next(counter)) < total:
+            started = time.perf_counter()
+            response = await send(index)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run_one() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+async def _run_scenarios(client, args: argparse.Namespace) -> Dict[str, dict]:
+    results = {}
+    run_id = uuid.uuid4().hex[:8]
+
+    emails = [f"bench-{run_id}-{index}@example.com" for index in range(max(args.requests, args.users))]
+    tokens: Dict[int, str] = {}
+
+    async def signup(index: int):
+        response = await client.post("/api/signup", json={"email": emails[index], "password": PASSWORD})
+        if response.status_code < 400:
+            tokens[index] = response.json()["token"]
+        return response
+
+    results["signup"] = await _measure(args.concurrency, len(emails), signup)
+    users = [{"Authorization": f"Bearer {tokens[index]}"} for index in sorted(tokens)[:args.users]]
+    if not users:
+        raise RuntimeError("signup failed for every user")
+
+    async def login(index: int):
+        return await client.post(
+            "/api/login", json={"email": emails[index % args.users], "password": PASSWORD}
+        )
+
+    results["login"] = await _measure(args.concurrency, args.requests, login)
+
+    created: List[tuple] = []
+    for size in args.post_size:
+        text = "benchmark " * (size // 10) + "x" * (size % 10)
+
+        async def create(index: int, text=text):
+            headers = users[index % len(users)]
+            response = await client.post("/api/posts", json={"text": text}, headers=headers)
+            if response.status_code < 400:
+                created.append((headers, response.json()["id"]))
+            return response
+
+        results[f"create_post[{size}]"] = await _measure(args.concurrency, args.requests, create)
+
+    # Наполнение до --seed-posts постов на пользователя, чтобы список читался из реальной БД
+    seed_text = "benchmark " * (min(args.post_size) // 10)
+    for headers in users:
+        for start in range(0, args.seed_posts, 100):
+            count = min(100, args.seed_posts - start)
+            await client.post(
+                "/api/posts/batch", json={"posts": [{"text": seed_text}] * count}, headers=headers
+            )
+
+    # Каждый запрос list_cold читает новую страницу: пользователи обходят список
+    # страницами размера PAGE_SIZE, PAGE_SIZE + 1, ... до исчерпания запросов
+    walks = ((headers, limit) for limit in range(PAGE_SIZE, 101) for headers in users)
+    cursors: Dict[int, tuple] = {}
+
+    async def list_cold(index: int):
+        worker = id(asyncio.current_task())
+        state = cursors.get(worker)
+        if state is None:
+            state = cursors[worker] = (*next(walks), None)
+        headers, limit, cursor = state
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/api/posts", params=params, headers=headers)
+        next_cursor = response.json().get("next_cursor") if response.status_code < 400 else None
+        cursors[worker] = (headers, limit, next_cursor) if next_cursor else None
+        return response
+
+    results["list_cold"] = await _measure(args.concurrency, args.requests, list_cold)
+
+    for headers in users:
+        await client.get("/api/posts", params={"limit": PAGE_SIZE}, headers=headers)
+
+    async def list_cached(index: int):
+        return await client.get("/api/posts", params={"limit": PAGE_SIZE}, headers=users[index % len(users)])
+
+    results["list_cached"] = await _measure(args.concurrency, args.requests, list_cached)
+
+    async def delete(index: int):
+        headers, post_id = created[index]
+        return await client.delete(f"/api/posts/{post_id}", headers=headers)
+
+    results["delete_post"] = await _measure(args.concurrency, min(args.requests, len(created)), delete)
+    return results
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def _worker(args: argparse.Namespace) -> Dict[str, dict]:
+    import httpx
+
+    if args.target == "inprocess":
+        from app.main import app
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            return await _run_scenarios(client, args)
+
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        cwd=os.getcwd(),
+    )
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None, limits=limits) as client:
+            deadline = time.monotonic() + SERVER_START_TIMEOUT
+            while True:
+                try:
+                    await client.get("/")
+                    break
+                except httpx.TransportError:
+                    if time.monotonic() > deadline or server.poll() is not None:
+                        raise RuntimeError("uvicorn did not start")
+                    await asyncio.sleep(0.1)
+            return await _run_scenarios(client, args)
+    finally:
+        server.terminate()
+        server.wait()
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """
+    Сравнивает результаты с базовыми и печатает изменения RPS и p95.
+
+    Args:
+        results (Dict[str, dict]): Результаты текущего прогона
+        baseline (Dict[str, dict]): Базовые результаты
+        tolerance (float): Допустимое относительное ухудшение (0.2 - 20%)
+
+    Returns:
+        List[str]: Названия прогонов с регрессией
+    """
+    regressions = []
+    print(f"\n{'run':<32}{'rps':>10}{'base':>10}{'change':>9}{'p95 ms':>10}{'base':>10}{'change':>9}")
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        rps_change = stats["rps"] / base["rps"] - 1 if base["rps"] else 0.0
+        p95_change = stats["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+        regressed = rps_change < -tolerance or p95_change > tolerance or stats["errors"] > base["errors"]
+        if regressed:
+            regressions.append(name)
+        print(
+            f"{name:<32}{stats['rps']:>10.1f}{base['rps']:>10.1f}{rps_change:>+9.0%}"
+            f"{stats['p95_ms']:>10.2f}{base['p95_ms']:>10.2f}{p95_change:>+9.0%}"
+            f"{'  REGRESSION' if regressed else ''}"
+        )
+    return regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=(*TARGETS, "all"), default="all")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="запросов в каждом сценарии")
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--post-size", type=int, nargs="+", default=[1024])
+    parser.add_argument("--seed-posts", type=int, default=100, help="постов на пользователя перед чтением списка")
+    parser.add_argument("--save", metavar="FILE", help="сохранить результаты как базовые")
+    parser.add_argument("--baseline", metavar="FILE", help="сравнить с базовыми результатами")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(_worker(args))))
+        return
+
+    forwarded = [
+        "--worker",
+        "--concurrency", str(args.concurrency),
+        "--requests", str(args.requests),
+        "--users", str(args.users),
+        "--post-size", *map(str, args.post_size),
+        "--seed-posts", str(args.seed_posts),
+    ]
+    results = {}
+    for target in (TARGETS if args.target == "all" else (args.target,)):
+        stats = run_isolated("benchmarks.api", [*forwarded, "--target", target])
+        results.update({f"{target}/{scenario}": row for scenario, row in stats.items()})
+    print_table(results)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+    if regressions:
+        print(f"\nregressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Бенчмарк режимов работы с БД: синхронная Session против AsyncSession.
+
+Приложение запускается в процессе через ASGI-транспорт httpx, на него
+подается конкурентная смешанная нагрузка (чтение списка постов и создание
+постов несколькими пользователями), после чего сравниваются перцентили задержки.
+
+Запуск:
+    python -m benchmarks.async_db --concurrency 32 --requests 500
+"""
+import argparse
+import asyncio
+import json
+
+from benchmarks.common import (
+    add_mixed_load_arguments, mixed_load_arguments, print_table, run_isolated, run_mixed_load,
+)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_mixed_load_arguments(parser)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(run_mixed_load(args))))
+        return
+
+    forwarded = mixed_load_arguments(args)
+    results = {
+        f"DATABASE_MODE={mode}": run_isolated("benchmarks.async_db", forwarded, {"DATABASE_MODE": mode})
+        for mode in ("sync", "async")
+    }
+    print_table(results)
+
+if __name__ == "__main__":
+    main()
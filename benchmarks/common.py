@@ -0,0 +1,208 @@
+"""
+Общие вспомогательные функции для бенчмарков.
+
+Каждый бенчмарк запускает приложение в отдельном процессе с собственной
+рабочей директорией: база данных ./data/app.db создается заново миграциями
+(python -m app.database.migrations), а настройки (переменные окружения)
+применяются до импорта app.main.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+# Корень репозитория, добавляется в PYTHONPATH дочерних процессов
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PASSWORD = "BenchPassw0rd"
+
+def percentile(samples: List[float], q: float) -> float:
+    """
+    Вычисляет перцентиль по методу ближайшего ранга.
+    
+    Args:
+        samples (List[float]): Измерения
+        q (float): Перцентиль от 0 до 100
+        
+    Returns:
+        float: Значение перцентиля (0.0 для пустой выборки)
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> Dict[str, float]:
+    """
+    Сводит измерения задержек в словарь со статистикой.
+    
+    Args:
+        latencies (List[float]): Задержки запросов в секундах
+        elapsed (float): Общее время прогона в секундах
+        errors (int): Количество ответов с кодом ошибки
+        
+    Returns:
+        Dict[str, float]: Количество запросов, ошибок, RPS и перцентили в миллисекундах
+    """
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+def run_isolated(module: str, args: List[str], env: Optional[Dict[str, str]] = None) -> dict:
+    """
+    Запускает модуль бенчмарка в отдельном процессе и чистой рабочей директории.
+    
+    Перед запуском в рабочей директории применяются миграции схемы БД.
+    Дочерний процесс должен вывести результат последней строкой в формате JSON.
+    
+    Args:
+        module (str): Имя модуля для запуска через python -m
+        args (List[str]): Аргументы командной строки
+        env (Optional[Dict[str, str]]): Дополнительные переменные окружения
+        
+    Returns:
+        dict: Результат, выведенный дочерним процессом
+    """
+    child_env = dict(os.environ)
+    child_env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [REPO_ROOT, child_env.get("PYTHONPATH")])
+    )
+    # Бенчмарки входят и регистрируются с одного адреса быстрее лимита попыток
+    child_env.setdefault("AUTH_RATE_LIMIT", "0")
+    child_env.update(env or {})
+
+    with tempfile.TemporaryDirectory() as workdir:
+        subprocess.run(
+            [sys.executable, "-m", "app.database.migrations"],
+            cwd=workdir,
+            env=child_env,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        completed = subprocess.run(
+            [sys.executable, "-m", module, *args],
+            cwd=workdir,
+            env=child_env,
+            check=True,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def print_table(rows: Dict[str, Dict[str, float]]) -> None:
+    """
+    Печатает результаты нескольких прогонов в виде таблицы.
+    
+    Args:
+        rows (Dict[str, Dict[str, float]]): Название прогона -> статистика
+    """
+    width = max([24, *(len(name) + 2 for name in rows)])
+    print(f"{'run':<{width}}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in rows.items():
+        print(
+            f"{name:<{width}}{stats['requests']:>10}{stats['errors']:>8}{stats['rps']:>10.1f}"
+            f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+        )
+
+def add_mixed_load_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Добавляет параметры смешанной нагрузки в парсер аргументов.
+    
+    Args:
+        parser (argparse.ArgumentParser): Парсер аргументов бенчмарка
+    """
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--seed-posts", type=int, default=20)
+    parser.add_argument("--post-size", type=int, default=4096)
+    parser.add_argument("--write-ratio", type=float, default=0.3)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+
+def mixed_load_arguments(args: argparse.Namespace) -> List[str]:
+    """
+    Формирует аргументы смешанной нагрузки для дочернего процесса.
+    
+    Args:
+        args (argparse.Namespace): Разобранные аргументы бенчмарка
+        
+    Returns:
+        List[str]: Аргументы командной строки с флагом --worker
+    """
+    return [
+        "--worker",
+        "--concurrency", str(args.concurrency),
+        "--requests", str(args.requests),
+        "--users", str(args.users),
+        "--seed-posts", str(args.seed_posts),
+        "--post-size", str(args.post_size),
+        "--write-ratio", str(args.write_ratio),
+    ]
+
+async def _signup(client, email: str) -> dict:
+    response = await client.post("/api/signup", json={"email": email, "password": PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+async def run_mixed_load(args: argparse.Namespace) -> dict:
+    """
+    Подает на приложение конкурентную смешанную нагрузку через ASGI-транспорт httpx.
+    
+    Несколько пользователей читают список постов и создают посты; доля записей
+    задается параметром --write-ratio.
+    
+    Args:
+        args (argparse.Namespace): Параметры нагрузки
+        
+    Returns:
+        dict: Статистика прогона (см. summarize)
+    """
+    import httpx
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        users = [await _signup(client, f"user{i}@example.com") for i in range(args.users)]
+        text = "x" * args.post_size
+
+        # Начальное наполнение, чтобы чтение списка постов работало с реальной БД
+        for headers in users:
+            for _ in range(args.seed_posts):
+                await client.post("/api/posts", json={"text": text}, headers=headers)
+
+        rng = random.Random(42)
+        latencies = []
+        errors = 0
+        remaining = args.requests
+
+        async def run_one() -> None:
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                headers = rng.choice(users)
+                started = time.perf_counter()
+                if rng.random() < args.write_ratio:
+                    response = await client.post("/api/posts", json={"text": text}, headers=headers)
+                else:
+                    response = await client.get("/api/posts", headers=headers)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(run_one() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return summarize(latencies, elapsed, errors)
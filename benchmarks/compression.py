@@ -0,0 +1,108 @@
+"""
+Бенчмарк сжатия текста постов: размер файла БД и задержка чтения списка.
+
+Пользователь создает посты из хорошо сжимаемого текста (случайные слова
+из небольшого словаря), после чего измеряется размер ./data/app.db и
+задержка GET /api/posts при последовательном проходе по всем страницам.
+Размер БД учитывает и файл журнала WAL.
+Кэш ответов отключен (CACHE_MAX_BYTES=0), чтобы каждый запрос читал БД.
+
+Запуск:
+    python -m benchmarks.compression --posts 2000 --post-size 16384
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+from benchmarks.common import PASSWORD, print_table, run_isolated, summarize
+
+WORDS = (
+    "пост текст пользователь сервер запрос ответ база данных кэш индекс "
+    "post text user server request response database cache index page"
+).split()
+
+def _text(rng: random.Random, size: int) -> str:
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word.encode("utf-8")) + 1
+    return " ".join(words)
+
+async def _worker(args: argparse.Namespace) -> dict:
+    import httpx
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/api/signup", json={"email": "bench@example.com", "password": PASSWORD})
+        headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+        rng = random.Random(42)
+        for start in range(0, args.posts, 100):
+            posts = [{"text": _text(rng, args.post_size)} for _ in range(min(100, args.posts - start))]
+            response = await client.post("/api/posts/batch", json={"posts": posts}, headers=headers)
+            response.raise_for_status()
+
+        latencies = []
+        errors = 0
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            cursor = None
+            while True:
+                params = {"limit": args.page_size}
+                if cursor:
+                    params["cursor"] = cursor
+                request_started = time.perf_counter()
+                response = await client.get("/api/posts", params=params, headers=headers)
+                latencies.append(time.perf_counter() - request_started)
+                if response.status_code >= 400:
+                    errors += 1
+                    break
+                cursor = response.json()["next_cursor"]
+                if not cursor:
+                    break
+        elapsed = time.perf_counter() - started
+
+    stats = summarize(latencies, elapsed, errors)
+    # В режиме WAL часть данных может еще находиться в журнале
+    db_files = ("./data/app.db", "./data/app.db-wal")
+    stats["db_mb"] = sum(os.path.getsize(path) for path in db_files if os.path.exists(path)) / (1024 * 1024)
+    return stats
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=2000)
+    parser.add_argument("--post-size", type=int, default=16384)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(_worker(args))))
+        return
+
+    forwarded = [
+        "--worker",
+        "--posts", str(args.posts),
+        "--post-size", str(args.post_size),
+        "--page-size", str(args.page_size),
+        "--rounds", str(args.rounds),
+    ]
+    results = {
+        f"POST_COMPRESSION={codec}": run_isolated(
+            "benchmarks.compression", forwarded, {"POST_COMPRESSION": codec, "CACHE_MAX_BYTES": "0"}
+        )
+        for codec in ("none", "zlib")
+    }
+    print_table(results)
+    for name, stats in results.items():
+        print(f"{name:<24}db size {stats['db_mb']:.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Бенчмарк профиля SQLite: общий пул соединений против разделения чтения и записи.
+
+Нагрузка та же, что в benchmarks.async_db, но с большей долей записей.
+Прогоны выполняются в режиме DATABASE_MODE=async, где запросы к БД
+действительно выполняются параллельно. Сравниваются задержки и количество
+ошибок (в том числе "database is locked").
+
+Запуск:
+    python -m benchmarks.db_profile --concurrency 64 --requests 1000
+"""
+import argparse
+import asyncio
+import json
+
+from benchmarks.common import (
+    add_mixed_load_arguments, mixed_load_arguments, print_table, run_isolated, run_mixed_load,
+)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_mixed_load_arguments(parser)
+    parser.set_defaults(concurrency=64, requests=1000, write_ratio=0.5)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(run_mixed_load(args))))
+        return
+
+    forwarded = mixed_load_arguments(args)
+    runs = {
+        "shared pool": {"DATABASE_MODE": "async", "DATABASE_READ_WRITE_SPLIT": "0"},
+        "read/write split": {"DATABASE_MODE": "async", "DATABASE_READ_WRITE_SPLIT": "1"},
+    }
+    results = {
+        name: run_isolated("benchmarks.db_profile", forwarded, env)
+        for name, env in runs.items()
+    }
+    print_table(results)
+
+if __name__ == "__main__":
+    main()
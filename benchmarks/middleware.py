@@ -0,0 +1,122 @@
+"""
+Бенчмарк накладных расходов внешнего слоя middleware.
+
+Сравниваются два стека:
+    base_http - прежний обработчик ошибок БД, подключенный через
+                @app.middleware("http") (BaseHTTPMiddleware)
+    asgi      - текущий стек с RequestContextMiddleware (чистое ASGI)
+
+Для каждого стека измеряются:
+    root        - GET /, минимальный ответ: видны накладные расходы самого слоя
+    list_cached - GET /api/posts из кэша ответов
+    ndjson      - потоковый GET /api/posts (NDJSON) целиком; ASGI-транспорт
+                  httpx собирает тело ответа полностью, поэтому измеряется
+                  полное время, а не время до первой строки
+
+Запуск:
+    python -m benchmarks.middleware --requests 2000 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import PASSWORD, print_table, run_isolated, summarize
+
+STACKS = ("base_http", "asgi")
+
+def _use_base_http_stack(app) -> None:
+    """
+    Заменяет RequestContextMiddleware прежним обработчиком на BaseHTTPMiddleware.
+
+    Args:
+        app (FastAPI): Приложение
+    """
+    from fastapi import Request, Response
+    from sqlalchemy.exc import SQLAlchemyError
+    from app.middlewares.request_context import RequestContextMiddleware
+
+    app.user_middleware = [item for item in app.user_middleware if item.cls is not RequestContextMiddleware]
+
+    @app.middleware("http")
+    async def db_exception_handler(request: Request, call_next):
+        try:
+            return await call_next(request)
+        except SQLAlchemyError:
+            return Response(
+                content=str({"detail": "Ошибка базы данных"}),
+                status_code=500,
+                media_type="application/json"
+            )
+
+async def _worker(args: argparse.Namespace) -> dict:
+    import httpx
+    from app.main import app
+
+    if args.stack == "base_http":
+        _use_base_http_stack(app)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/api/signup", json={"email": "bench@example.com", "password": PASSWORD})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['token']}"}
+        await client.post(
+            "/api/posts/batch", json={"posts": [{"text": "x" * args.post_size}] * 100}, headers=headers
+        )
+        await client.get("/api/posts", headers=headers)
+
+        async def root() -> None:
+            await client.get("/")
+
+        async def list_cached() -> None:
+            await client.get("/api/posts", headers=headers)
+
+        async def ndjson() -> None:
+            await client.get("/api/posts", headers={**headers, "Accept": "application/x-ndjson"})
+
+        results = {}
+        for name, request in (("root", root), ("list_cached", list_cached), ("ndjson", ndjson)):
+            remaining = args.requests
+            latencies = []
+
+            async def run_one() -> None:
+                nonlocal remaining
+                while remaining > 0:
+                    remaining -= 1
+                    started = time.perf_counter()
+                    await request()
+                    latencies.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(run_one() for _ in range(args.concurrency)))
+            results[name] = summarize(latencies, time.perf_counter() - started)
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--post-size", type=int, default=1024)
+    parser.add_argument("--stack", choices=STACKS, help=argparse.SUPPRESS)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(_worker(args))))
+        return
+
+    forwarded = [
+        "--worker",
+        "--requests", str(args.requests),
+        "--concurrency", str(args.concurrency),
+        "--post-size", str(args.post_size),
+    ]
+    results = {}
+    for stack in STACKS:
+        stats = run_isolated("benchmarks.middleware", [*forwarded, "--stack", stack])
+        results.update({f"{stack}/{scenario}": row for scenario, row in stats.items()})
+    print_table(results)
+
+if __name__ == "__main__":
+    main()
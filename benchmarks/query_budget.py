@@ -0,0 +1,101 @@
+"""
+Проверка бюджета SQL-запросов основных сценариев API.
+
+Каждый сценарий выполняется внутри assert_query_budget (см. app.database.profiler):
+если сервис начинает выполнять больше SQL-запросов, чем указано
+в QUERY_BUDGETS, проверка печатает выполненные запросы и процесс
+завершается с кодом 1. Подходит для запуска в CI.
+
+Проверка выполняется в обоих режимах работы с БД (DATABASE_MODE sync и async),
+кэш ответов включен: для list_posts_cached бюджет - ноль запросов.
+
+Запуск:
+    python -m benchmarks.query_budget
+"""
+import argparse
+import asyncio
+import json
+import sys
+from typing import Dict
+
+from benchmarks.common import PASSWORD, run_isolated
+
+MODES = ("sync", "async")
+
+# Сценарий -> допустимое количество SQL-запросов. Создание пользователя и поста:
+# проверка (email или владельца), INSERT и перечитывание строки после commit;
+# создание поста также обновляет полнотекстовый индекс и статистику. Удаление
+# поста: DELETE ... RETURNING, удаление из индекса по rowid и статистика
+QUERY_BUDGETS: Dict[str, int] = {
+    "signup": 3,
+    "login": 1,
+    "create_post": 5,
+    "list_posts": 1,
+    "list_posts_cached": 0,
+    "search_posts": 2,
+    "post_stats": 1,
+    "delete_post": 3,
+}
+
+async def _worker() -> Dict[str, dict]:
+    import httpx
+    from app.database.profiler import assert_query_budget
+    from app.main import app
+
+    results: Dict[str, dict] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def check(name: str, request) -> httpx.Response:
+            budget = QUERY_BUDGETS[name]
+            try:
+                with assert_query_budget(budget) as stats:
+                    response = await request
+                error = None
+            except AssertionError as exc:
+                error = str(exc)
+            results[name] = {"queries": stats.count, "budget": budget, "error": error}
+            response.raise_for_status()
+            return response
+
+        credentials = {"email": "budget@example.com", "password": PASSWORD}
+        await check("signup", client.post("/api/signup", json=credentials))
+        response = await check("login", client.post("/api/login", json=credentials))
+        headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+        response = await check("create_post", client.post("/api/posts", json={"text": "budget"}, headers=headers))
+        post_id = response.json()["id"]
+        await check("list_posts", client.get("/api/posts", headers=headers))
+        await check("list_posts_cached", client.get("/api/posts", headers=headers))
+        await check("search_posts", client.get("/api/posts/search", params={"q": "budget"}, headers=headers))
+        await check("post_stats", client.get("/api/posts/stats", headers=headers))
+        await check("delete_post", client.delete(f"/api/posts/{post_id}", headers=headers))
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(_worker())))
+        return
+
+    failed = []
+    print(f"{'run':<32}{'queries':>10}{'budget':>10}")
+    for mode in MODES:
+        results = run_isolated("benchmarks.query_budget", ["--worker"], env={"DATABASE_MODE": mode})
+        for name, row in results.items():
+            run = f"{mode}/{name}"
+            over = row["error"] is not None
+            print(f"{run:<32}{row['queries']:>10}{row['budget']:>10}{'  OVER BUDGET' if over else ''}")
+            if over:
+                failed.append((run, row["error"]))
+
+    for run, error in failed:
+        print(f"\n{run}: {error}")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Микробенчмарк сериализации списка постов.
+
+Сравниваются три способа превратить страницу ORM-объектов Post в JSON-тело:
+    response_model+validator - путь FastAPI response_model=List[PostResponse] со схемой,
+                               наследующей PostBase (проверка размера текста на каждый пост)
+    response_model           - тот же путь с текущей схемой PostResponse
+    render_post_page         - прямая сериализация доверенных строк (см. schemas.post)
+
+Посты создаются в памяти, БД не используется: измеряется только сериализация.
+
+Запуск:
+    python -m benchmarks.serialization --posts 50 --post-size 16384
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from benchmarks.common import print_table, run_isolated, summarize
+
+MODES = ("response_model+validator", "response_model", "render_post_page")
+
+async def _worker(args: argparse.Namespace) -> dict:
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+    from app.models.post import Post
+    from app.models.user import User  # noqa: F401 - нужен для настройки связи Post.user
+    from app.schemas.post import PostBase, PostResponse, render_post_page
+
+    class ValidatedPostResponse(PostBase):
+        # Схема ответа в прежнем виде: наследует валидатор размера текста
+        text: str = PostResponse.model_fields["text"]
+        truncated: bool = PostResponse.model_fields["truncated"]
+        size: Optional[int] = PostResponse.model_fields["size"]
+        id: int
+        user_id: int
+        created_at: datetime
+
+        class Config:
+            from_attributes = True
+
+    posts = [
+        Post(id=index, text="x" * args.post_size, body_size=args.post_size, user_id=1, created_at=datetime.now())
+        for index in range(args.posts)
+    ]
+
+    if args.mode == "render_post_page":
+        async def serialize() -> bytes:
+            return render_post_page(posts, None)
+    else:
+        model = ValidatedPostResponse if args.mode == "response_model+validator" else PostResponse
+        field = create_response_field(name="Response", type_=List[model])
+
+        async def serialize() -> bytes:
+            content = await serialize_response(field=field, response_content=posts, is_coroutine=True)
+            return JSONResponse(content).body
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(args.rounds):
+        request_started = time.perf_counter()
+        await serialize()
+        latencies.append(time.perf_counter() - request_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=50)
+    parser.add_argument("--post-size", type=int, default=16384)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(_worker(args))))
+        return
+
+    forwarded = [
+        "--worker",
+        "--posts", str(args.posts),
+        "--post-size", str(args.post_size),
+        "--rounds", str(args.rounds),
+    ]
+    results = {
+        mode: run_isolated("benchmarks.serialization", [*forwarded, "--mode", mode])
+        for mode in MODES
+    }
+    print_table(results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Бенчмарк холодного запуска приложения.
+
+Каждый прогон - новый процесс Python в рабочей директории с БД, к которой
+заранее применены миграции. Измеряются:
+    import_ms    - импорт app.main (создание приложения)
+    startup_ms   - обработчики запуска (проверка версии схемы, фоновые задачи)
+    first_ms     - первый запрос POST /api/login (неизвестный пользователь):
+                   создание движков БД и первое соединение
+    process_ms   - полное время процесса от запуска до выхода
+
+Запрос подается напрямую в ASGI-приложение, без httpx, чтобы импорт
+клиента не смешивался со временем импорта приложения. Дополнительно
+выводится, какие из тяжелых библиотек (passlib, jwt, aiosqlite) загружены
+к моменту готовности приложения.
+
+Запуск:
+    python -m benchmarks.startup --runs 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.common import REPO_ROOT, percentile
+
+METRICS = ("import_ms", "startup_ms", "first_ms", "process_ms")
+
+# Библиотеки, которые приложение загружает только при необходимости
+LAZY_MODULES = ("passlib", "jwt", "aiosqlite")
+
+async def _call(app, method: str, path: str, body: bytes) -> int:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "server": ("bench", 80), "client": ("127.0.0.1", 1),
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode())],
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = 0
+
+    async def receive():
+        return messages.pop() if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+async def _worker() -> Dict[str, object]:
+    started = time.perf_counter()
+    from app.main import app
+    imported = time.perf_counter()
+
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        loaded = [name for name in LAZY_MODULES if name in sys.modules]
+        body = json.dumps({"email": "nobody@example.com", "password": "Startup123!"}).encode()
+        status = await _call(app, "POST", "/api/login", body)
+        first = time.perf_counter()
+
+    return {
+        "import_ms": (imported - started) * 1000,
+        "startup_ms": (ready - imported) * 1000,
+        "first_ms": (first - ready) * 1000,
+        "status": status,
+        "loaded": loaded,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(_worker())))
+        return
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_ROOT, env.get("PYTHONPATH")]))
+    samples: Dict[str, List[float]] = {name: [] for name in METRICS}
+    loaded: List[str] = []
+
+    with tempfile.TemporaryDirectory() as workdir:
+        subprocess.run(
+            [sys.executable, "-m", "app.database.migrations"],
+            cwd=workdir, env=env, check=True, stdout=subprocess.DEVNULL,
+        )
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            completed = subprocess.run(
+                [sys.executable, "-m", "benchmarks.startup", "--worker"],
+                cwd=workdir, env=env, check=True, stdout=subprocess.PIPE, text=True,
+            )
+            process_ms = (time.perf_counter() - started) * 1000
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            if result["status"] != 401:
+                raise RuntimeError(f"unexpected status of the first request: {result['status']}")
+            for name in METRICS[:-1]:
+                samples[name].append(result[name])
+            samples["process_ms"].append(process_ms)
+            loaded = result["loaded"]
+
+    print(f"{'metric':<16}{'p50':>10}{'p95':>10}{'min':>10}")
+    for name in METRICS:
+        values = samples[name]
+        print(f"{name:<16}{percentile(values, 50):>10.1f}{percentile(values, 95):>10.1f}{min(values):>10.1f}")
+    print(f"loaded at startup: {', '.join(loaded) or 'none'}")
+
+if __name__ == "__main__":
+    main()
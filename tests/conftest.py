@@ -0,0 +1,68 @@
+"""
+Общие фикстуры тестов.
+
+Приложение работает в процессе pytest. База данных, хранилище больших текстов
+и хранилище токенов создаются во временной рабочей директории (пути в настройках
+относительные), схема БД - миграциями.
+
+Настройки читаются из переменных окружения при импорте модулей приложения,
+поэтому режим работы с БД выбирается при запуске:
+    python -m pytest
+    DATABASE_MODE=async python -m pytest
+"""
+import os
+import uuid
+
+# Тесты регистрируют пользователей с одного адреса быстрее лимита попыток
+os.environ.setdefault("AUTH_RATE_LIMIT", "0")
+
+import httpx
+import pytest
+
+PASSWORD = "TestPassw0rd"
+
+@pytest.fixture(scope="session", autouse=True)
+def workdir(tmp_path_factory):
+    """
+    Рабочая директория с базой данных, к которой применены миграции.
+    """
+    from app.database.config import get_engine
+    from app.database.migrations import migrate
+
+    path = tmp_path_factory.mktemp("workdir")
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        migrate(get_engine())
+        yield path
+    finally:
+        os.chdir(previous)
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+async def client():
+    """
+    HTTP-клиент приложения (ASGI-транспорт httpx) с выполненными обработчиками запуска.
+    """
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            yield http
+
+@pytest.fixture
+def new_user(client):
+    """
+    Фабрика пользователей: каждый вызов регистрирует нового пользователя
+    и возвращает его заголовки авторизации.
+    """
+    async def create() -> dict:
+        email = f"user-{uuid.uuid4().hex}@example.com"
+        response = await client.post("/api/signup", json={"email": email, "password": PASSWORD})
+        assert response.status_code == 201, response.text
+        return {"Authorization": f"Bearer {response.json()['token']}"}
+    return create
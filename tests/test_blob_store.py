@@ -0,0 +1,83 @@
+"""
+Хранилище больших текстов постов.
+"""
+import hashlib
+import os
+import threading
+import time
+
+import pytest
+
+from app.database.config import get_engine
+from app.database.migrate_blobs import collect_garbage
+from app.services import blob_store
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def blob_threshold(monkeypatch):
+    # Тексты от 1 КиБ выносятся в хранилище
+    monkeypatch.setattr(blob_store, "BLOB_THRESHOLD", 1024)
+
+async def test_blob_write_runs_outside_event_loop(client, new_user, blob_threshold, monkeypatch):
+    headers = await new_user()
+    put_blob = blob_store.put_blob
+    threads = []
+
+    def recording_put_blob(data: bytes) -> str:
+        threads.append(threading.current_thread())
+        return put_blob(data)
+
+    monkeypatch.setattr(blob_store, "put_blob", recording_put_blob)
+    text = "large " * 1000
+    response = await client.post("/api/posts", json={"text": text}, headers=headers)
+    assert response.status_code == 201
+    assert response.json()["truncated"] is True
+    assert threads and threading.main_thread() not in threads
+
+    body = await client.get(
+        f"/api/posts/{response.json()['id']}/body",
+        headers={**headers, "Accept-Encoding": "identity"},
+    )
+    assert body.text == text
+    assert body.headers["etag"] == f'"{hashlib.sha256(text.encode()).hexdigest()}"'
+    assert int(body.headers["content-length"]) == len(text)
+
+    cached = await client.get(
+        f"/api/posts/{response.json()['id']}/body",
+        headers={**headers, "If-None-Match": body.headers["etag"]},
+    )
+    assert cached.status_code == 304
+
+async def test_blob_store_is_disabled_by_default(client, new_user):
+    headers = await new_user()
+    text = "large " * 20000
+    response = await client.post("/api/posts", json={"text": text}, headers=headers)
+    assert response.status_code == 201
+
+    page = await client.get("/api/posts", headers=headers)
+    assert page.json()["items"][0]["truncated"] is False
+    assert page.json()["items"][0]["text"] == text
+
+def _age(digest: str, seconds: float) -> None:
+    modified = time.time() - seconds
+    os.utime(blob_store.blob_path(digest), (modified, modified))
+
+def test_garbage_collection_skips_recent_blobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, "BLOB_STORE_DIR", str(tmp_path))
+    fresh = blob_store.put_blob(b"fresh orphan")
+    stale = blob_store.put_blob(b"stale orphan")
+    _age(stale, 2 * 3600)
+
+    assert collect_garbage(get_engine(), grace=3600) == 1
+    assert blob_store.list_blobs() == {fresh}
+
+def test_rewriting_existing_blob_refreshes_its_age(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, "BLOB_STORE_DIR", str(tmp_path))
+    digest = blob_store.put_blob(b"shared body")
+    _age(digest, 2 * 3600)
+
+    # Новый пост с тем же текстом ссылается на существующий файл
+    assert blob_store.put_blob(b"shared body") == digest
+    assert collect_garbage(get_engine(), grace=3600) == 0
+    assert blob_store.read_blob(digest) == b"shared body"
@@ -0,0 +1,43 @@
+"""
+Кэш ответов: инвалидация через поколения ключей, общие для воркеров.
+"""
+import pytest
+
+from app.database.config import get_session_factory
+from app.middlewares.caching import SQLiteCacheGenerations, get_cache_key
+from app.middlewares.token_store import TOKEN_STORE, TOKEN_STORE_PATH
+from app.schemas.post import PostCreate
+from app.services import post_service
+
+pytestmark = pytest.mark.anyio
+
+def test_generations_are_shared_between_instances(tmp_path):
+    path = str(tmp_path / "shared.db")
+    worker_a, worker_b = SQLiteCacheGenerations(path), SQLiteCacheGenerations(path)
+
+    assert worker_a.current("1-get_posts") == 0
+    worker_b.bump("1-get_posts")
+    worker_b.bump("1-get_posts")
+    assert worker_a.current("1-get_posts") == 2
+    assert worker_a.current("2-get_posts") == 0
+
+@pytest.mark.skipif(TOKEN_STORE != "sqlite", reason="поколения общие только при TOKEN_STORE=sqlite")
+async def test_write_in_other_worker_invalidates_cached_page(client, new_user):
+    headers = await new_user()
+    created = await client.post("/api/posts", json={"text": "first"}, headers=headers)
+    user_id = created.json()["user_id"]
+
+    page = await client.get("/api/posts", headers=headers)
+    assert len(page.json()["items"]) == 1
+    etag = page.headers["etag"]
+    assert (await client.get("/api/posts", headers={**headers, "If-None-Match": etag})).status_code == 304
+
+    # Другой воркер создает пост и инвалидирует кэш: его собственная копия
+    # кэша в памяти недоступна, общим остается только файл поколений
+    with get_session_factory()() as db:
+        post_service.create_post(db, PostCreate(text="second"), user_id)
+    SQLiteCacheGenerations(TOKEN_STORE_PATH).bump(get_cache_key(user_id, "get_posts"))
+
+    page = await client.get("/api/posts", headers={**headers, "If-None-Match": etag})
+    assert page.status_code == 200
+    assert [post["text"] for post in page.json()["items"]] == ["second", "first"]
@@ -0,0 +1,35 @@
+"""
+Разделение чтения и записи: выбор соединения сессией RoutingSession.
+"""
+from sqlalchemy import column, create_engine, insert, select, table, text
+
+from app.database.profile import RoutingSession, readonly_url, use_writer
+
+ITEMS = table("items", column("id"))
+
+def _session(tmp_path) -> RoutingSession:
+    url = f"sqlite:///{tmp_path / 'split.db'}"
+    writer = create_engine(url)
+    with writer.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+    return RoutingSession(writer=writer, reader=create_engine(readonly_url(url)))
+
+def test_reads_after_write_use_writer_until_transaction_end(tmp_path):
+    db = _session(tmp_path)
+    query = select(text("1"))
+
+    assert db.get_bind(clause=query) is db.reader
+    db.execute(insert(ITEMS).values(id=1))
+    assert db.get_bind(clause=query) is db.writer
+    db.commit()
+    assert db.get_bind(clause=query) is db.reader
+
+def test_use_writer_routes_reads_to_writer_until_transaction_end(tmp_path):
+    db = _session(tmp_path)
+    query = select(text("1"))
+
+    use_writer(db)
+    assert db.get_bind(clause=query) is db.writer
+    db.execute(query)
+    db.commit()
+    assert db.get_bind(clause=query) is db.reader
@@ -0,0 +1,91 @@
+"""
+Управление допуском запросов (load shedding).
+"""
+import asyncio
+import os
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.middlewares.load_shedding import (
+    AdmissionController, LOAD_SHEDDING, LoadSheddingMiddleware, OVERLOADED_DETAIL, route_class,
+)
+
+pytestmark = pytest.mark.anyio
+
+@pytest.mark.skipif("LOAD_SHEDDING" in os.environ, reason="значение задано явно")
+def test_load_shedding_is_disabled_by_default():
+    assert LOAD_SHEDDING is False
+
+def test_route_class():
+    assert route_class("POST", "/api/login") == "auth"
+    assert route_class("GET", "/api/posts") == "read"
+    assert route_class("DELETE", "/api/posts/1") == "write"
+
+def test_limits_shrink_under_loop_lag_and_recover():
+    controller = AdmissionController({"read": 100}, min_limit=4, lag_threshold=0.1, decrease_factor=0.5)
+
+    controller.observe_lag(0.2)
+    assert controller.limits["read"] == 50
+    for _ in range(10):
+        controller.observe_lag(0.2)
+    assert controller.limits["read"] == 4
+
+    controller.observe_lag(0.0)
+    assert controller.limits["read"] == 9
+    for _ in range(100):
+        controller.observe_lag(0.0)
+    assert controller.limits["read"] == 100
+
+def test_decisions_distinguish_full_and_reduced_limits():
+    controller = AdmissionController({"write": 1}, min_limit=1, lag_threshold=0.1)
+
+    assert controller.try_acquire("write")
+    assert not controller.try_acquire("write")
+    controller.release("write")
+    controller.limits["write"] = 0
+    assert not controller.try_acquire("write")
+
+    decisions = controller.stats()["decisions"]
+    assert decisions[("write", "admitted")] == 1
+    assert decisions[("write", "shed_in_flight")] == 1
+    assert decisions[("write", "shed_loop_lag")] == 1
+
+async def test_requests_over_class_limit_get_503():
+    controller = AdmissionController({"auth": 1, "read": 1, "write": 1})
+    release = asyncio.Event()
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow():
+        await release.wait()
+        return {}
+
+    @app.post("/fast")
+    async def fast():
+        return {}
+
+    @app.get("/metrics")
+    async def metrics():
+        return {}
+
+    transport = httpx.ASGITransport(app=LoadSheddingMiddleware(app, controller))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        pending = asyncio.create_task(http.get("/slow"))
+        while controller.in_flight["read"] == 0:
+            await asyncio.sleep(0)
+
+        shed = await http.get("/slow")
+        other_class = await http.post("/fast")
+        exempt = await http.get("/metrics")
+        release.set()
+        admitted = await pending
+
+    assert shed.status_code == 503
+    assert shed.json() == {"detail": OVERLOADED_DETAIL}
+    assert shed.headers["retry-after"] == "1"
+    assert other_class.status_code == 200
+    assert exempt.status_code == 200
+    assert admitted.status_code == 200
+    assert controller.in_flight == {"auth": 0, "read": 0, "write": 0}
@@ -0,0 +1,106 @@
+"""
+Удаление постов: согласованность постов, полнотекстового индекса и статистики.
+"""
+import asyncio
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.database.config import get_session_factory
+from app.models.post import Post, posts_fts
+from app.services import post_service
+from app.services.stats_service import find_stale_stats
+
+pytestmark = pytest.mark.anyio
+
+def assert_consistent() -> None:
+    """
+    Проверяет, что индекс содержит ровно существующие посты и не поврежден,
+    а статистика совпадает с вычисленной по таблице posts.
+    """
+    with get_session_factory()() as db:
+        assert set(db.scalars(select(posts_fts.c.rowid))) == set(db.scalars(select(Post.id)))
+        db.execute(insert(posts_fts).values(posts_fts="integrity-check"))
+        assert find_stale_stats(db) == []
+
+async def _create(client, headers, *texts) -> list:
+    response = await client.post("/api/posts/batch", json={"posts": [{"text": text} for text in texts]}, headers=headers)
+    assert response.status_code == 201, response.text
+    return [post["id"] for post in response.json()["items"]]
+
+async def _delete_batch(client, headers, post_ids):
+    return await client.request("DELETE", "/api/posts/batch", json={"post_ids": post_ids}, headers=headers)
+
+async def test_delete_updates_search_and_stats(client, new_user):
+    headers = await new_user()
+    first, second = await _create(client, headers, "alpha common", "beta common")
+
+    assert (await client.delete(f"/api/posts/{first}", headers=headers)).status_code == 204
+    assert (await client.delete(f"/api/posts/{first}", headers=headers)).status_code == 404
+
+    found = await client.get("/api/posts/search", params={"q": "common"}, headers=headers)
+    assert [post["id"] for post in found.json()["items"]] == [second]
+    stats = (await client.get("/api/posts/stats", headers=headers)).json()
+    assert (stats["post_count"], stats["total_bytes"]) == (1, len("beta common"))
+    assert_consistent()
+
+async def test_delete_of_foreign_post_is_forbidden(client, new_user):
+    owner, other = await new_user(), await new_user()
+    post_id, = await _create(client, owner, "owned")
+
+    assert (await client.delete(f"/api/posts/{post_id}", headers=other)).status_code == 403
+    assert (await client.get("/api/posts/stats", headers=owner)).json()["post_count"] == 1
+    assert_consistent()
+
+async def test_batch_delete_skips_missing_and_foreign_posts(client, new_user):
+    owner, other = await new_user(), await new_user()
+    own_ids = await _create(client, owner, "one", "two", "three")
+    foreign_id, = await _create(client, other, "foreign")
+
+    post_ids = [own_ids[0], own_ids[1], foreign_id, 10 ** 9]
+    response = await _delete_batch(client, owner, post_ids)
+    assert response.status_code == 200, response.text
+    assert [item["deleted"] for item in response.json()["items"]] == [True, True, False, False]
+
+    repeated = await _delete_batch(client, owner, own_ids[:2])
+    assert [item["deleted"] for item in repeated.json()["items"]] == [False, False]
+
+    assert (await client.get("/api/posts/stats", headers=owner)).json()["post_count"] == 1
+    assert (await client.get("/api/posts/stats", headers=other)).json()["post_count"] == 1
+    assert_consistent()
+
+async def test_concurrent_deletes_of_same_posts(client, new_user):
+    headers = await new_user()
+    post_ids = await _create(client, headers, *(f"concurrent {index}" for index in range(20)))
+
+    responses = await asyncio.gather(*(
+        client.delete(f"/api/posts/{post_id}", headers=headers)
+        for post_id in post_ids * 3
+    ))
+    assert Counter(response.status_code for response in responses) == {204: 20, 404: 40}
+
+    found = await client.get("/api/posts/search", params={"q": "concurrent"}, headers=headers)
+    assert found.status_code == 200
+    assert found.json()["items"] == []
+    assert (await client.get("/api/posts/stats", headers=headers)).json()["post_count"] == 0
+    assert_consistent()
+
+async def test_concurrent_batch_deletes_in_separate_sessions(client, new_user):
+    headers = await new_user()
+    post_ids = await _create(client, headers, *(f"batch {index}" for index in range(30)))
+    user_id = (await client.get("/api/posts", headers=headers)).json()["items"][0]["user_id"]
+
+    def delete_batch(ids):
+        with get_session_factory()() as db:
+            return post_service.delete_posts(db, ids, user_id)
+
+    # Пачки пересекаются: каждый пост запрашивают удалить три пачки
+    batches = [post_ids[start:start + 10] for start in range(0, 30, 5)] + [post_ids[:5], post_ids[-5:]]
+    with ThreadPoolExecutor(max_workers=len(batches)) as executor:
+        deleted = [post_id for result in executor.map(delete_batch, batches) for post_id in result]
+
+    assert sorted(deleted) == post_ids
+    assert (await client.get("/api/posts/stats", headers=headers)).json()["post_count"] == 0
+    assert_consistent()
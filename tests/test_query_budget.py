@@ -0,0 +1,60 @@
+"""
+Бюджет SQL-запросов основных сценариев API (см. assert_query_budget).
+
+Бюджеты общие с benchmarks.query_budget: рост числа запросов в сервисах
+роняет тест с перечнем выполненных запросов.
+"""
+import uuid
+
+import pytest
+
+from app.database.profiler import assert_query_budget
+from benchmarks.query_budget import QUERY_BUDGETS
+
+pytestmark = pytest.mark.anyio
+
+async def test_auth_query_budget(client):
+    credentials = {"email": f"budget-{uuid.uuid4().hex}@example.com", "password": "BudgetPassw0rd"}
+
+    with assert_query_budget(QUERY_BUDGETS["signup"]):
+        response = await client.post("/api/signup", json=credentials)
+    assert response.status_code == 201
+
+    with assert_query_budget(QUERY_BUDGETS["login"]):
+        response = await client.post("/api/login", json=credentials)
+    assert response.status_code == 200
+
+async def test_posts_query_budget(client, new_user):
+    headers = await new_user()
+
+    with assert_query_budget(QUERY_BUDGETS["create_post"]):
+        response = await client.post("/api/posts", json={"text": "budget"}, headers=headers)
+    assert response.status_code == 201
+    post_id = response.json()["id"]
+
+    with assert_query_budget(QUERY_BUDGETS["list_posts"]):
+        response = await client.get("/api/posts", headers=headers)
+    assert response.status_code == 200
+
+    with assert_query_budget(QUERY_BUDGETS["list_posts_cached"]):
+        response = await client.get("/api/posts", headers=headers)
+    assert response.status_code == 200
+
+    with assert_query_budget(QUERY_BUDGETS["search_posts"]):
+        response = await client.get("/api/posts/search", params={"q": "budget"}, headers=headers)
+    assert [post["id"] for post in response.json()["items"]] == [post_id]
+
+    with assert_query_budget(QUERY_BUDGETS["post_stats"]):
+        response = await client.get("/api/posts/stats", headers=headers)
+    assert response.json()["post_count"] == 1
+
+    with assert_query_budget(QUERY_BUDGETS["delete_post"]):
+        response = await client.delete(f"/api/posts/{post_id}", headers=headers)
+    assert response.status_code == 204
+
+async def test_budget_violation_lists_queries(client, new_user):
+    headers = await new_user()
+
+    with pytest.raises(AssertionError, match="SQL-запросов при бюджете 0"):
+        with assert_query_budget(0):
+            await client.get("/api/posts", headers=headers)
@@ -0,0 +1,60 @@
+"""
+Ограничение частоты попыток входа и регистрации (token bucket).
+"""
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+
+from app.middlewares.rate_limit import TokenBucketLimiter, body_email, rate_limit
+
+pytestmark = pytest.mark.anyio
+
+def test_bucket_allows_burst_then_refills():
+    limiter = TokenBucketLimiter(rate=1.0, burst=2)
+
+    assert limiter.acquire("ip", now=0.0) == 0
+    assert limiter.acquire("ip", now=0.0) == 0
+    assert limiter.acquire("ip", now=0.0) == pytest.approx(1.0)
+    assert limiter.acquire("ip", now=0.5) == pytest.approx(0.5)
+    assert limiter.acquire("ip", now=1.5) == 0
+    assert limiter.acquire("other", now=1.5) == 0
+    assert limiter.stats() == {"buckets": 2, "rejected": 2}
+
+def test_idle_buckets_are_evicted():
+    limiter = TokenBucketLimiter(rate=1.0, burst=2, max_keys=2)
+
+    limiter.acquire("a", now=0.0)
+    limiter.acquire("b", now=0.0)
+    limiter.acquire("c", now=0.0)
+    assert limiter.stats()["buckets"] == 2
+
+    # Через burst / rate секунд корзины заполнены и не отличаются от новых
+    limiter.acquire("d", now=2.0)
+    assert limiter.stats()["buckets"] == 1
+
+@pytest.mark.parametrize("rate, burst", [(0, 5), (-1.0, 5), (1.0, 0)])
+def test_non_positive_settings_are_rejected(rate, burst):
+    with pytest.raises(ValueError):
+        TokenBucketLimiter(rate, burst)
+
+async def test_dependency_rejects_with_retry_after():
+    limiter = TokenBucketLimiter(rate=1 / 60, burst=2)
+    app = FastAPI()
+
+    @app.post("/login", dependencies=[Depends(rate_limit(limiter, body_email))])
+    async def login():
+        return {}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        statuses = [
+            (await http.post("/login", json={"email": "Limited@Example.com"})).status_code
+            for _ in range(2)
+        ]
+        rejected = await http.post("/login", json={"email": "limited@example.com "})
+        other = await http.post("/login", json={"email": "other@example.com"})
+
+    assert statuses == [200, 200]
+    assert rejected.status_code == 429
+    assert rejected.headers["retry-after"] == "60"
+    assert other.status_code == 200
@@ -0,0 +1,28 @@
+"""
+Контекст запроса: ID запроса и обработка ошибок базы данных.
+"""
+import logging
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.middlewares.request_context import DATABASE_ERROR_DETAIL
+
+pytestmark = pytest.mark.anyio
+
+async def test_database_error_is_logged_with_request_id(client, new_user, monkeypatch, caplog):
+    headers = await new_user()
+
+    async def failing_page(*args, **kwargs):
+        raise OperationalError("SELECT 1", {}, Exception("database is locked"))
+
+    monkeypatch.setattr("app.routers.posts.get_user_posts_page", failing_page)
+    with caplog.at_level(logging.ERROR, logger="app.request"):
+        response = await client.get("/api/posts", headers={**headers, "X-Request-ID": "req-42"})
+
+    assert response.status_code == 500
+    assert response.json() == {"detail": DATABASE_ERROR_DETAIL}
+    assert response.headers["x-request-id"] == "req-42"
+    [record] = caplog.records
+    assert "request_id=req-42" in record.getMessage()
+    assert record.exc_info[0] is OperationalError